@@ -1,13 +1,34 @@
+import asyncio
 import json
 import os
-from typing import Dict
+from typing import AsyncIterator, Dict, Optional, Tuple
 
+import httpx
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+from utils.constants import patch_instruction
+from utils.json_patch import resolve_patch_response
+from utils.json_stream import JSONStreamParser
+from utils.json_validator import validate_form
+from utils.response_cache import ResponseCache, get_default_cache
 
 # Load environment variables
 load_dotenv()
 
+OLLAMA_BASE_URL = 'http://192.168.0.225:11434/v1'
+DEEPSEEK_BASE_URL = "https://api.deepseek.com/beta"
+
+# Maximum number of generations in flight per backend for the async client.
+# Ollama serialises work on a single GPU box, the hosted API scales out.
+DEFAULT_MAX_CONCURRENCY = {
+    "ollama": int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4")),
+    "deepseek": int(os.getenv("DEEPSEEK_MAX_CONCURRENCY", "32")),
+}
+
+# One semaphore per (backend, limit), shared by every AsyncAIClient in the process with that limit
+_backend_semaphores: Dict[Tuple[str, int], asyncio.Semaphore] = {}
+
 
 def _create_messages(context: Dict) -> list:
     system_prompt = """You are a form generation assistant. Follow these rules:
@@ -74,74 +95,171 @@ def _create_messages(context: Dict) -> list:
         {"role": "user", "content": user_message}
     ]
 
-def process_streaming_response(response) -> str:
-    """Process streaming response, capturing only valid JSON"""
+def _create_patch_messages(context: Dict) -> list:
+    """Messages for patch edit mode: the model answers with JSON Patch operations"""
+    fields = context["current_form"].get("fields", [])
+    field_indexes = "\n".join(f"{i}: {field.get('name')}" for i, field in enumerate(fields))
+    user_message = f"""Current form:
+    {json.dumps(context['current_form'], indent=2)}
+
+    Field indexes:
+    {field_indexes}
+
+    User request: {context['request']}"""
+
+    return [
+        {"role": "system", "content": patch_instruction},
+        {"role": "user", "content": user_message}
+    ]
+
+
+def _use_patch_mode(edit_mode: str, context: Dict) -> bool:
+    """Patch mode only makes sense when there is an existing form to patch"""
+    return edit_mode == "patch" and bool(context["current_form"].get("fields"))
+
+
+def _chunk_content(chunk) -> str:
+    """Extract the text delta from a streamed chat completion chunk"""
+    if chunk.choices and hasattr(chunk.choices[0].delta, 'content'):
+        return chunk.choices[0].delta.content or ""
+    return ""
+
+
+def process_streaming_response(response, raise_errors: bool = False) -> Dict:
+    """
+    Process streaming response, returning the first complete JSON object.
+
+    Errors raised by the stream are logged and {} is returned, or re-raised
+    with raise_errors so retries and circuit breakers see them.
+    """
     print("\nDebug: Processing AI response...")
-    buffer = ""
-    in_json = False
-    json_depth = 0
-    
+    parser = JSONStreamParser()
+
     try:
         for chunk in response:
-            if hasattr(chunk.choices[0].delta, 'content'):
-                content = chunk.choices[0].delta.content
-                if content:
-                    # Skip everything until we find the first '{'
-                    if '{' in content and not in_json:
-                        in_json = True
-                        start_pos = content.find('{')
-                        content = content[start_pos:]
-                        
-                    if in_json:
-                        # Count JSON nesting
-                        json_depth += content.count('{') - content.count('}')
-                        buffer += content
-                        
-                        # Print only JSON content
-                        print(content, end='', flush=True)
-                        
-                        # If we've closed all JSON brackets, we're done
-                        if json_depth == 0:
-                            break
-        
-        # Validate and clean JSON
+            content = _chunk_content(chunk)
+            if content:
+                # Print only JSON content
+                if parser.feed(content) or parser.started:
+                    print(content, end='', flush=True)
+                if parser.done:
+                    break
+
         try:
-            # Parse JSON to validate it
-            json_obj = json.loads(buffer)
-            # Convert back to string with proper formatting
-            return json.dumps(json_obj)
+            return parser.result() or {}
         except json.JSONDecodeError:
             print("\nDebug: Invalid JSON structure")
-            return ""
-            
+            return {}
+
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"\nError in process_streaming_response: {str(e)}")
-        return ""
+        return {}
+
+
+async def aprocess_streaming_response(response, raise_errors: bool = False) -> Dict:
+    """Async counterpart of process_streaming_response for AsyncOpenAI streams"""
+    parser = JSONStreamParser()
+
+    try:
+        async for chunk in response:
+            if parser.feed(_chunk_content(chunk)):
+                break
+
+        try:
+            return parser.result() or {}
+        except json.JSONDecodeError:
+            print("\nDebug: Invalid JSON structure")
+            return {}
+
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"\nError in aprocess_streaming_response: {str(e)}")
+        return {}
+
+
+def _parse_response(result: Dict) -> Dict:
+    """Check a full-form response against utils.json_validator; invalid forms become {}"""
+    if not result:
+        return {}
+    errors = validate_form(result)
+    if errors:
+        print(f"\nDebug: Invalid form structure: {'; '.join(map(str, errors))}")
+        return {}
+    return result
+
+
+def _backend_config(use_ollama: bool) -> Dict[str, str]:
+    """Connection settings shared by the sync and async clients"""
+    if use_ollama:
+        return {
+            "backend": "ollama",
+            "base_url": OLLAMA_BASE_URL,
+            "api_key": "ollama",
+            # "model": "deepseek-r1:14b",
+            "model": "deepseek-r1:8b",
+            # "model": "deepseek-r1:7b",
+        }
+    return {
+        "backend": "deepseek",
+        "base_url": DEEPSEEK_BASE_URL,
+        "api_key": os.getenv("API_KEY"),
+        "model": "deepseek-chat",
+    }
+
+
+def _backend_semaphore(backend: str, limit: int) -> asyncio.Semaphore:
+    """
+    Return the process-wide semaphore limiting concurrent calls to a backend.
+
+    Clients share it only when they use the same limit, so each client's
+    max_concurrency is the limit that is actually enforced for it.
+    """
+    semaphore = _backend_semaphores.get((backend, limit))
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(limit)
+        _backend_semaphores[(backend, limit)] = semaphore
+    return semaphore
 
 
 class AIClient:
-    def __init__(self, use_ollama: bool = True):
+    def __init__(self, use_ollama: bool = True, cache: Optional[ResponseCache] = None,
+                 http_client: Optional[httpx.Client] = None):
         self.use_ollama = use_ollama
         self.current_form = {"fields": []}
 
-        if use_ollama:
-            self.client = OpenAI(
-                base_url='http://192.168.0.225:11434/v1',
-                api_key='ollama',
-            )
-            # self.model = "deepseek-r1:14b"
-            self.model = "deepseek-r1:8b"
-            # self.model = "deepseek-r1:7b"
-        else:
-            self.client = OpenAI(
-                api_key=os.getenv("API_KEY"),
-                base_url="https://api.deepseek.com/beta",
-            )
-            self.model = "deepseek-chat"
+        config = _backend_config(use_ollama)
+        self.backend = config["backend"]
+        self.client = OpenAI(
+            base_url=config["base_url"],
+            api_key=config["api_key"],
+            http_client=http_client,
+        )
+        self.model = config["model"]
+        self.cache = cache if cache is not None else get_default_cache()
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"{self.backend}:{self.model}"
+
+    def fetch_chat_response(self, content: str, current_form: Dict = None, edit_mode: str = "full",
+                            raise_errors: bool = False) -> Dict:
+        """
+        Send request to the appropriate API endpoint with context.
 
-    def fetch_chat_response(self, content: str, current_form: Dict = None) -> str:
-        """Send request to the appropriate API endpoint with context"""
+        With edit_mode="patch" the model returns JSON Patch operations that are
+        applied locally; if they don't apply to a valid form, the request is
+        repeated in full-form mode. Errors are logged and an empty dict is
+        returned unless raise_errors is set.
+        """
         try:
+            cached = self.cache.get(self.cache_namespace, content, current_form)
+            if cached is not None:
+                print("\nDebug: Response served from cache")
+                return cached
+
             print("\nDebug: Creating context...")
             context = {
                 "current_form": current_form if current_form else {"fields": []},
@@ -149,7 +267,8 @@ class AIClient:
             }
 
             print("\nDebug: Generating messages...")
-            messages = _create_messages(context)
+            patch_mode = _use_patch_mode(edit_mode, context)
+            messages = _create_patch_messages(context) if patch_mode else _create_messages(context)
 
             print(f"\nDebug: Connecting to {self.client.base_url}")
             print(f"Debug: Using model {self.model}")
@@ -160,11 +279,145 @@ class AIClient:
                 stream=True
             )
 
-            return process_streaming_response(response)
+            result = process_streaming_response(response, raise_errors)
+            if patch_mode:
+                result = resolve_patch_response(result, context["current_form"])
+                if result is None:
+                    print("\nDebug: Patch rejected, falling back to full form mode")
+                    return self.fetch_chat_response(content, current_form, edit_mode="full",
+                                                    raise_errors=raise_errors)
+            else:
+                result = _parse_response(result)
+
+            self.cache.set(self.cache_namespace, content, current_form, result)
+            return result
 
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error in fetch_chat_response: {str(e)}")
-            return ""
+            return {}
+
+    def generate_form(self, prompt_input: str, current_form: Dict = None, edit_mode: str = "full",
+                      raise_errors: bool = False) -> Dict:
+        """Same interface as the api clients: returns {"message": str, "form_data": Dict}"""
+        response = self.fetch_chat_response(prompt_input, current_form, edit_mode=edit_mode,
+                                            raise_errors=raise_errors)
+        if not response or "form_data" not in response:
+            return {"message": "Error: No valid response from the model", "form_data": {"fields": []}}
+        return response
+
+
+class AsyncAIClient:
+    """
+    Non-blocking variant of AIClient built on AsyncOpenAI.
+
+    Generations are awaited instead of iterated on the calling thread, so a
+    slow model never stalls the event loop. The number of generations in
+    flight per backend is capped by a semaphore shared across instances with
+    the same max_concurrency.
+    """
+
+    def __init__(self, use_ollama: bool = True, max_concurrency: Optional[int] = None,
+                 cache: Optional[ResponseCache] = None, http_client: Optional[httpx.AsyncClient] = None):
+        self.use_ollama = use_ollama
+
+        config = _backend_config(use_ollama)
+        self.backend = config["backend"]
+        self.client = AsyncOpenAI(
+            base_url=config["base_url"],
+            api_key=config["api_key"],
+            http_client=http_client,
+        )
+        self.model = config["model"]
+        self.max_concurrency = max_concurrency or DEFAULT_MAX_CONCURRENCY[self.backend]
+        self.cache = cache if cache is not None else get_default_cache()
+
+    @property
+    def cache_namespace(self) -> str:
+        return f"{self.backend}:{self.model}"
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        return _backend_semaphore(self.backend, self.max_concurrency)
+
+    async def fetch_chat_response(self, content: str, current_form: Dict = None, meta: Optional[Dict] = None,
+                                  edit_mode: str = "full", raise_errors: bool = False) -> Dict:
+        """
+        Send request to the appropriate API endpoint without blocking the event loop.
+
+        With edit_mode="patch" the model returns JSON Patch operations that are
+        applied locally, falling back to full-form mode if they don't apply.
+        If a meta dict is given, it is updated with details about how the
+        response was produced (e.g. {"cached": False, "edit_mode": "patch"}).
+        Errors are logged and an empty dict is returned unless raise_errors is set.
+        """
+        try:
+            cached = self.cache.get(self.cache_namespace, content, current_form)
+            if meta is not None:
+                meta["cached"] = cached is not None
+            if cached is not None:
+                return cached
+
+            context = {
+                "current_form": current_form if current_form else {"fields": []},
+                "request": content
+            }
+            patch_mode = _use_patch_mode(edit_mode, context)
+            messages = _create_patch_messages(context) if patch_mode else _create_messages(context)
+
+            async with self.semaphore:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    stream=True
+                )
+                result = await aprocess_streaming_response(response, raise_errors)
+
+            if patch_mode:
+                result = resolve_patch_response(result, context["current_form"])
+                if result is None:
+                    # Retry outside the semaphore so a limit of 1 can't deadlock
+                    return await self.fetch_chat_response(content, current_form, meta=meta, edit_mode="full",
+                                                          raise_errors=raise_errors)
+            else:
+                result = _parse_response(result)
+            if meta is not None:
+                meta["edit_mode"] = "patch" if patch_mode else "full"
+
+            self.cache.set(self.cache_namespace, content, current_form, result)
+            return result
+
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Error in AsyncAIClient.fetch_chat_response: {str(e)}")
+            return {}
+
+    async def stream_chat_response(self, content: str, current_form: Dict = None) -> AsyncIterator[str]:
+        """
+        Yield the raw text deltas of a generation as they arrive.
+
+        The backend slot is held until the generator is exhausted or closed, so
+        callers that stop early should close it (e.g. with contextlib.aclosing).
+        Errors propagate to the caller.
+        """
+        context = {
+            "current_form": current_form if current_form else {"fields": []},
+            "request": content
+        }
+        messages = _create_messages(context)
+
+        async with self.semaphore:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                stream=True
+            )
+            async for chunk in response:
+                text = _chunk_content(chunk)
+                if text:
+                    yield text
 
 
 def main():
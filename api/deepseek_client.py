@@ -1,9 +1,14 @@
 import os
 import json
 import time
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Union
+import httpx
 from openai import OpenAI
-from utils.constants import instruction
+from utils.constants import instruction, patch_instruction
+from utils.json_patch import resolve_patch_response
+from utils.json_stream import JSONStreamParser
+from utils.json_validator import validate_form
+from utils.response_cache import ResponseCache, get_default_cache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,15 +27,22 @@ class DeepSeekClient:
         client (OpenAI): Configured OpenAI client instance
         model (str): The DeepSeek model identifier to use
         system_prompt (str): Instructions for the AI model
+        cache (ResponseCache): Cache consulted before calling the API
     """
 
-    def __init__(self):
+    def __init__(self, cache: Optional[ResponseCache] = None, http_client: Optional[httpx.Client] = None):
         """
         Initialize the DeepSeek client with API configuration.
 
         Sets up the connection to DeepSeek's API using the OpenAI client library.
         Requires the DEEPSEEK_API_KEY environment variable to be set.
 
+        Args:
+            cache (Optional[ResponseCache]): Response cache to use; defaults to the
+                                             process-wide cache
+            http_client (Optional[httpx.Client]): Connection pool to send requests through;
+                                                  defaults to the OpenAI library's own client
+
         Raises:
             ValueError: If the DEEPSEEK_API_KEY environment variable is not set
         """
@@ -41,25 +53,38 @@ class DeepSeekClient:
         # Configure OpenAI client to use DeepSeek API
         self.client = OpenAI(
             api_key=self.api_key,
-            base_url="https://api.deepseek.com/beta"
+            base_url="https://api.deepseek.com/beta",
+            http_client=http_client
         )
         self.model = "deepseek-chat"
         self.system_prompt = instruction
+        self.cache = cache if cache is not None else get_default_cache()
 
-    def generate_form(self, prompt_input: str, current_form: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def generate_form(self, prompt_input: str, current_form: Optional[Dict[str, Any]] = None,
+                      edit_mode: str = "full",
+                      on_first_token: Optional[Callable[[], None]] = None,
+                      raise_errors: bool = False) -> Dict[str, Any]:
         """
         Generate a form based on user input using DeepSeek model.
 
         This method handles the complete workflow of form generation:
-        1. Creating appropriate messages with context
-        2. Sending the request to the DeepSeek API
-        3. Processing the streaming response
-        4. Parsing the response into a structured form
+        1. Returning a cached response for an identical earlier request
+        2. Creating appropriate messages with context
+        3. Sending the request to the DeepSeek API
+        4. Processing the streaming response
+        5. Parsing the response into a structured form
 
         Args:
             prompt_input (str): The user's natural language form requirements
             current_form (Optional[Dict[str, Any]]): The existing form structure to modify,
                                                     or None to create a new form
+            edit_mode (str): "full" to have the model return the whole form, or "patch" to
+                             have it return JSON Patch operations that are applied locally.
+                             Patch mode falls back to full mode if the patch doesn't apply.
+            on_first_token (Optional[Callable[[], None]]): Called when the first content
+                                                           arrives (or on a cache hit)
+            raise_errors (bool): Re-raise API errors instead of returning an error response,
+                                 so callers such as api.resilience can retry or fail over
 
         Returns:
             Dict[str, Any]: Dictionary containing the generated form data or error information
@@ -69,12 +94,19 @@ class DeepSeekClient:
             if current_form is None:
                 current_form = {"fields": []}
 
+            cached = self.cache.get(self.model, prompt_input, current_form)
+            if cached is not None:
+                if on_first_token:
+                    on_first_token()
+                return cached
+
             context = {
                 "current_form": current_form,
                 "request": prompt_input
             }
 
-            messages = self._create_messages(context)
+            patch_mode = edit_mode == "patch" and bool(current_form.get("fields"))
+            messages = self._create_patch_messages(context) if patch_mode else self._create_messages(context)
 
             response = self.client.chat.completions.create(
                 model=self.model,
@@ -82,10 +114,19 @@ class DeepSeekClient:
                 stream=True
             )
 
-            response_text = self._process_streaming_response(response)
-            return self._parse_response(response_text)
+            response_obj = self._process_streaming_response(response, on_first_token, raise_errors)
+            if patch_mode:
+                response_obj = resolve_patch_response(response_obj, current_form)
+                if response_obj is None:
+                    return self.generate_form(prompt_input, current_form, edit_mode="full",
+                                              on_first_token=on_first_token, raise_errors=raise_errors)
+            result = self._parse_response(response_obj)
+            self.cache.set(self.model, prompt_input, current_form, result)
+            return result
 
         except Exception as e:
+            if raise_errors:
+                raise
             return {
                 "message": f"Error: {str(e)}",
                 "form_data": {"fields": []}
@@ -122,67 +163,96 @@ class DeepSeekClient:
             {"role": "user", "content": user_message}
         ]
 
-    def _process_streaming_response(self, response) -> str:
+    def _create_patch_messages(self, context: Dict[str, Any]) -> List[Dict[str, str]]:
+        """
+        Create message structure for a patch edit mode request.
+
+        The current form is sent together with the index of each field so the
+        model can address fields with JSON Patch paths like /fields/2/required.
+
+        Args:
+            context (Dict[str, Any]): Dictionary containing the current form and user request
+
+        Returns:
+            List[Dict[str, str]]: List of message objects with role and content keys
+        """
+        fields = context["current_form"].get("fields", [])
+        field_indexes = "\n".join(f"{i}: {field.get('name')}" for i, field in enumerate(fields))
+        user_message = f"""Current form:
+        {json.dumps(context['current_form'], indent=2)}
+
+        Field indexes:
+        {field_indexes}
+
+        User request: {context['request']}"""
+
+        return [
+            {"role": "system", "content": patch_instruction},
+            {"role": "user", "content": user_message}
+        ]
+
+    def _process_streaming_response(self, response,
+                                    on_first_token: Optional[Callable[[], None]] = None,
+                                    raise_errors: bool = False) -> Dict[str, Any]:
         """
         Process streaming response, capturing valid JSON.
 
-        Handles chunked streaming responses from the API, detecting and
-        extracting complete JSON objects by tracking opening and closing braces.
+        Feeds chunks into the shared JSONStreamParser, which tracks nesting
+        outside string literals and decodes the object once it is complete.
 
         Args:
             response: The streaming response iterator from the API call
+            on_first_token (Optional[Callable[[], None]]): Called once when the first content arrives
+            raise_errors (bool): Re-raise errors from the stream (and a timeout as TimeoutError)
+                                 instead of returning an error response
 
         Returns:
-            str: The complete JSON response as a string, or empty string if parsing fails
+            Dict[str, Any]: The decoded response object, or an error response if parsing fails
         """
-        buffer = ""
-        in_json = False
-        json_depth = 0
+        parser = JSONStreamParser()
         start_time = time.time()
 
         try:
             for chunk in response:
                 if time.time() - start_time > 60:
-                    return json.dumps({"message": "Response timeout after 60 sec", "form_data": {"fields": []}})
-                if hasattr(chunk.choices[0].delta, 'content'):
-                    content = chunk.choices[0].delta.content
-                    if content:
-                        if '{' in content and not in_json:
-                            in_json = True
-                            start_pos = content.find('{')
-                            content = content[start_pos:]
-
-                        if in_json:
-                            json_depth += content.count('{') - content.count('}')
-                            buffer += content
-
-                            if json_depth == 0:
-                                break
+                    if raise_errors:
+                        raise TimeoutError("Response timeout after 60 sec")
+                    return {"message": "Response timeout after 60 sec", "form_data": {"fields": []}}
+                if chunk.choices and hasattr(chunk.choices[0].delta, 'content'):
+                    content = chunk.choices[0].delta.content or ""
+                    if content and on_first_token:
+                        on_first_token()
+                        on_first_token = None
+                    if parser.feed(content):
+                        break
 
             try:
-                json_obj = json.loads(buffer)
-                return json.dumps(json_obj)
+                return parser.result()
             except json.JSONDecodeError:
-                return json.dumps({
+                return {
                     "message": "Error: Failed to parse response from DeepSeek",
                     "form_data": {"fields": []}
-                })
+                }
 
         except Exception as e:
-            return json.dumps({
+            if raise_errors:
+                raise
+            return {
                 "message": f"Error processing streaming response: {str(e)}",
                 "form_data": {"fields": []}
-            })
+            }
 
-    def _parse_response(self, ai_response: str) -> Dict[str, Any]:
+    def _parse_response(self, ai_response: Union[str, Dict[str, Any], None]) -> Dict[str, Any]:
         """
         Parse the AI response and extract form data.
 
-        Validates the response format and ensures it contains the expected
-        structure with form fields.
+        Validates the response format and checks the form against the schema
+        in utils.json_validator; an invalid form is replaced by an error
+        response listing every problem.
 
         Args:
-            ai_response (str): The JSON string response from the AI model
+            ai_response (Union[str, Dict[str, Any], None]): The JSON string or already decoded
+                                                           response from the AI model
 
         Returns:
             Dict[str, Any]: Dictionary containing the parsed form data or error information
@@ -192,12 +262,16 @@ class DeepSeekClient:
             if not ai_response:
                 return {"message": "Empty response", "form_data": {"fields": []}}
 
-            form_data = json.loads(ai_response)
+            form_data = json.loads(ai_response) if isinstance(ai_response, str) else ai_response
 
             if not isinstance(form_data, dict):
                 return {"message": "Invalid response format", "form_data": {"fields": []}}
 
             if "form_data" in form_data and "fields" in form_data["form_data"]:
+                errors = validate_form(form_data)
+                if errors:
+                    return {"message": f"Invalid form structure: {'; '.join(map(str, errors))}",
+                            "form_data": {"fields": []}}
                 return form_data
 
             return {"message": "Missing required fields in response", "form_data": {"fields": []}}
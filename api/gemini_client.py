@@ -3,10 +3,13 @@ module to interact with the Gemini API
 """
 import os
 import json
+from typing import Callable, Optional
 from google import genai
 from google.genai import types
 from dotenv import load_dotenv
 from utils.constants import instruction
+from utils.json_validator import validate_form
+from utils.response_cache import ResponseCache, get_default_cache
 
 load_dotenv()
 
@@ -21,6 +24,10 @@ def _parse_response(ai_response: str) -> dict:
     try:
         response_obj = json.loads(cleaned_response)
         if "form_data" in response_obj and "fields" in response_obj["form_data"]:
+            errors = validate_form(response_obj)
+            if errors:
+                return {"message": f"Invalid form structure: {'; '.join(map(str, errors))}",
+                        "form_data": {"fields": []}}
             return response_obj  # Return the full response including a message
         return {"message": "Invalid response format", "form_data": {"fields": []}}
     except json.JSONDecodeError as e:
@@ -36,24 +43,36 @@ class GeminiClient:
     Class to interact with the Gemini API
     """
 
-    def __init__(self):
+    def __init__(self, cache: ResponseCache = None):
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise ValueError("GEMINI_API_KEY environment variable not set")
 
         self.client = genai.Client(api_key=api_key)
         self.model = "gemini-2.0-flash"
+        self.cache = cache if cache is not None else get_default_cache()
 
-    def generate_form(self, prompt_input: str, current_form: dict = None) -> dict:
+    def generate_form(self, prompt_input: str, current_form: dict = None,
+                      on_first_token: Optional[Callable[[], None]] = None,
+                      raise_errors: bool = False) -> dict:
         """
-        Generate a form based on user input
+        Generate a form based on user input.
+        When on_first_token is given the response is streamed so the callback
+        fires as soon as the first text arrives. With raise_errors, API errors
+        propagate instead of being turned into an error response.
         """
         if current_form is None:
             current_form = {"fields": []}
 
+        cached = self.cache.get(self.model, prompt_input, current_form)
+        if cached is not None:
+            if on_first_token:
+                on_first_token()
+            return cached
+
         try:
             dynamic_prompt = _create_prompt(prompt_input, current_form)
-            response = self.client.models.generate_content(
+            request = dict(
                 model=self.model,
                 config=types.GenerateContentConfig(
                     system_instruction=instruction,
@@ -62,9 +81,23 @@ class GeminiClient:
                 ),
                 contents=[dynamic_prompt]
             )
-            response_text = response.candidates[0].content.parts[0].text
-            return _parse_response(response_text)
+            if on_first_token:
+                parts = []
+                for chunk in self.client.models.generate_content_stream(**request):
+                    if chunk.text:
+                        if not parts:
+                            on_first_token()
+                        parts.append(chunk.text)
+                response_text = "".join(parts)
+            else:
+                response = self.client.models.generate_content(**request)
+                response_text = response.candidates[0].content.parts[0].text
+            result = _parse_response(response_text)
+            self.cache.set(self.model, prompt_input, current_form, result)
+            return result
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error generating form: {type(e).__name__} - {str(e)}")
             return {
                 "message": f"Error: {type(e).__name__} - {str(e)}",
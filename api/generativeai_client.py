@@ -3,36 +3,76 @@ module to interact with the Gemini API (migrated to google.generativeai)
 """
 import os
 import json
+from collections import deque
 import google.generativeai as genai
 from dotenv import load_dotenv
 from utils.constants import instruction
+from utils.json_validator import validate_form
 
 load_dotenv()
 
+# Approximate number of tokens the conversation history may use per request
+DEFAULT_HISTORY_TOKEN_BUDGET = int(os.getenv("GENERATIVEAI_HISTORY_TOKENS", "2000"))
+# Dropped requests kept (as plain text) in the summary of older turns
+MAX_SUMMARY_REQUESTS = 20
 
-def _create_prompt(user_input: str, current_form: dict) -> str:
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local token estimate (about 4 characters per token for English/JSON).
+
+    Used for history budgeting on every turn; use GenerativeAIClient.count_prompt_tokens
+    for an exact count from the API.
+    """
+    return len(text) // 4 + 1
+
+
+def _create_prompt(user_input: str, current_form: dict, summary: str = "") -> str:
     """
     Creates a formatted prompt for the Generative AI model.
 
+    The system instruction is configured once on the model, so the prompt only
+    carries the latest form snapshot, the request and, if older turns were
+    dropped from the history, a short summary of them.
+
     Args:
         user_input (str): The user's natural language request about form creation/modification
         current_form (dict): The current state of the form with all fields and properties
+        summary (str): Summary of turns dropped from the history, if any
 
     Returns:
         str: A formatted prompt string ready to be sent to the model
     """
-    prompt_template = f"""{instruction}
-        Current form: {json.dumps(current_form)}\nUser input: {user_input}"""
+    prompt_template = f"Current form: {json.dumps(current_form)}\nUser input: {user_input}"
+    if summary:
+        prompt_template = f"{summary}\n{prompt_template}"
 
     return prompt_template
 
 
+def _reply_message(ai_response: str) -> str:
+    """
+    Extracts the "message" of a model reply for the history.
+
+    Only the message is kept because the full form is re-sent with every
+    request anyway.
+    """
+    cleaned_response = ai_response.strip().lstrip(
+        '`').lstrip('json').lstrip().rstrip('`')
+    try:
+        return str(json.loads(cleaned_response).get("message", "Form updated"))
+    except (json.JSONDecodeError, AttributeError):
+        return cleaned_response[:200]
+
+
 def _parse_response(ai_response: str) -> dict:
     """
     Parses the JSON response from the Gemini model.
 
     Cleans the response text by removing markdown code block symbols and
-    parses it into a Python dictionary. Handles various error cases.
+    parses it into a Python dictionary. Handles various error cases; a form
+    that fails validation against utils.json_validator is logged and
+    treated like a response without a form ({}).
 
     Args:
         ai_response (str): The raw text response from the AI model
@@ -45,6 +85,10 @@ def _parse_response(ai_response: str) -> dict:
     try:
         form_data = json.loads(cleaned_response)
         if "form_data" in form_data and "fields" in form_data["form_data"]:
+            errors = validate_form(form_data)
+            if errors:
+                print(f"Invalid form structure in Gemini response: {'; '.join(map(str, errors))}")
+                return {}
             return form_data["form_data"]
         return {}
     except json.JSONDecodeError as e:
@@ -61,18 +105,71 @@ class GenerativeAIClient:
 
     This class manages the connection to Google's generative AI model,
     maintains chat history, and handles form generation requests.
+
+    The history is kept within a token budget: the system instruction is set
+    once on the model, each past turn stores only the user's request and the
+    model's message (the latest form is sent with every request), and turns
+    that no longer fit are dropped and folded into a short summary.
     """
 
-    def __init__(self):
+    def __init__(self, history_token_budget: int = DEFAULT_HISTORY_TOKEN_BUDGET):
         """
         Initializes the Gemini client.
 
         Sets up the API connection using the configured API key and
-        initializes a chat session with the specified model
+        initializes an empty, token-budgeted conversation history.
+
+        Args:
+            history_token_budget (int): Approximate tokens the history may use per request.
+                                        Defaults to GENERATIVEAI_HISTORY_TOKENS or 2000.
         """
         genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
-        self.chat = self.model.start_chat(history=[])
+        self.model = genai.GenerativeModel("gemini-2.0-flash", system_instruction=instruction)
+        self.history_token_budget = history_token_budget
+        self.history = []  # [{"role": "user" | "model", "parts": [str]}]
+        self.dropped_requests = deque(maxlen=MAX_SUMMARY_REQUESTS)
+        self.turn_stats = deque(maxlen=100)  # per-turn prompt token measurements
+
+    def history_tokens(self) -> int:
+        """Estimated tokens currently used by the history."""
+        return sum(estimate_tokens(turn["parts"][0]) for turn in self.history)
+
+    def _trim_history(self):
+        """Drop the oldest user/model pairs until the history fits the budget."""
+        while self.history and self.history_tokens() > self.history_token_budget:
+            oldest = self.history.pop(0)
+            if oldest["role"] == "user":
+                self.dropped_requests.append(oldest["parts"][0])
+            if self.history and self.history[0]["role"] == "model":
+                self.history.pop(0)
+
+    def _summary(self) -> str:
+        if not self.dropped_requests:
+            return ""
+        return "Earlier requests (oldest first): " + "; ".join(self.dropped_requests)
+
+    def _contents(self, prompt_input: str, current_form: dict) -> list:
+        dynamic_prompt = _create_prompt(prompt_input, current_form, self._summary())
+        return self.history + [{"role": "user", "parts": [dynamic_prompt]}]
+
+    def count_prompt_tokens(self, prompt_input: str, current_form: dict = None) -> int:
+        """
+        Counts the prompt tokens the next request would use, via the API.
+
+        Args:
+            prompt_input (str): The user's input describing the form requirements.
+            current_form (dict, optional): The current form structure. Defaults to None.
+
+        Returns:
+            int: Total prompt tokens including the system instruction and history.
+        """
+        contents = self._contents(prompt_input, current_form or {"fields": []})
+        return self.model.count_tokens(contents).total_tokens
+
+    def reset_history(self):
+        """Forget the conversation, e.g. when the user starts a new form."""
+        self.history = []
+        self.dropped_requests.clear()
 
     def generate_form(self, prompt_input: str, current_form: dict = None) -> dict:
         """
@@ -92,8 +189,20 @@ class GenerativeAIClient:
             current_form = {"fields": []}
 
         try:
-            dynamic_prompt = _create_prompt(prompt_input, current_form)
-            response = self.chat.send_message(dynamic_prompt)
+            contents = self._contents(prompt_input, current_form)
+            response = self.model.generate_content(contents)
+
+            usage = getattr(response, "usage_metadata", None)
+            self.turn_stats.append({
+                "prompt_tokens": getattr(usage, "prompt_token_count", None),
+                "estimated_history_tokens": self.history_tokens(),
+                "history_turns": len(self.history)
+            })
+
+            self.history.append({"role": "user", "parts": [prompt_input]})
+            self.history.append({"role": "model", "parts": [_reply_message(response.text)]})
+            self._trim_history()
+
             return _parse_response(response.text)
         except Exception as e:
             return {
@@ -0,0 +1,262 @@
+"""
+Hedged requests across form generation providers.
+
+A single slow backend decides the tail latency of every request sent to it.
+HedgedClient sends the request to the primary provider first; if no valid
+form has arrived after the hedge delay (a fixed delay, or the primary's
+recent p95 latency once enough samples exist) the same request goes to the
+next provider, and so on down the list. A provider that fails or returns an
+invalid form triggers the next one immediately. The first response whose
+form passes validate_form_structure wins and the others are cancelled.
+
+Async clients (AsyncAIClient) are really cancelled, which closes their
+stream. Sync clients run in worker threads, which cannot be interrupted;
+their late results are simply discarded.
+
+Each provider is called through the client given for it in `clients`, e.g.
+a single-provider ResilientClient so that retries and circuit breakers still
+apply to every hedged call; providers without one are called directly from
+the registry.
+"""
+import asyncio
+import inspect
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence
+
+from api.registry import ProviderRegistry, get_registry
+from utils.json_validator import validate_form_structure
+
+DEFAULT_HEDGE_DELAY = float(os.getenv("HEDGE_DELAY_SECONDS", "2.0"))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Worker threads shared by every HedgedClient for sync providers."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv("HEDGE_MAX_WORKERS", "16")),
+                thread_name_prefix="hedge"
+            )
+        return _executor
+
+
+def is_valid_response(response: Any) -> bool:
+    """A response wins only if it carries a non-empty, structurally valid form."""
+    if not isinstance(response, dict) or not isinstance(response.get("form_data"), dict):
+        return False
+    if not response["form_data"].get("fields"):
+        return False
+    try:
+        return validate_form_structure(response)[0]
+    except (KeyError, TypeError, AttributeError):
+        return False
+
+
+class LatencyTracker:
+    """Recent successful latencies of one provider, used for the adaptive hedge delay."""
+
+    def __init__(self, max_samples: int = 200):
+        self._samples: deque = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class HedgedClient:
+    """
+    Race providers from the registry and return the first valid form.
+
+    Args:
+        providers (Sequence[str]): Registry names in hedging order; the first is the primary
+        delay (float): Seconds to wait for the primary before hedging
+        adaptive (bool): Use the primary's recent latency percentile as the delay once
+            min_samples latencies have been recorded
+        percentile (float): Percentile used for the adaptive delay
+        min_samples (int): Samples needed before the adaptive delay is used
+        registry (Optional[ProviderRegistry]): Where clients come from; defaults to the
+            process-wide registry
+        clients (Optional[Dict[str, Any]]): Per provider name, an object with generate_form and
+            agenerate_form(prompt, current_form, meta=..., edit_mode=...) to call instead
+            of the registry client, e.g. ResilientClient([name])
+    """
+
+    def __init__(self, providers: Sequence[str], delay: float = DEFAULT_HEDGE_DELAY, adaptive: bool = True,
+                 percentile: float = 95, min_samples: int = 20, registry: Optional[ProviderRegistry] = None,
+                 clients: Optional[Dict[str, Any]] = None):
+        if not providers:
+            raise ValueError("HedgedClient needs at least one provider")
+        self.providers = list(providers)
+        self.delay = delay
+        self.adaptive = adaptive
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.registry = registry if registry is not None else get_registry()
+        self.clients = dict(clients or {})
+        self.latencies: Dict[str, LatencyTracker] = {name: LatencyTracker() for name in self.providers}
+        self.wins: Dict[str, int] = {name: 0 for name in self.providers}
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before sending the request to the next provider."""
+        tracker = self.latencies[self.providers[0]]
+        if self.adaptive and len(tracker) >= self.min_samples:
+            return tracker.percentile(self.percentile)
+        return self.delay
+
+    def _record_win(self, name: str, started: float, meta: Optional[Dict], launched: List[str],
+                    attempt_meta: Optional[Dict] = None) -> None:
+        self.latencies[name].add(time.perf_counter() - started)
+        self.wins[name] += 1
+        if meta is not None:
+            meta.update(attempt_meta or {})
+            meta["provider"] = name
+            meta["hedged"] = len(launched) > 1
+            meta["attempts"] = list(launched)
+
+    @staticmethod
+    def _failure(meta: Optional[Dict], launched: List[str]) -> Dict[str, Any]:
+        if meta is not None:
+            meta["provider"] = None
+            meta["hedged"] = len(launched) > 1
+            meta["attempts"] = list(launched)
+        return {"message": "Error: No provider returned a valid form", "form_data": {"fields": []}}
+
+    def generate_form(self, prompt_input: str, current_form: Optional[Dict[str, Any]] = None,
+                      meta: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Blocking hedged generation for the sync clients.
+
+        Returns:
+            Dict[str, Any]: {"message": str, "form_data": Dict}; meta (if given) is updated
+                            with the winning provider and the providers that were tried
+        """
+        executor = _get_executor()
+        remaining = list(self.providers)
+        launched: List[str] = []
+        running: Dict[Future, tuple] = {}
+        next_launch = 0.0
+
+        def launch():
+            nonlocal next_launch
+            name = remaining.pop(0)
+            launched.append(name)
+            started = time.perf_counter()
+            future = executor.submit(self._call_sync, name, prompt_input, current_form)
+            running[future] = (name, started)
+            next_launch = started + self.hedge_delay()
+
+        launch()
+        while running:
+            timeout = max(0.0, next_launch - time.perf_counter()) if remaining else None
+            finished, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not finished:
+                launch()
+                continue
+
+            for future in finished:
+                name, started = running.pop(future)
+                try:
+                    response = future.result()
+                except Exception:
+                    response = None
+                if is_valid_response(response):
+                    for loser in running:
+                        loser.cancel()
+                    self._record_win(name, started, meta, launched)
+                    return response
+                if remaining:
+                    # A failed provider is replaced right away
+                    launch()
+
+        return self._failure(meta, launched)
+
+    def _call_sync(self, name: str, prompt_input: str, current_form: Optional[Dict[str, Any]]) -> Any:
+        wrapper = self.clients.get(name)
+        if wrapper is not None:
+            return wrapper.generate_form(prompt_input, current_form)
+        return self.registry.get(name).generate_form(prompt_input, current_form, raise_errors=True)
+
+    async def _call(self, name: str, prompt_input: str, current_form: Optional[Dict[str, Any]],
+                    edit_mode: str, attempt_meta: Dict) -> Any:
+        wrapper = self.clients.get(name)
+        if wrapper is not None:
+            return await wrapper.agenerate_form(prompt_input, current_form, meta=attempt_meta, edit_mode=edit_mode)
+        client = await asyncio.to_thread(self.registry.get, name)
+        fetch = getattr(client, "fetch_chat_response", None)
+        if fetch is not None and inspect.iscoroutinefunction(fetch):
+            return await fetch(prompt_input, current_form, meta=attempt_meta, edit_mode=edit_mode,
+                               raise_errors=True)
+        return await asyncio.to_thread(client.generate_form, prompt_input, current_form, raise_errors=True)
+
+    async def agenerate_form(self, prompt_input: str, current_form: Optional[Dict[str, Any]] = None,
+                             meta: Optional[Dict] = None, edit_mode: str = "full") -> Dict[str, Any]:
+        """
+        Hedged generation for the event loop; losing async requests are cancelled.
+
+        edit_mode only applies to async providers that support it. The winner's
+        own meta (e.g. {"cached": True}) is merged into meta.
+        """
+        remaining = list(self.providers)
+        launched: List[str] = []
+        running: Dict[asyncio.Task, tuple] = {}
+        next_launch = 0.0
+
+        def launch():
+            nonlocal next_launch
+            name = remaining.pop(0)
+            launched.append(name)
+            attempt_meta: Dict = {}
+            started = time.perf_counter()
+            task = asyncio.create_task(self._call(name, prompt_input, current_form, edit_mode, attempt_meta))
+            running[task] = (name, started, attempt_meta)
+            next_launch = started + self.hedge_delay()
+
+        launch()
+        try:
+            while running:
+                timeout = max(0.0, next_launch - time.perf_counter()) if remaining else None
+                finished, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not finished:
+                    launch()
+                    continue
+
+                for task in finished:
+                    name, started, attempt_meta = running.pop(task)
+                    response = None if task.exception() is not None else task.result()
+                    if is_valid_response(response):
+                        self._record_win(name, started, meta, launched, attempt_meta)
+                        return response
+                    if remaining:
+                        launch()
+        finally:
+            for task in running:
+                task.cancel()
+
+        return self._failure(meta, launched)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "providers": self.providers,
+            "hedge_delay": self.hedge_delay(),
+            "wins": dict(self.wins),
+            "p95_latency": {name: tracker.percentile(95) for name, tracker in self.latencies.items()},
+        }
@@ -0,0 +1,252 @@
+"""
+Process-wide registry of LLM provider clients.
+
+Building a client per request (or per Streamlit rerun) throws away its HTTP
+connection pool, so every generation pays for DNS, TCP and TLS setup again.
+The registry builds each provider's client once, on first use, with a shared
+keep-alive pool whose size comes from the environment, and can warm
+connections ahead of the first real request with a cheap probe. Probe
+results are kept per provider so the apps can show health and latency.
+
+Environment:
+    PROVIDER_POOL_MAX_CONNECTIONS (default 20): Connections per provider pool
+    PROVIDER_POOL_MAX_KEEPALIVE (default 10): Idle connections kept open
+    PROVIDER_POOL_KEEPALIVE_EXPIRY (default 60): Seconds an idle connection is kept
+    PROVIDER_PROBE_TIMEOUT (default 5): Timeout for health probes in seconds
+"""
+import asyncio
+import inspect
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import httpx
+from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+
+PROBE_TIMEOUT = float(os.getenv("PROVIDER_PROBE_TIMEOUT", "5"))
+
+
+def pool_limits() -> httpx.Limits:
+    """Connection pool limits applied to every provider client."""
+    return httpx.Limits(
+        max_connections=int(os.getenv("PROVIDER_POOL_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("PROVIDER_POOL_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("PROVIDER_POOL_KEEPALIVE_EXPIRY", "60")),
+    )
+
+
+@dataclass
+class ProviderSpec:
+    """
+    How to build and probe one provider.
+
+    Attributes:
+        factory (Callable[[], Any]): Builds the client
+        probe (Optional[Callable[[Any], Any]]): Cheap request used for warmup and health
+            checks; may be a coroutine function for async clients
+    """
+    factory: Callable[[], Any]
+    probe: Optional[Callable[[Any], Any]] = None
+
+
+@dataclass
+class ProviderStatus:
+    """Latest known state of a provider."""
+    built: bool = False
+    healthy: Optional[bool] = None
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+    checked_at: Optional[float] = None
+
+
+class ProviderRegistry:
+    """
+    Builds each registered provider client once and tracks its health.
+
+    Usage:
+        registry = get_registry()
+        client = registry.get("deepseek")
+        registry.warmup(["deepseek", "gemini"], background=True)
+        registry.status()
+    """
+
+    def __init__(self):
+        self._specs: Dict[str, ProviderSpec] = {}
+        self._clients: Dict[str, Any] = {}
+        self._status: Dict[str, ProviderStatus] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any], probe: Optional[Callable[[Any], Any]] = None) -> None:
+        """Register (or replace) a provider; the client is built on first use."""
+        with self._lock:
+            self._specs[name] = ProviderSpec(factory, probe)
+            self._clients.pop(name, None)
+            self._status[name] = ProviderStatus()
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def get(self, name: str) -> Any:
+        """
+        Return the shared client for a provider, building it on first use.
+
+        Raises:
+            KeyError: If the provider is not registered
+            Exception: Whatever the client constructor raises (e.g. a missing API key);
+                       the error is recorded in the provider's status
+        """
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+
+        with self._lock:
+            client = self._clients.get(name)
+            if client is None:
+                spec = self._specs[name]
+                try:
+                    client = spec.factory()
+                except Exception as e:
+                    self._status[name] = ProviderStatus(healthy=False, error=f"{type(e).__name__}: {e}",
+                                                        checked_at=time.time())
+                    raise
+                self._clients[name] = client
+                self._status[name].built = True
+        return client
+
+    def _record(self, name: str, started: float, error: Optional[Exception]) -> ProviderStatus:
+        status = ProviderStatus(
+            built=name in self._clients,
+            healthy=error is None,
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
+            error=f"{type(error).__name__}: {error}" if error is not None else None,
+            checked_at=time.time(),
+        )
+        self._status[name] = status
+        return status
+
+    def check(self, name: str) -> ProviderStatus:
+        """Build the provider if needed and run its probe, recording health and latency."""
+        started = time.perf_counter()
+        try:
+            client = self.get(name)
+            probe = self._specs[name].probe
+            if probe is not None:
+                if inspect.iscoroutinefunction(probe):
+                    raise TypeError(f"Provider {name!r} has an async probe; use acheck()")
+                probe(client)
+        except Exception as e:
+            return self._record(name, started, e)
+        return self._record(name, started, None)
+
+    async def acheck(self, name: str) -> ProviderStatus:
+        """Async counterpart of check(); sync probes run in a worker thread."""
+        probe = self._specs[name].probe
+        if probe is None or not inspect.iscoroutinefunction(probe):
+            return await asyncio.to_thread(self.check, name)
+
+        started = time.perf_counter()
+        try:
+            await probe(self.get(name))
+        except Exception as e:
+            return self._record(name, started, e)
+        return self._record(name, started, None)
+
+    def warmup(self, names: Optional[Iterable[str]] = None, background: bool = False,
+               force: bool = False) -> None:
+        """
+        Build and probe providers so their first real request reuses an open connection.
+
+        Providers that were already checked are skipped unless force is set, so
+        calling this on every Streamlit rerun is cheap. Async providers are
+        skipped; use awarmup() from the event loop for those.
+        """
+        pending = [
+            name for name in (names if names is not None else self.names)
+            if (force or self._status[name].checked_at is None)
+            and not inspect.iscoroutinefunction(self._specs[name].probe)
+        ]
+        if not pending:
+            return
+
+        def run():
+            for name in pending:
+                self.check(name)
+
+        if background:
+            threading.Thread(target=run, name="provider-warmup", daemon=True).start()
+        else:
+            run()
+
+    async def awarmup(self, names: Optional[Iterable[str]] = None) -> Dict[str, ProviderStatus]:
+        """Probe providers concurrently from the event loop."""
+        names = list(names if names is not None else self.names)
+        results = await asyncio.gather(*(self.acheck(name) for name in names))
+        return dict(zip(names, results))
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Latest status of every registered provider."""
+        return {name: dict(vars(self._status[name])) for name in self._specs}
+
+
+def _openai_probe(client: Any) -> None:
+    client.client.with_options(timeout=PROBE_TIMEOUT, max_retries=0).models.list()
+
+
+async def _async_openai_probe(client: Any) -> None:
+    await client.client.with_options(timeout=PROBE_TIMEOUT, max_retries=0).models.list()
+
+
+def _gemini_probe(client: Any) -> None:
+    client.client.models.get(model=client.model)
+
+
+def _without_sdk_retries(client: Any) -> Any:
+    """Retries are handled by api.resilience, so the OpenAI SDK's own retries would multiply them."""
+    client.client = client.client.with_options(max_retries=0)
+    return client
+
+
+def _build_default_registry() -> ProviderRegistry:
+    """Providers shared by the Streamlit apps, the FastAPI app and the CLIs."""
+    registry = ProviderRegistry()
+
+    def deepseek():
+        from api.deepseek_client import DeepSeekClient
+        return _without_sdk_retries(DeepSeekClient(http_client=DefaultHttpxClient(limits=pool_limits())))
+
+    def gemini():
+        # google-genai manages its own HTTP client; building it once keeps that pool alive
+        from api.gemini_client import GeminiClient
+        return GeminiClient()
+
+    def ollama():
+        from ai_server import AIClient
+        return _without_sdk_retries(AIClient(use_ollama=True, http_client=DefaultHttpxClient(limits=pool_limits())))
+
+    def ollama_async():
+        from ai_server import AsyncAIClient
+        return _without_sdk_retries(
+            AsyncAIClient(use_ollama=True, http_client=DefaultAsyncHttpxClient(limits=pool_limits()))
+        )
+
+    registry.register("deepseek", deepseek, _openai_probe)
+    registry.register("gemini", gemini, _gemini_probe)
+    registry.register("ollama", ollama, _openai_probe)
+    registry.register("ollama-async", ollama_async, _async_openai_probe)
+    return registry
+
+
+_default_registry: Optional[ProviderRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_registry() -> ProviderRegistry:
+    """The process-wide provider registry."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = _build_default_registry()
+        return _default_registry
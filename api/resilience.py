@@ -0,0 +1,308 @@
+"""
+Retries, circuit breakers and failover for the form generation providers.
+
+ResilientClient calls registry providers in a configured order. Transient
+errors (connection failures, timeouts, 429 and 5xx responses) are retried
+with bounded exponential backoff and jitter. Every failure that survives
+the retries, and every empty or invalid form, is counted by a per-provider
+circuit breaker; only a valid form counts as a success. After
+failure_threshold consecutive failures the breaker opens, and the provider
+is skipped without a network call until recovery_timeout has passed. It
+then lets one trial request through (half-open) and closes again if that
+request succeeds. A provider that is skipped, fails or returns an invalid
+form hands over to the next provider in the order.
+
+Environment:
+    FAILOVER_PROVIDERS: Comma-separated registry names tried after the primary
+    RETRY_MAX_ATTEMPTS (default 3), RETRY_BASE_DELAY (default 0.5), RETRY_MAX_DELAY (default 8)
+    BREAKER_FAILURE_THRESHOLD (default 5), BREAKER_RECOVERY_SECONDS (default 30)
+"""
+import asyncio
+import inspect
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+import openai
+
+from api.hedging import is_valid_response
+from api.registry import ProviderRegistry, get_registry
+
+TRANSIENT_STATUS_CODES = frozenset([408, 409, 429, 500, 502, 503, 504])
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether an error is worth retrying against the same provider."""
+    if isinstance(error, (openai.APIConnectionError, httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    # openai.APIStatusError has status_code, google-genai errors have code
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    return status in TRANSIENT_STATUS_CODES
+
+
+class RetryPolicy:
+    """
+    Bounded exponential backoff with full jitter.
+
+    Args:
+        max_attempts (int): Calls per provider, including the first one
+        base_delay (float): Backoff before the second attempt, in seconds
+        max_delay (float): Upper bound for a single backoff
+    """
+
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.5, max_delay: float = 8.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to sleep after the given (1-based) failed attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Per-provider breaker: closed -> open after repeated failures -> half-open trial -> closed.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the breaker
+        recovery_timeout (float): Seconds the breaker stays open before a trial request
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.total_failures = 0
+        self.total_successes = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; only one trial request passes while half-open."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+            self.total_successes += 1
+
+    def record_failure(self, error: BaseException) -> None:
+        with self._lock:
+            self._failures += 1
+            self.total_failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def abandon(self) -> None:
+        """Release a half-open trial slot whose request was cancelled before finishing."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            retry_in = self.recovery_timeout - (time.monotonic() - self._opened_at) if state == OPEN else None
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "total_failures": self.total_failures,
+                "total_successes": self.total_successes,
+                "rejected": self.rejected,
+                "last_error": self.last_error,
+                "retry_in_seconds": round(retry_in, 1) if retry_in is not None else None,
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Process-wide breaker for a provider, shared by every caller."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5")),
+                recovery_timeout=float(os.getenv("BREAKER_RECOVERY_SECONDS", "30"))
+            )
+            _breakers[name] = breaker
+        return breaker
+
+
+def breaker_states() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of every breaker created so far."""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {name: breaker.snapshot() for name, breaker in breakers.items()}
+
+
+def default_retry_policy() -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=int(os.getenv("RETRY_MAX_ATTEMPTS", "3")),
+        base_delay=float(os.getenv("RETRY_BASE_DELAY", "0.5")),
+        max_delay=float(os.getenv("RETRY_MAX_DELAY", "8"))
+    )
+
+
+def failover_order(primary: str) -> List[str]:
+    """The primary provider followed by FAILOVER_PROVIDERS."""
+    extra = [name.strip() for name in os.getenv("FAILOVER_PROVIDERS", "").split(",") if name.strip()]
+    return [primary] + [name for name in extra if name != primary]
+
+
+class ResilientClient:
+    """
+    Generate forms through providers in order, with retries and circuit breakers.
+
+    Args:
+        providers (Sequence[str]): Registry names in failover order
+        retry (Optional[RetryPolicy]): Retry policy; defaults to the RETRY_* environment
+        registry (Optional[ProviderRegistry]): Where clients come from; defaults to the
+            process-wide registry
+    """
+
+    def __init__(self, providers: Sequence[str], retry: Optional[RetryPolicy] = None,
+                 registry: Optional[ProviderRegistry] = None):
+        if not providers:
+            raise ValueError("ResilientClient needs at least one provider")
+        self.providers = list(providers)
+        self.retry = retry if retry is not None else default_retry_policy()
+        self.registry = registry if registry is not None else get_registry()
+
+    @staticmethod
+    def _failure(meta: Optional[Dict], tried: List[str], error: Optional[str]) -> Dict[str, Any]:
+        if meta is not None:
+            meta["provider"] = None
+            meta["attempts"] = tried
+        message = f"Error: No provider available ({error})" if error else "Error: No provider available"
+        return {"message": message, "form_data": {"fields": []}}
+
+    def generate_form(self, prompt_input: str, current_form: Optional[Dict[str, Any]] = None,
+                      meta: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        Blocking generation with retries and failover.
+
+        Returns:
+            Dict[str, Any]: {"message": str, "form_data": Dict}; meta (if given) is updated
+                            with the provider that answered and the providers tried
+        """
+        tried: List[str] = []
+        last_error = None
+        for name in self.providers:
+            breaker = get_breaker(name)
+            if not breaker.allow():
+                continue
+            tried.append(name)
+            for attempt in range(1, self.retry.max_attempts + 1):
+                try:
+                    response = self.registry.get(name).generate_form(prompt_input, current_form, raise_errors=True)
+                except Exception as e:
+                    last_error = f"{name}: {type(e).__name__}"
+                    if is_transient(e) and attempt < self.retry.max_attempts:
+                        time.sleep(self.retry.backoff(attempt))
+                        continue
+                    breaker.record_failure(e)
+                    break
+
+                if is_valid_response(response):
+                    breaker.record_success()
+                    if meta is not None:
+                        meta["provider"] = name
+                        meta["attempts"] = tried
+                    return response
+                # An empty or invalid form is a failure too, so a provider that keeps sending them trips its breaker
+                breaker.record_failure(ValueError("Invalid or empty form"))
+                last_error = f"{name}: invalid form"
+                break
+
+        return self._failure(meta, tried, last_error)
+
+    async def _call(self, name: str, prompt_input: str, current_form: Optional[Dict[str, Any]],
+                    edit_mode: str, attempt_meta: Dict) -> Any:
+        client = await asyncio.to_thread(self.registry.get, name)
+        fetch = getattr(client, "fetch_chat_response", None)
+        if fetch is not None and inspect.iscoroutinefunction(fetch):
+            return await fetch(prompt_input, current_form, meta=attempt_meta, edit_mode=edit_mode,
+                               raise_errors=True)
+        return await asyncio.to_thread(client.generate_form, prompt_input, current_form, raise_errors=True)
+
+    async def agenerate_form(self, prompt_input: str, current_form: Optional[Dict[str, Any]] = None,
+                             meta: Optional[Dict] = None, edit_mode: str = "full") -> Dict[str, Any]:
+        """Async counterpart of generate_form; the answering provider's own meta is merged into meta."""
+        tried: List[str] = []
+        last_error = None
+        for name in self.providers:
+            breaker = get_breaker(name)
+            if not breaker.allow():
+                continue
+            tried.append(name)
+            for attempt in range(1, self.retry.max_attempts + 1):
+                attempt_meta: Dict = {}
+                try:
+                    response = await self._call(name, prompt_input, current_form, edit_mode, attempt_meta)
+                except asyncio.CancelledError:
+                    breaker.abandon()
+                    raise
+                except Exception as e:
+                    last_error = f"{name}: {type(e).__name__}"
+                    if is_transient(e) and attempt < self.retry.max_attempts:
+                        await asyncio.sleep(self.retry.backoff(attempt))
+                        continue
+                    breaker.record_failure(e)
+                    break
+
+                if is_valid_response(response):
+                    breaker.record_success()
+                    if meta is not None:
+                        meta.update(attempt_meta)
+                        meta["provider"] = name
+                        meta["attempts"] = tried
+                    return response
+                breaker.record_failure(ValueError("Invalid or empty form"))
+                last_error = f"{name}: invalid form"
+                break
+
+        return self._failure(meta, tried, last_error)
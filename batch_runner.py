@@ -0,0 +1,294 @@
+"""
+Resumable offline batch runner for bulk form generation.
+
+Streams a JSONL file of prompts through one of the form generation clients
+with a bounded thread pool and appends one JSON result per line to the
+output file as soon as it is ready. Progress is checkpointed next to the
+output file, so re-running the same command after a crash continues where
+it stopped. Memory use does not depend on the size of the input.
+
+Input lines look like:
+    {"id": "signup-1", "input_text": "Create a signup form", "current_form": {"fields": []}}
+("prompt" is accepted instead of "input_text"; id and current_form are optional.)
+
+Usage:
+    python batch_runner.py prompts.jsonl results.jsonl --provider deepseek --workers 8
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+
+def _client_factories() -> Dict[str, Callable[[], Any]]:
+    """Clients are imported lazily so only the selected provider's SDK is needed."""
+
+    def ollama():
+        from ai_server import AIClient
+        return AIClient(use_ollama=True)
+
+    def deepseek_chat():
+        from ai_server import AIClient
+        return AIClient(use_ollama=False)
+
+    def deepseek():
+        from api.deepseek_client import DeepSeekClient
+        return DeepSeekClient()
+
+    def gemini():
+        from api.gemini_client import GeminiClient
+        return GeminiClient()
+
+    def generativeai():
+        from api.generativeai_client import GenerativeAIClient
+        return GenerativeAIClient()
+
+    return {
+        "ollama": ollama,
+        "deepseek-chat": deepseek_chat,
+        "deepseek": deepseek,
+        "gemini": gemini,
+        "generativeai": generativeai,
+    }
+
+
+# Providers whose generate_form takes edit_mode; the Gemini clients always return full forms
+PATCH_MODE_PROVIDERS = frozenset(["ollama", "deepseek-chat", "deepseek"])
+
+
+class LatencyStats:
+    """Fixed-size reservoir sample of latencies, so percentiles cost O(1) memory."""
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self.samples: List[float] = []
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if len(self.samples) < self.capacity:
+            self.samples.append(value)
+        else:
+            slot = random.randrange(self.count)
+            if slot < self.capacity:
+                self.samples[slot] = value
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class Checkpoint:
+    """
+    Tracks which input lines are finished.
+
+    `watermark` is the first line that is not known to be done; `done_above`
+    holds finished lines beyond it, which is bounded by the number of tasks
+    in flight. `output_bytes` is the output size at the time of the last save;
+    results written after it are recovered by rescanning that tail.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.watermark = 0
+        self.done_above: Set[int] = set()
+        self.output_bytes = 0
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            data = json.load(f)
+        self.watermark = data["watermark"]
+        self.done_above = set(data["done_above"])
+        self.output_bytes = data["output_bytes"]
+
+    def mark_done(self, line: int) -> None:
+        self.done_above.add(line)
+        while self.watermark in self.done_above:
+            self.done_above.remove(self.watermark)
+            self.watermark += 1
+
+    def is_done(self, line: int) -> bool:
+        return line < self.watermark or line in self.done_above
+
+    def save(self, output_bytes: int) -> None:
+        self.output_bytes = output_bytes
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "watermark": self.watermark,
+                "done_above": sorted(self.done_above),
+                "output_bytes": output_bytes
+            }, f)
+        os.replace(tmp_path, self.path)
+
+
+def recover_output(output_path: str, checkpoint: Checkpoint) -> None:
+    """
+    Mark results written after the last checkpoint as done and drop a torn last line.
+    """
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, "rb+") as f:
+        f.seek(min(checkpoint.output_bytes, os.path.getsize(output_path)))
+        good_end = f.tell()
+        for raw in iter(f.readline, b""):
+            if not raw.endswith(b"\n"):
+                # Torn write from an interrupted run; the line will be redone
+                f.truncate(good_end)
+                break
+            try:
+                checkpoint.mark_done(json.loads(raw)["line"])
+            except (json.JSONDecodeError, KeyError):
+                pass
+            good_end = f.tell()
+
+
+def read_prompts(input_path: str, checkpoint: Checkpoint) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, request) for every unfinished input line."""
+    with open(input_path) as f:
+        for line_no, raw in enumerate(f):
+            if checkpoint.is_done(line_no):
+                continue
+            raw = raw.strip()
+            if not raw:
+                checkpoint.mark_done(line_no)
+                continue
+            try:
+                request = json.loads(raw)
+            except json.JSONDecodeError as e:
+                request = {"_error": f"Invalid JSON: {e}"}
+            yield line_no, request
+
+
+def _normalize(response: Any) -> Dict[str, Any]:
+    """GenerativeAIClient returns the bare form; wrap it like the other clients."""
+    if isinstance(response, dict) and "form_data" not in response and "fields" in response:
+        return {"message": "Form generated", "form_data": response}
+    return response
+
+
+def run_batch(input_path: str, output_path: str, provider: str, workers: int = 4,
+              edit_mode: str = "full", checkpoint_interval: float = 1.0) -> Dict[str, Any]:
+    """
+    Run every unfinished prompt in input_path and append results to output_path.
+
+    Returns:
+        Dict[str, Any]: Summary with counts, throughput and latency percentiles
+
+    Raises:
+        ValueError: If edit_mode is "patch" and the provider has no patch mode
+    """
+    if edit_mode != "full" and provider not in PATCH_MODE_PROVIDERS:
+        raise ValueError(f"Provider {provider!r} does not support edit mode {edit_mode!r}")
+    factory = _client_factories()[provider]
+    local = threading.local()
+
+    def process(line_no: int, request: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = {"line": line_no, "id": request.get("id")}
+        try:
+            if "_error" in request:
+                raise ValueError(request["_error"])
+            prompt = request.get("input_text") or request.get("prompt")
+            if not prompt:
+                raise ValueError("Missing 'input_text'")
+            # One client per worker thread, reused for its connections; clients that keep a
+            # conversation (GenerativeAIClient) start from a clean history for every prompt
+            if not hasattr(local, "client"):
+                local.client = factory()
+            elif hasattr(local.client, "reset_history"):
+                local.client.reset_history()
+            kwargs = {"edit_mode": edit_mode} if edit_mode != "full" else {}
+            response = _normalize(local.client.generate_form(prompt, request.get("current_form"), **kwargs))
+            fields = (response.get("form_data") or {}).get("fields") if isinstance(response, dict) else None
+            result["ok"] = bool(fields)
+            result["response"] = response
+        except Exception as e:
+            result["ok"] = False
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    checkpoint = Checkpoint(output_path + ".checkpoint")
+    checkpoint.load()
+    recover_output(output_path, checkpoint)
+
+    latencies = LatencyStats()
+    completed = failed = 0
+    started = time.perf_counter()
+    last_save = started
+    max_in_flight = workers * 2
+
+    with open(output_path, "a") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        prompts = read_prompts(input_path, checkpoint)
+        exhausted = False
+
+        while pending or not exhausted:
+            # Keep the pool busy without reading ahead of it
+            while not exhausted and len(pending) < max_in_flight:
+                item = next(prompts, None)
+                if item is None:
+                    exhausted = True
+                    break
+                pending.add(pool.submit(process, *item))
+            if not pending:
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                out.write(json.dumps(result) + "\n")
+                checkpoint.mark_done(result["line"])
+                latencies.add(result["latency_ms"])
+                completed += 1
+                failed += 0 if result["ok"] else 1
+
+            out.flush()
+            now = time.perf_counter()
+            if now - last_save >= checkpoint_interval:
+                checkpoint.save(out.tell())
+                last_save = now
+
+        out.flush()
+        checkpoint.save(out.tell())
+
+    elapsed = time.perf_counter() - started
+    return {
+        "completed": completed,
+        "failed": failed,
+        "elapsed_s": round(elapsed, 2),
+        "throughput_per_s": round(completed / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {f"p{p}": latencies.percentile(p) for p in (50, 90, 95, 99)},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate forms for every prompt in a JSONL file")
+    parser.add_argument("input", help="JSONL file with one request per line")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--provider", choices=sorted(_client_factories()), default="ollama")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent requests")
+    parser.add_argument("--edit-mode", choices=["full", "patch"], default="full")
+    args = parser.parse_args(argv)
+    if args.edit_mode != "full" and args.provider not in PATCH_MODE_PROVIDERS:
+        parser.error(f"--edit-mode {args.edit_mode} is only supported by: {', '.join(sorted(PATCH_MODE_PROVIDERS))}")
+
+    summary = run_batch(args.input, args.output, args.provider, args.workers, args.edit_mode)
+    print(f"Completed {summary['completed']} prompts ({summary['failed']} failed) "
+          f"in {summary['elapsed_s']} s: {summary['throughput_per_s']} prompts/s")
+    print("Latency (ms): " + ", ".join(f"{k}={v}" for k, v in summary["latency_ms"].items()))
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Benchmark: dict-based DataElements structures vs. slotted records.
+
+The legacy function reproduces generate_form_structure as it was before the
+records: a dict literal per DataElement, option and draft member, and a
+uuid4 call per ID. Both builders run over a synthetic survey where every
+third field is a dropdown with five options. Reported per builder: build
+time, memory held by the finished structure (tracemalloc), and the time and
+size of serializing it, with nulls kept and, for records, with nulls dropped.
+
+Run from the repository root:
+    python -m benchmarks.bench_form_records
+    python -m benchmarks.bench_form_records 20000
+"""
+import gc
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+
+from form_generator import DATA_ELEMENT_TYPE_IDS, build_form_records
+from form_records import dumps_structure
+
+
+def make_form(size: int):
+    fields = []
+    for i in range(size):
+        if i % 3 == 0:
+            fields.append({"name": f"choice_{i}", "label": f"Choice {i}", "type": "dropdown", "required": True,
+                           "options": [{"label": f"Option {j}", "value": str(j)} for j in range(1, 6)]})
+        else:
+            fields.append({"name": f"field_{i}", "label": f"Field {i}", "type": "text", "required": False})
+    return {"fields": fields}
+
+
+def legacy_structure(form_data, form_id):
+    current_time = datetime.now(timezone.utc).isoformat()
+    data_elements, draft_members, data_element_options = [], [], []
+    for idx, field in enumerate(form_data["fields"], 1):
+        field_id = f"{form_id}:{field['name']}"
+        data_element = {
+            "Name": field["name"], "DataElementBaseId": None,
+            "DataElementTypeId": DATA_ELEMENT_TYPE_IDS.get(field["type"], "1"), "TextId": None,
+            "InputType": None, "IsRequired": field.get("required", False), "DefaultValue": None,
+            "DisplayText": field["label"], "DataElementColumnName": field["name"], "IsFixed": False,
+            "DataElementBase": None, "DataElementType": None, "DataElementOptions": None,
+            "SurveyFormId": None, "Serial": 0, "IsPublished": None, "RepeaterTableName": None,
+            "CreatedBy": "system", "CreateTime": current_time, "LastModifiedBy": None,
+            "LastModifiedTime": None, "IsDeleted": False, "Id": field_id
+        }
+        if field.get("options"):
+            options = [{
+                "Name": opt["label"], "TextId": None, "Value": str(opt["value"]), "SortOrder": opt_idx,
+                "DataElementId": field_id, "DataElementBaseOptionId": None, "CreatedBy": "system",
+                "CreateTime": current_time, "LastModifiedBy": None, "LastModifiedTime": None,
+                "IsDeleted": False, "Id": str(uuid.uuid4()).replace("-", "")
+            } for opt_idx, opt in enumerate(field["options"], 1)]
+            data_element_options.extend(options)
+            data_element["DataElementOptions"] = options
+        data_elements.append(data_element)
+        draft_members.append({
+            "DraftSurveyFormId": form_id, "DataElementId": field_id, "IsGroup": False, "IsFixed": False,
+            "SortOrder": idx, "RepeaterTableName": None, "CreatedBy": "system", "CreateTime": current_time,
+            "LastModifiedBy": None, "LastModifiedTime": None, "IsDeleted": None,
+            "Id": str(uuid.uuid4()).replace("-", "")
+        })
+    return {"DataElements": data_elements, "DraftSurveyDataElementMembers": draft_members,
+            "DataElementOptions": data_element_options}
+
+
+def measure(build):
+    """(seconds to build, bytes held by the result, result)"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, held, result
+
+
+def timed(function):
+    start = time.perf_counter()
+    output = function()
+    return time.perf_counter() - start, output
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    form = make_form(size)
+    form_id = uuid.uuid4().hex
+    print(f"{size} fields ({size // 3 + (size % 3 > 0)} dropdowns with 5 options)\n")
+
+    # Build time without tracemalloc overhead, memory with it
+    legacy_time = min(timed(lambda: legacy_structure(form, form_id))[0] for _ in range(3))
+    records_time = min(timed(lambda: build_form_records(form, form_id))[0] for _ in range(3))
+    _, legacy_bytes, legacy = measure(lambda: legacy_structure(form, form_id))
+    _, records_bytes, records = measure(lambda: build_form_records(form, form_id))
+
+    print(f"{'':24}{'build':>10}{'held':>12}")
+    print(f"{'dicts':24}{legacy_time * 1000:8.1f}ms{legacy_bytes / 1e6:10.2f}MB")
+    print(f"{'slotted records':24}{records_time * 1000:8.1f}ms{records_bytes / 1e6:10.2f}MB")
+
+    print(f"\n{'':24}{'serialize':>10}{'size':>12}")
+    for name, function in [
+        ("json.dumps(dicts)", lambda: json.dumps(legacy)),
+        ("dumps_structure", lambda: dumps_structure(records)),
+        ("  omit_none=True", lambda: dumps_structure(records, omit_none=True)),
+        ("json.dumps(indent=2)", lambda: json.dumps(legacy, indent=2)),
+        ("dumps_structure(indent=2)", lambda: dumps_structure(records, indent=2)),
+    ]:
+        elapsed = min(timed(function)[0] for _ in range(3))
+        print(f"{name:24}{elapsed * 1000:8.1f}ms{len(function()) / 1e6:10.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: brace-counting stream extraction vs. JSONStreamParser.
+
+Simulates a long multi-field model response streamed in token-sized chunks
+and compares the old approach (per-chunk brace counting, `+=` buffer,
+json.loads -> json.dumps -> json.loads) with the shared incremental parser.
+
+Run from the repository root:
+    python -m benchmarks.bench_json_stream
+"""
+import json
+import timeit
+
+from utils.json_stream import JSONStreamParser
+
+
+def build_response(num_fields: int) -> str:
+    fields = []
+    for i in range(num_fields):
+        fields.append({
+            "name": f"field_{i}",
+            "label": f"Question {i} {{optional}}",
+            "type": "dropdown" if i % 3 == 0 else "text",
+            "required": i % 2 == 0,
+            "options": [{"value": str(v), "label": f"Option {v}"} for v in range(4)] if i % 3 == 0 else None
+        })
+    body = json.dumps({"message": f"Form updated: added {num_fields} fields", "form_data": {"fields": fields}})
+    return "Sure, here is the form:\n```json\n" + body + "\n```"
+
+
+def chunked(text: str, size: int = 4) -> list:
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def legacy_extract(chunks: list):
+    buffer = ""
+    in_json = False
+    json_depth = 0
+    for content in chunks:
+        if '{' in content and not in_json:
+            in_json = True
+            content = content[content.find('{'):]
+        if in_json:
+            json_depth += content.count('{') - content.count('}')
+            buffer += content
+            if json_depth == 0:
+                break
+    try:
+        # Old pipeline: validate, re-serialise, then decode again downstream
+        return json.loads(json.dumps(json.loads(buffer)))
+    except json.JSONDecodeError:
+        return None
+
+
+def parser_extract(chunks: list):
+    parser = JSONStreamParser()
+    for content in chunks:
+        if parser.feed(content):
+            break
+    return parser.result()
+
+
+def main():
+    for num_fields in (10, 60, 300):
+        chunks = chunked(build_response(num_fields))
+        expected = parser_extract(chunks)
+        legacy_ok = legacy_extract(chunks) == expected
+        runs = max(1, 2000 // num_fields)
+        legacy = timeit.timeit(lambda: legacy_extract(chunks), number=runs) / runs
+        parser = timeit.timeit(lambda: parser_extract(chunks), number=runs) / runs
+        print(f"{num_fields:4d} fields, {len(chunks):6d} chunks: "
+              f"legacy {legacy * 1000:8.3f} ms (correct={legacy_ok})  "
+              f"parser {parser * 1000:8.3f} ms  speedup {legacy / parser:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark: API import time and first spaCy parse with lazy model loading.
+
+Each measurement runs in a fresh interpreter so nothing is cached between
+runs. "import main" is what uvicorn pays before the API can serve requests;
+"first parse" is what the first /generate-form/spacy request pays for loading
+the pipeline; "warm parse" is the steady-state cost per request.
+
+Run from the repository root (SPACY_MODEL defaults to en_core_web_trf):
+    python -m benchmarks.bench_spacy_startup
+    SPACY_MODEL=en_core_web_sm python -m benchmarks.bench_spacy_startup
+"""
+import json
+import os
+import subprocess
+import sys
+
+REPEATS = 3
+
+IMPORT_MAIN = """
+import time
+start = time.perf_counter()
+import main
+print(time.perf_counter() - start)
+"""
+
+FIRST_PARSE = """
+import json, time
+from spacy_form_processor import process_input
+start = time.perf_counter()
+process_input("Add a text field for name")
+first = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(10):
+    process_input("Add a multiple choice question for gender with options Male, Female, Other")
+print(json.dumps([first, (time.perf_counter() - start) / 10]))
+"""
+
+
+def run(code: str) -> str:
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+
+def main():
+    model = os.getenv("SPACY_MODEL", "en_core_web_trf")
+    print(f"SPACY_MODEL={model}, best of {REPEATS} fresh interpreters\n")
+
+    import_times = [float(run(IMPORT_MAIN)) for _ in range(REPEATS)]
+    print(f"import main:  {min(import_times) * 1000:8.1f} ms")
+
+    parses = [json.loads(run(FIRST_PARSE)) for _ in range(REPEATS)]
+    print(f"first parse:  {min(first for first, _ in parses) * 1000:8.1f} ms (includes model load)")
+    print(f"warm parse:   {min(warm for _, warm in parses) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Round-trip check: structure_converter.py output read back by structure_importer.py.
+
+Writes a synthetic JSONL of forms (every third field a dropdown with options),
+converts it in both output formats and imports each result. Every form must
+come back, in input order, with the same field names, types and options.
+Exits with 1 on the first mismatch.
+
+Run from the repository root:
+    python -m benchmarks.check_export_roundtrip
+    python -m benchmarks.check_export_roundtrip 2000 --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from structure_converter import run_conversion
+from structure_importer import iter_export_forms
+
+
+def make_form(i: int):
+    fields = []
+    for j in range(1 + i % 12):
+        if j % 3 == 0:
+            fields.append({"name": f"choice_{j}", "label": f"Choice {j}", "type": "dropdown", "required": True,
+                           "options": [{"label": f"Option {k}", "value": str(k)} for k in range(1, 4)]})
+        else:
+            fields.append({"name": f"field_{j}", "label": f"Field {j}", "type": "text", "required": False})
+    return {"id": f"form-{i}", "form_data": {"fields": fields}}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check that converted exports import back unchanged")
+    parser.add_argument("count", nargs="?", type=int, default=500, help="Forms to generate")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    expected = [make_form(i)["form_data"] for i in range(args.count)]
+    with tempfile.TemporaryDirectory() as tmp:
+        forms_path = os.path.join(tmp, "forms.jsonl")
+        with open(forms_path, "w") as f:
+            for i in range(args.count):
+                f.write(json.dumps(make_form(i)) + "\n")
+
+        for output_format, extension in (("json", ".json"), ("ndjson", ".ndjson")):
+            export_path = os.path.join(tmp, "exports" + extension)
+            with open(forms_path) as source, open(export_path, "w") as out:
+                summary = run_conversion(source, out, args.workers, output_format, progress_interval=0)
+
+            started = time.perf_counter()
+            imported = list(iter_export_forms(export_path))
+            elapsed = time.perf_counter() - started
+            print(f"{output_format:7} converted {summary['converted']}, imported {len(imported)} "
+                  f"in {elapsed:.2f} s")
+            if len(imported) != len(expected):
+                print(f"FAIL: {output_format} round trip returned {len(imported)} of {len(expected)} forms")
+                return 1
+            for index, (got, want) in enumerate(zip(imported, expected)):
+                if got != want:
+                    print(f"FAIL: {output_format} form {index} differs:\n  {got}\n  {want}")
+                    return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
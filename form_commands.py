@@ -0,0 +1,208 @@
+"""
+Deterministic fast path for simple form edits.
+
+Commands such as "make email required", "remove the phone field",
+"rename name to full name" or "add a date field for date of birth" don't
+need a language model. This module recognises a small grammar of such
+commands, in the spirit of the keyword rules in spacy_form_processor, and
+applies them directly to the form. Anything it cannot resolve with
+confidence (unknown phrasing, ambiguous or missing field, several edits in
+one sentence) returns None so the caller can fall back to the LLM.
+"""
+import copy
+import re
+from typing import Any, Dict, List, Optional
+
+from utils.constants import FIELD_TYPE_KEYWORDS
+from utils.keyword_matcher import KeywordMatcher
+
+_PREFIX = r"^(?:please\s+)?(?:can you\s+)?"
+_FIELD_SUFFIX = r"(?:\s+(?:field|question|input))?"
+
+REQUIRED_PATTERN = re.compile(
+    _PREFIX + r"(?:make|set|mark)\s+(?:the\s+)?(?P<target>.+?)" + _FIELD_SUFFIX +
+    r"\s+(?:as\s+)?(?P<state>required|mandatory|optional|not required|not mandatory)$"
+)
+REMOVE_PATTERN = re.compile(
+    _PREFIX + r"(?:remove|delete|drop)\s+(?:the\s+)?(?P<target>.+?)" + _FIELD_SUFFIX + r"$"
+)
+RENAME_PATTERN = re.compile(
+    _PREFIX + r"(?:rename|relabel)\s+(?:the\s+)?(?P<target>.+?)" + _FIELD_SUFFIX +
+    r"\s+(?:to|as)\s+(?P<label>.+)$"
+)
+ADD_PATTERN = re.compile(
+    _PREFIX + r"add\s+(?:an?\s+)?(?:(?P<required>required|optional)\s+)?(?P<type>[a-z -]+?)\s+"
+    r"(?:field|question|input)\s+(?:for|called|named|labell?ed)\s+(?:the\s+)?(?P<label>.+?)"
+    r"(?:\s+with\s+options?\s+(?P<options>.+?))?"
+    r"(?:,?\s+(?:that is\s+|which is\s+)?(?P<suffix_required>required|optional))?$"
+)
+
+# Words that mean the command touches more than one field
+_MULTI_EDIT = re.compile(r"\b(?:and|also|then)\b|[,;]")
+_OPTION_SPLIT = re.compile(r"\s*(?:,|\bor\b|\band\b)\s*")
+
+CHOICE_TYPES = ("radio", "dropdown", "checkbox")
+TYPE_MATCHER = KeywordMatcher(FIELD_TYPE_KEYWORDS)
+_SMALL_WORDS = {"a", "an", "and", "as", "at", "for", "in", "of", "on", "or", "the", "to"}
+
+
+def _to_snake_case(label: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", label.lower()).strip("_")
+
+
+def _clean(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().rstrip(".!"))
+
+
+def _display_label(field: Dict[str, Any]) -> str:
+    """A stored field's label for messages; fields without one fall back to their name."""
+    return field.get("label", field.get("name"))
+
+
+def _to_label(text: str) -> str:
+    """Title-case all-lowercase input ("date of birth" -> "Date of Birth"), keep user casing otherwise."""
+    if not text.islower():
+        return text
+    words = text.split()
+    return " ".join(word if i and word in _SMALL_WORDS else word.capitalize() for i, word in enumerate(words))
+
+
+def _match_type(type_phrase: str) -> Optional[str]:
+    """Map a type phrase such as 'multiple choice' or 'date' to a field type."""
+    match = TYPE_MATCHER.best(type_phrase)
+    return match.value if match else None
+
+
+def find_field(fields: List[Dict[str, Any]], target: str) -> Optional[int]:
+    """
+    Resolve a user's reference to a field.
+
+    Exact name/label matches win; otherwise the target's words must all
+    appear in exactly one field's name. Returns None when there is no
+    match or the reference is ambiguous.
+    """
+    target_name = _to_snake_case(target)
+    if not target_name:
+        return None
+
+    # Commands arrive lower-cased, labels keep the casing they were created with
+    target_label = _clean(target).lower()
+    exact = [i for i, field in enumerate(fields)
+             if field.get("name") == target_name or _clean(field.get("label", "")).lower() == target_label]
+    if len(exact) == 1:
+        return exact[0]
+    if exact:
+        return None
+
+    words = set(target_name.split("_"))
+    partial = [i for i, field in enumerate(fields)
+               if words <= set(field.get("name", "").split("_"))]
+    return partial[0] if len(partial) == 1 else None
+
+
+def _set_required(form: Dict[str, Any], match: re.Match, original: str) -> Optional[Dict[str, Any]]:
+    index = find_field(form["fields"], match.group("target"))
+    if index is None:
+        return None
+    field = form["fields"][index]
+    field["required"] = match.group("state") in ("required", "mandatory")
+    state = "required" if field["required"] else "optional"
+    return {"message": f"Form updated: Made '{_display_label(field)}' {state}", "form_data": form}
+
+
+def _remove(form: Dict[str, Any], match: re.Match, original: str) -> Optional[Dict[str, Any]]:
+    index = find_field(form["fields"], match.group("target"))
+    if index is None:
+        return None
+    field = form["fields"].pop(index)
+    return {"message": f"Form updated: Removed '{_display_label(field)}' field", "form_data": form}
+
+
+def _rename(form: Dict[str, Any], match: re.Match, original: str) -> Optional[Dict[str, Any]]:
+    index = find_field(form["fields"], match.group("target"))
+    new_label = _to_label(original[match.start("label"):match.end("label")].strip())
+    new_name = _to_snake_case(new_label)
+    if index is None or not new_name:
+        return None
+    if any(i != index and field.get("name") == new_name for i, field in enumerate(form["fields"])):
+        return None
+
+    field = form["fields"][index]
+    old_label = _display_label(field)
+    field["label"] = new_label
+    field["name"] = new_name
+    return {"message": f"Form updated: Renamed '{old_label}' to '{field['label']}'", "form_data": form}
+
+
+def _add(form: Dict[str, Any], match: re.Match, original: str) -> Optional[Dict[str, Any]]:
+    field_type = _match_type(match.group("type").strip())
+    label = _to_label(original[match.start("label"):match.end("label")].strip())
+    name = _to_snake_case(label)
+    if field_type is None or not name or _MULTI_EDIT.search(label):
+        return None
+    if any(field.get("name") == name for field in form["fields"]):
+        return None
+
+    field = {
+        "name": name,
+        "label": label,
+        "type": field_type,
+        "required": "required" in (match.group("required"), match.group("suffix_required")),
+    }
+
+    options_text = match.group("options") and original[match.start("options"):match.end("options")]
+    if options_text:
+        if field_type not in CHOICE_TYPES:
+            return None
+        options = [opt.strip() for opt in _OPTION_SPLIT.split(options_text) if opt.strip()]
+        field["options"] = [{"value": _to_snake_case(opt), "label": _to_label(opt)} for opt in options]
+    elif field_type in ("radio", "dropdown"):
+        # Choice fields need options; let the model come up with them
+        return None
+
+    form["fields"].append(field)
+    return {"message": f"Form updated: Added '{field['label']}' {field_type} field", "form_data": form}
+
+
+# Checked in order; the first pattern that matches decides the command
+_COMMANDS = [
+    (ADD_PATTERN, _add),
+    (RENAME_PATTERN, _rename),
+    (REQUIRED_PATTERN, _set_required),
+    (REMOVE_PATTERN, _remove),
+]
+
+
+def apply_command(input_text: str, current_form: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Apply a simple edit command without calling the LLM.
+
+    Args:
+        input_text (str): The user's request
+        current_form (Optional[Dict[str, Any]]): The form to edit; it is not modified
+
+    Returns:
+        Optional[Dict[str, Any]]: {"message": str, "form_data": Dict} when the command
+        was recognised and applied, or None if the request should go to the LLM
+    """
+    original = _clean(input_text)
+    text = original.lower()
+    if not text:
+        return None
+    if len(text) != len(original):
+        # Case folding changed the length; spans would not line up
+        original = text
+
+    form = copy.deepcopy(current_form) if current_form else {"fields": []}
+    form.setdefault("fields", [])
+
+    for pattern, handler in _COMMANDS:
+        match = pattern.match(text)
+        if match is None:
+            continue
+        target = match.groupdict().get("target")
+        if target is not None and _MULTI_EDIT.search(target):
+            return None
+        return handler(form, match, original)
+
+    return None
@@ -1,8 +1,10 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple, Union
+import copy
 import json
+import os
 import uuid
 from datetime import datetime, timezone
-from ai_server import AIClient
+from form_records import DataElement, DataElementOption, DraftSurveyDataElementMember, FormStructure
 
 FIELD_TYPE_MAPPING = {
     "text": "1",
@@ -62,107 +64,221 @@ Please create a form with appropriate fields. Each field should have:
 - options (array, only for radio/dropdown)"""
 
 
-def generate_form_structure(form_data: Dict[str, Any]) -> Dict[str, Any]:
-    form_id = generate_uuid()
-    current_time = datetime.now(timezone.utc).isoformat()
+# DataElementTypeId per field type used in generated structures
+DATA_ELEMENT_TYPE_IDS = {
+    "text": "1",
+    "number": "2",
+    "email": "3",
+    "date": "4",
+    "file": "5",
+    "image": "13",
+    "radio": "8",
+    "dropdown": "8"
+}
 
-    data_elements = []
-    draft_members = []
-    data_element_options = []
 
-    for idx, field in enumerate(form_data["fields"], 1):
-        field_id = f"{form_id}:{field['name']}"
+# Clear the version and variant bits, then set version 4 and the RFC 4122 variant (as uuid.uuid4 does)
+_UUID4_MASK = ~((0xf000 << 64) | (0xc000 << 48)) & ((1 << 128) - 1)
+_UUID4_BITS = (0x4000 << 64) | (0x8000 << 48)
 
-        # Map field types to DataElementTypeId
-        type_mapping = {
-            "text": "1",
-            "number": "2",
-            "email": "3",
-            "date": "4",
-            "file": "5",
-            "image": "13",
-            "radio": "8",
-            "dropdown": "8"
-        }
 
-        # Create DataElement
-        data_element = {
-            "Name": field["name"],
-            "DataElementBaseId": None,
-            "DataElementTypeId": type_mapping.get(field["type"], "1"),
-            "TextId": None,
-            "InputType": None,
-            "IsRequired": field.get("required", False),
-            "DefaultValue": None,
-            "DisplayText": field["label"],
-            "DataElementColumnName": field["name"],
-            "IsFixed": False,
-            "DataElementBase": None,
-            "DataElementType": None,
-            "DataElementOptions": None,
-            "SurveyFormId": None,
-            "Serial": 0,
-            "IsPublished": None,
-            "RepeaterTableName": None,
-            "CreatedBy": "system",
-            "CreateTime": current_time,
-            "LastModifiedBy": None,
-            "LastModifiedTime": None,
-            "IsDeleted": False,
-            "Id": field_id
-        }
+def generate_uuids(count: int) -> List[str]:
+    """count random version-4 UUIDs as 32-char hex, from a single os.urandom call"""
+    data = os.urandom(16 * count)
+    from_bytes = int.from_bytes
+    return [
+        "%032x" % ((from_bytes(data[i:i + 16], "big") & _UUID4_MASK) | _UUID4_BITS)
+        for i in range(0, 16 * count, 16)
+    ]
+
+
+def _data_element_record(field: Dict[str, Any], field_id: str, create_time: str,
+                         created_by: str = "system") -> DataElement:
+    return DataElement(
+        name=field["name"],
+        data_element_type_id=DATA_ELEMENT_TYPE_IDS.get(field["type"], "1"),
+        is_required=field.get("required", False),
+        display_text=field["label"],
+        data_element_column_name=field["name"],
+        created_by=created_by,
+        create_time=create_time,
+        id=field_id
+    )
+
+
+def _option_record(opt: Dict[str, Any], sort_order: int, field_id: str, create_time: str,
+                   option_id: str) -> DataElementOption:
+    return DataElementOption(
+        name=opt["label"],
+        value=str(opt["value"]),
+        sort_order=sort_order,
+        data_element_id=field_id,
+        create_time=create_time,
+        id=option_id
+    )
+
+
+def _data_element(field: Dict[str, Any], field_id: str, create_time: str,
+                  created_by: str = "system") -> Dict[str, Any]:
+    return _data_element_record(field, field_id, create_time, created_by).to_dict()
+
+
+def _data_element_option(opt: Dict[str, Any], sort_order: int, field_id: str, create_time: str,
+                         option_id: str = None) -> Dict[str, Any]:
+    return _option_record(opt, sort_order, field_id, create_time, option_id or generate_uuid()).to_dict()
+
+
+def _draft_member(form_id: str, field_id: str, sort_order: int, create_time: str) -> Dict[str, Any]:
+    return DraftSurveyDataElementMember(
+        draft_survey_form_id=form_id,
+        data_element_id=field_id,
+        sort_order=sort_order,
+        create_time=create_time,
+        id=generate_uuid()
+    ).to_dict()
+
+
+def build_form_records(form_data: Dict[str, Any], form_id: str = None) -> FormStructure:
+    """
+    Build the DataElements export for a form as slotted records.
+
+    Uses one timestamp and one batch of random IDs for the whole form; serialize
+    the result with form_records.dumps_structure, or call to_dict() for the dict form.
+    """
+    form_id = form_id or generate_uuid()
+    current_time = datetime.now(timezone.utc).isoformat()
+    fields = form_data["fields"]
+    ids = iter(generate_uuids(len(fields) + sum(len(field.get("options") or ()) for field in fields)))
+
+    structure = FormStructure()
+    for idx, field in enumerate(fields, 1):
+        field_id = f"{form_id}:{field['name']}"
+        data_element = _data_element_record(field, field_id, current_time)
 
         # Handle options for radio/dropdown
         if field.get("options"):
-            options = []
-            for opt_idx, opt in enumerate(field["options"], 1):
-                option_id = generate_uuid()
-                option = {
-                    "Name": opt["label"],
-                    "TextId": None,
-                    "Value": str(opt["value"]),
-                    "SortOrder": opt_idx,
-                    "DataElementId": field_id,
-                    "DataElementBaseOptionId": None,
-                    "CreatedBy": "system",
-                    "CreateTime": current_time,
-                    "LastModifiedBy": None,
-                    "LastModifiedTime": None,
-                    "IsDeleted": False,
-                    "Id": option_id
-                }
-                options.append(option)
-                data_element_options.append(option)
-            data_element["DataElementOptions"] = options
-
-        data_elements.append(data_element)
-
-        # Create DraftSurveyDataElementMember
-        draft_member = {
-            "DraftSurveyFormId": form_id,
-            "DataElementId": field_id,
-            "IsGroup": False,
-            "IsFixed": False,
-            "SortOrder": idx,
-            "RepeaterTableName": None,
-            "CreatedBy": "system",
-            "CreateTime": current_time,
-            "LastModifiedBy": None,
-            "LastModifiedTime": None,
-            "IsDeleted": None,
-            "Id": generate_uuid()
-        }
-        draft_members.append(draft_member)
+            options = [
+                _option_record(opt, opt_idx, field_id, current_time, next(ids))
+                for opt_idx, opt in enumerate(field["options"], 1)
+            ]
+            structure.data_element_options.extend(options)
+            data_element.data_element_options = options
+
+        structure.data_elements.append(data_element)
+        structure.draft_members.append(DraftSurveyDataElementMember(
+            draft_survey_form_id=form_id,
+            data_element_id=field_id,
+            sort_order=idx,
+            create_time=current_time,
+            id=next(ids)
+        ))
+    return structure
+
+
+def generate_form_structure(form_data: Dict[str, Any], form_id: str = None) -> Dict[str, Any]:
+    """Build the DataElements export for a form, minting new IDs for everything (and the form unless given)"""
+    return build_form_records(form_data, form_id).to_dict()
+
+
+def _updated_options(field: Dict[str, Any], previous: List[Dict[str, Any]], field_id: str,
+                     current_time: str) -> List[Dict[str, Any]]:
+    """Options for an edited field, keeping the ID and CreateTime of options whose value still exists"""
+    previous_by_value = {option["Value"]: option for option in previous or []}
+    options = []
+    for opt_idx, opt in enumerate(field["options"], 1):
+        old = previous_by_value.get(str(opt["value"]))
+        if old is None:
+            options.append(_data_element_option(opt, opt_idx, field_id, current_time))
+        elif old["Name"] == opt["label"] and old["SortOrder"] == opt_idx:
+            options.append(old)
+        else:
+            option = _data_element_option(opt, opt_idx, field_id, old["CreateTime"], old["Id"])
+            option["LastModifiedBy"] = "system"
+            option["LastModifiedTime"] = current_time
+            options.append(option)
+    return options
+
+
+def update_form_structure(structure: Dict[str, Any], previous_fields: Dict[str, Dict[str, Any]],
+                          form_data: Dict[str, Any], form_id: str) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    Bring a structure built by generate_form_structure up to date with form_data.
+
+    Fields are matched to the previous ones by name. Unchanged fields keep their
+    DataElement, options and member objects as they are; edited fields are rebuilt
+    with their original Id and CreateTime and get a LastModifiedTime; new fields
+    get fresh IDs; fields that are gone are dropped. A member whose SortOrder
+    changes is marked modified.
+
+    Args:
+        structure (Dict[str, Any]): The structure built for previous_fields
+        previous_fields (Dict[str, Dict[str, Any]]): Field name -> the field as it was when
+            structure was built (not the live, possibly mutated, field)
+        form_data (Dict[str, Any]): The new form
+        form_id (str): DraftSurveyFormId of the structure
+
+    Returns:
+        Tuple: (new structure, field name -> snapshot of the fields it was built from)
+    """
+    current_time = datetime.now(timezone.utc).isoformat()
+    elements = {element["Name"]: element for element in structure["DataElements"]}
+    members = {member["DataElementId"]: member for member in structure["DraftSurveyDataElementMembers"]}
 
-    return {
+    data_elements = []
+    draft_members = []
+    data_element_options = []
+    snapshot = {}
+
+    for idx, field in enumerate(form_data["fields"], 1):
+        name = field["name"]
+        field_id = f"{form_id}:{name}"
+        old_field = previous_fields.get(name)
+        old_element = elements.get(name)
+
+        is_new = name in snapshot or old_element is None
+        if is_new:
+            # New field (or a duplicate name): build from scratch
+            element = _data_element(field, field_id, current_time)
+            if field.get("options"):
+                element["DataElementOptions"] = [
+                    _data_element_option(opt, opt_idx, field_id, current_time)
+                    for opt_idx, opt in enumerate(field["options"], 1)
+                ]
+            snapshot.setdefault(name, copy.deepcopy(field))
+        elif old_field == field:
+            element = old_element
+            snapshot[name] = old_field
+        else:
+            element = _data_element(field, field_id, old_element["CreateTime"], old_element["CreatedBy"])
+            element["LastModifiedBy"] = "system"
+            element["LastModifiedTime"] = current_time
+            if field.get("options"):
+                element["DataElementOptions"] = _updated_options(
+                    field, old_element["DataElementOptions"], field_id, current_time
+                )
+            snapshot[name] = copy.deepcopy(field)
+
+        data_elements.append(element)
+        if element["DataElementOptions"]:
+            data_element_options.extend(element["DataElementOptions"])
+
+        member = None if is_new else members.pop(field_id, None)
+        if member is None:
+            member = _draft_member(form_id, field_id, idx, current_time)
+        elif member["SortOrder"] != idx:
+            member = dict(member, SortOrder=idx, LastModifiedBy="system", LastModifiedTime=current_time)
+        draft_members.append(member)
+
+    structure = {
         "DataElements": data_elements,
         "DraftSurveyDataElementMembers": draft_members,
         "DataElementOptions": data_element_options
     }
+    return structure, snapshot
 
 
-def process_ai_response(ai_response: str) -> Dict[str, Any]:
-    """Process the AI response and extract the form data"""
+def process_ai_response(ai_response: Union[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Process the AI response (raw JSON text or an already parsed object) and extract the form data"""
     try:
         print("\nDebug: Processing AI response...")
 
@@ -170,8 +286,8 @@ def process_ai_response(ai_response: str) -> Dict[str, Any]:
             print("Debug: Empty AI response")
             return {}
 
-        # Parse the JSON
-        form_data = json.loads(ai_response)
+        # Streamed responses arrive already parsed; only decode raw text
+        form_data = json.loads(ai_response) if isinstance(ai_response, str) else ai_response
 
         # Validate response structure
         if not isinstance(form_data, dict):
@@ -203,6 +319,10 @@ def process_ai_response(ai_response: str) -> Dict[str, Any]:
 
 
 def main():
+    # Imported here so the structure builders don't pull in openai and the response cache
+    # (structure_converter.py workers import this module)
+    from ai_server import AIClient
+
     client = AIClient(use_ollama=True)
     current_form = {"fields": []}
 
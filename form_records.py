@@ -0,0 +1,206 @@
+"""
+Slotted records for the DataElements export.
+
+A structure built from dicts carries a 23-key dict per DataElement, most of
+it None, plus a 12-key dict per option and per draft member. The records
+below hold the same data in __slots__ instances, which take a fraction of
+the memory, and serialize straight to the export's JSON with the keys in
+the order of sample/Sample_Full_DataElements.json.
+
+Attribute names are the snake_case form of the JSON keys
+(DataElementTypeId -> data_element_type_id).
+
+Usage:
+    structure = FormStructure.from_dict(json.load(f))
+    text = dumps_structure(structure, indent=2)          # byte-compatible with the input
+    compact = dumps_structure(structure, omit_none=True) # nulls dropped
+"""
+import json
+from dataclasses import dataclass, field, fields
+from operator import attrgetter
+from typing import Any, Dict, List, Optional
+
+
+def _json_key(attr: str) -> str:
+    return "".join(part.capitalize() for part in attr.split("_"))
+
+
+class _Record:
+    """Shared conversion helpers; subclasses are slotted dataclasses decorated with _layout."""
+    __slots__ = ()
+    # (JSON keys in order, getter returning the values in that order, JSON key -> attribute)
+    _LAYOUT = None
+
+    def to_dict(self, omit_none: bool = False) -> Dict[str, Any]:
+        keys, values, _ = self._LAYOUT
+        if omit_none:
+            return {key: value for key, value in zip(keys, values(self)) if value is not None}
+        return dict(zip(keys, values(self)))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Build a record from an export dict; unknown keys raise TypeError."""
+        _, _, attrs = cls._LAYOUT
+        try:
+            return cls(**{attrs[key]: value for key, value in data.items()})
+        except KeyError as e:
+            raise TypeError(f"Unknown {cls.__name__} key: {e}") from None
+
+
+def _layout(cls):
+    attrs = [f.name for f in fields(cls)]
+    keys = [_json_key(attr) for attr in attrs]
+    cls._LAYOUT = (keys, attrgetter(*attrs), dict(zip(keys, attrs)))
+    return cls
+
+
+@_layout
+@dataclass(slots=True, kw_only=True)
+class DataElementOption(_Record):
+    name: str
+    text_id: Optional[str] = None
+    value: str
+    sort_order: int
+    data_element_id: str
+    data_element_base_option_id: Optional[str] = None
+    created_by: str = "system"
+    create_time: Optional[str] = None
+    last_modified_by: Optional[str] = None
+    last_modified_time: Optional[str] = None
+    is_deleted: Optional[bool] = False
+    id: str
+
+
+@_layout
+@dataclass(slots=True, kw_only=True)
+class DataElement(_Record):
+    name: str
+    data_element_base_id: Optional[str] = None
+    data_element_type_id: str = "1"
+    text_id: Optional[str] = None
+    input_type: Optional[str] = None
+    is_required: bool = False
+    default_value: Any = None
+    display_text: str
+    data_element_column_name: str
+    is_fixed: bool = False
+    data_element_base: Any = None
+    data_element_type: Any = None
+    data_element_options: Optional[List[DataElementOption]] = None
+    survey_form_id: Optional[str] = None
+    serial: int = 0
+    is_published: Optional[bool] = None
+    repeater_table_name: Optional[str] = None
+    created_by: str = "system"
+    create_time: Optional[str] = None
+    last_modified_by: Optional[str] = None
+    last_modified_time: Optional[str] = None
+    is_deleted: Optional[bool] = False
+    id: str
+
+
+@_layout
+@dataclass(slots=True, kw_only=True)
+class DraftSurveyDataElementMember(_Record):
+    draft_survey_form_id: str
+    data_element_id: str
+    is_group: bool = False
+    is_fixed: bool = False
+    sort_order: int
+    repeater_table_name: Optional[str] = None
+    created_by: str = "system"
+    create_time: Optional[str] = None
+    last_modified_by: Optional[str] = None
+    last_modified_time: Optional[str] = None
+    is_deleted: Optional[bool] = None
+    id: str
+
+
+@dataclass(slots=True)
+class FormStructure:
+    """
+    A whole export. Each element's data_element_options holds the same option
+    records as data_element_options here. draft_survey_form is passed through
+    as a dict and left out of the output when None.
+    """
+    data_elements: List[DataElement] = field(default_factory=list)
+    draft_members: List[DraftSurveyDataElementMember] = field(default_factory=list)
+    data_element_options: List[DataElementOption] = field(default_factory=list)
+    draft_survey_form: Optional[Dict[str, Any]] = None
+
+    def to_dict(self, omit_none: bool = False) -> Dict[str, Any]:
+        """Plain-dict form; an option shared by an element and the top-level list becomes one shared dict."""
+        options = {id(option): option.to_dict(omit_none) for option in self.data_element_options}
+        elements = []
+        for element in self.data_elements:
+            data = element.to_dict(omit_none)
+            if element.data_element_options is not None:
+                data["DataElementOptions"] = [
+                    options.get(id(option)) or option.to_dict(omit_none) for option in element.data_element_options
+                ]
+            elements.append(data)
+        result = {
+            "DataElements": elements,
+            "DraftSurveyDataElementMembers": [member.to_dict(omit_none) for member in self.draft_members],
+            "DataElementOptions": list(options.values()),
+        }
+        if self.draft_survey_form is not None:
+            result["DraftSurveyForm"] = self.draft_survey_form
+        return result
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FormStructure":
+        """Load an export dict, sharing option records between elements and the top-level list by Id."""
+        options = [DataElementOption.from_dict(option) for option in data.get("DataElementOptions") or []]
+        by_id = {option.id: option for option in options}
+        elements = []
+        for element in data.get("DataElements") or []:
+            element_options = element.get("DataElementOptions")
+            if element_options is not None:
+                element = dict(element)
+                element["DataElementOptions"] = [
+                    by_id.get(option.get("Id")) or DataElementOption.from_dict(option) for option in element_options
+                ]
+            elements.append(DataElement.from_dict(element))
+        return cls(
+            data_elements=elements,
+            draft_members=[
+                DraftSurveyDataElementMember.from_dict(member)
+                for member in data.get("DraftSurveyDataElementMembers") or []
+            ],
+            data_element_options=options,
+            draft_survey_form=data.get("DraftSurveyForm"),
+        )
+
+
+def _encoder(omit_none: bool):
+    def default(value: Any) -> Any:
+        if isinstance(value, _Record):
+            return value.to_dict(omit_none)
+        if isinstance(value, FormStructure):
+            result = {
+                "DataElements": value.data_elements,
+                "DraftSurveyDataElementMembers": value.draft_members,
+                "DataElementOptions": value.data_element_options,
+            }
+            if value.draft_survey_form is not None:
+                result["DraftSurveyForm"] = value.draft_survey_form
+            return result
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return default
+
+
+def dumps_structure(structure: Any, indent: Optional[int] = None, omit_none: bool = False) -> str:
+    """
+    Serialize a FormStructure (or any JSON value containing records).
+
+    Compact output goes through the C encoder, which turns records into dicts
+    one at a time as it reaches them, so the whole dict tree never exists at
+    once. Indented output uses json's pure-Python encoder, where that hook is
+    slow, so a FormStructure is converted with to_dict() first. With indent=2
+    and omit_none=False the output matches json.dumps(structure_dict, indent=2).
+    omit_none drops null-valued keys of records; keys of plain dicts are kept.
+    """
+    if indent is not None and isinstance(structure, FormStructure):
+        structure = structure.to_dict(omit_none)
+    return json.dumps(structure, default=_encoder(omit_none), indent=indent)
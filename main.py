@@ -1,17 +1,38 @@
+import asyncio
+import copy
+import itertools
+import json
 import logging
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List
-from contextlib import asynccontextmanager
+import os
+import time
+import uuid
+import weakref
+from fastapi import FastAPI, HTTPException, Request, Response
+from pydantic import BaseModel, Field, ValidationError
+from typing import Callable, Optional, Dict, Any, List
+from contextlib import asynccontextmanager, aclosing
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from ai_server import AIClient
+from api.hedging import HedgedClient, is_valid_response
+from api.registry import get_registry
+from api.resilience import ResilientClient, breaker_states, failover_order, get_breaker
 from form_generator import (
     generate_form_structure,
+    generate_uuid,
+    update_form_structure,
     process_ai_response,
     FIELD_TYPE_MAPPING,
     create_validation_rules
 )
-from spacy_form_processor import process_input
+from spacy_form_processor import (
+    SPACY_WORKERS, get_process_pool, process_batch, process_input, shutdown_process_pool
+)
+from form_commands import apply_command
+from utils.field_index import DuplicateFieldError, FieldIndex
+from utils.form_changelog import FieldChange, FieldChangelog
+from utils.form_store import FormStore, InMemoryFormStore
+from utils.json_stream import JSONStreamParser
+from utils.json_validator import validate_form_structure
 
 # Configure logging
 logging.basicConfig(
@@ -20,25 +41,199 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Global form state
+DEFAULT_FORM_ID = "default"
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "500"))
+
+# Edits of a form's fields kept for delta responses
+FORM_CHANGELOG_SIZE = int(os.getenv("FORM_CHANGELOG_SIZE", "256"))
+# Version of an empty form that has never been edited; every such form looks the same
+EMPTY_FORM_VERSION = 0
+# Versions of edited forms, unique across forms; seeded from the clock so they keep increasing across restarts
+_form_versions = itertools.count(time.time_ns() // 1000)
+
+# Per-form state, stored by form ID
 class FormState:
+    """
+    One form's fields, kept in a FieldIndex, and its lazily refreshed structure.
+
+    Single-field edits (update, delete, move) touch only the index; the
+    `current_form` list and the DataElement structure are rebuilt from it the
+    next time they are read.
+
+    Every edit moves the form to a new version. A new form starts at
+    EMPTY_FORM_VERSION, so polling a form that was never saved keeps getting
+    the same ETag. Edited versions come from a process-wide counter, so no two
+    forms, and no two incarnations of a form, share one, and the version
+    doubles as the ETag. Serialized responses are cached until the
+    next edit, and field edits are logged so clients can fetch a delta.
+    """
+
     def __init__(self):
-        self.current_form = {"fields": []}
-        self.form_structure = None  # To store the complete form structure
+        self.fields = FieldIndex()
+        self.version = EMPTY_FORM_VERSION
+        self.changelog = FieldChangelog(self.version, max_entries=FORM_CHANGELOG_SIZE)
+        self._serialized: Dict[str, bytes] = {}  # Response bytes for the current version
+        self._current_form = None  # Cached {"fields": [...]}, rebuilt after an edit
+        self._form_structure = None  # To store the complete form structure
+        self._structure_stale = False
+        self._structure_bytes = 0
+        self.structure_id = None  # DraftSurveyFormId, stable for the life of the form
+        self._structure_fields = {}  # Field name -> field as of the last structure update
+
+    @property
+    def current_form(self) -> Dict:
+        if self._current_form is None:
+            self._current_form = {"fields": self.fields.to_list()}
+        return self._current_form
+
+    @property
+    def form_structure(self) -> Dict:
+        """
+        The complete form structure, brought up to date with the fields.
+
+        The structure is updated incrementally: only added or edited fields get
+        new or modified DataElements; the rest keep their IDs and timestamps.
+        """
+        if self._form_structure is None:
+            self.structure_id = self.structure_id or generate_uuid()
+            self._form_structure = generate_form_structure(self.current_form, self.structure_id)
+            self._structure_fields = {field["name"]: copy.deepcopy(field) for field in self.fields}
+        elif self._structure_stale:
+            self._form_structure, self._structure_fields = update_form_structure(
+                self._form_structure, self._structure_fields, self.current_form, self.structure_id
+            )
+        else:
+            return self._form_structure
+        self._structure_stale = False
+        self._structure_bytes = len(json.dumps(self._form_structure))
+        return self._form_structure
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def serialized(self, key: str, render: Callable[[], bytes]) -> bytes:
+        """Response body for key at the current version, rendered once per version"""
+        body = self._serialized.get(key)
+        if body is None:
+            body = self._serialized[key] = render()
+        return body
+
+    def _edited(self, op: Optional[str] = None, name: Optional[str] = None, **change):
+        self.version = next(_form_versions)
+        if op is None:
+            self.changelog.reset(self.version)
+        else:
+            self.changelog.record(FieldChange(self.version, op, name, **change))
+        self._serialized = {}
+        self._current_form = None
+        self._structure_stale = True
 
     def update_form(self, form_data: Dict):
-        """Update both the basic form and generated structure"""
-        self.current_form = form_data
-        self.form_structure = generate_form_structure(form_data)
+        """
+        Replace all fields with those of form_data.
+
+        Raises:
+            DuplicateFieldError: If two fields share a name
+        """
+        self.fields = FieldIndex.from_fields(form_data["fields"])
+        self._edited()
+
+    def add_field(self, field: Dict, before: Optional[str] = None, after: Optional[str] = None):
+        """Insert a field; raises DuplicateFieldError if the name is taken, KeyError for an unknown anchor"""
+        self.fields.insert(field, before=before, after=after)
+        self._edited("add", field["name"], field=field, prev=self.fields.previous(field["name"]))
+
+    def replace_field(self, field_name: str, field: Dict):
+        """Replace a field in place; raises KeyError if it is missing, DuplicateFieldError on a clashing rename"""
+        self.fields.replace(field_name, field)
+        self._edited("replace", field["name"], field=field, old_name=field_name)
+
+    def delete_field(self, field_name: str) -> bool:
+        """Remove a field; returns False if there was none with that name"""
+        if field_name not in self.fields:
+            return False
+        old_prev = self.fields.previous(field_name)
+        self.fields.remove(field_name)
+        self._edited("remove", field_name, old_prev=old_prev)
+        return True
+
+    def move_field(self, field_name: str, before: Optional[str] = None, after: Optional[str] = None):
+        """Move a field before or after another one, or to the end; raises KeyError for unknown names"""
+        old_prev = self.fields.previous(field_name)
+        self.fields.move(field_name, before=before, after=after)
+        self._edited("move", field_name, field=self.fields.get(field_name),
+                     prev=self.fields.previous(field_name), old_prev=old_prev)
+
+    def size_in_bytes(self) -> int:
+        """Approximate memory footprint used for the store's byte budget"""
+        # The structure's size is measured when it is rebuilt, not on every field edit
+        return len('{"fields": []}') + self.fields.byte_size + self._structure_bytes
+
+    def patch_since(self, version: int) -> Optional[List[Dict[str, Any]]]:
+        """JSON Patch from version to the current fields, or None if the changelog no longer covers it"""
+        if version == self.version:
+            return []
+        return self.changelog.patch_since(version, self.fields.names())
+
+
+def create_form_store() -> FormStore:
+    """Build the form store from environment configuration"""
+    ttl = float(os.getenv("FORM_STORE_TTL_SECONDS", "3600"))
+    return InMemoryFormStore(
+        num_shards=int(os.getenv("FORM_STORE_SHARDS", "16")),
+        max_entries=int(os.getenv("FORM_STORE_MAX_ENTRIES", "10000")),
+        max_bytes=int(os.getenv("FORM_STORE_MAX_BYTES", str(64 * 1024 * 1024))),
+        ttl_seconds=ttl or None
+    )
+
+
+form_store = create_form_store()
+
+
+def get_form_state(form_id: str) -> FormState:
+    """Return the state for form_id, or a fresh empty form if unknown or evicted"""
+    return form_store.get(form_id) or FormState()
+
+
+def save_form_state(form_id: str, state: FormState) -> None:
+    """Write state back so the store can account for its new size"""
+    form_store.put(form_id, state, size=state.size_in_bytes())
+
+
+# Per-form locks; an entry disappears once no request holds or waits for it
+_form_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def form_lock(form_id: str) -> asyncio.Lock:
+    """
+    Lock held by every request that reads, changes and saves form_id.
+
+    Generations await the model between reading and saving the form, so
+    without it two concurrent requests would both start from the old state
+    and the last one to save would discard the other's edit.
+    """
+    lock = _form_locks.get(form_id)
+    if lock is None:
+        lock = _form_locks[form_id] = asyncio.Lock()
+    return lock
+
+
+# Registry name of the provider used for generation
+AI_PROVIDER = "ollama-async"
+# Comma-separated registry names to hedge slow generations to, e.g. "deepseek"
+HEDGE_PROVIDERS = [name.strip() for name in os.getenv("HEDGE_PROVIDERS", "").split(",") if name.strip()]
 
-form_state = FormState()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize form state on startup"""
-    global form_state
-    form_state = FormState()
+    """Initialize form store on startup and warm provider connections in the background"""
+    global form_store
+    form_store = create_form_store()
+    warmup = asyncio.create_task(provider_registry.awarmup([AI_PROVIDER]))
     yield
+    warmup.cancel()
+    shutdown_process_pool()
 
 app = FastAPI(
     title="Form Generator API",
@@ -47,8 +242,18 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Initialize AI client
-ai_client = AIClient(use_ollama=True)
+# Shared AI client from the provider registry; generations are awaited so reads are never blocked
+provider_registry = get_registry()
+ai_client = provider_registry.get(AI_PROVIDER)
+# Retries and circuit breakers, failing over to FAILOVER_PROVIDERS when the primary is down
+resilient_client = ResilientClient(failover_order(AI_PROVIDER), registry=provider_registry)
+# Optional hedging: the same request goes to HEDGE_PROVIDERS if the primary is slow. Each hedged
+# call still goes through its provider's retries and circuit breaker.
+hedged_client = HedgedClient(
+    [AI_PROVIDER] + HEDGE_PROVIDERS,
+    registry=provider_registry,
+    clients={name: ResilientClient([name], registry=provider_registry) for name in [AI_PROVIDER] + HEDGE_PROVIDERS}
+) if HEDGE_PROVIDERS else None
 
 class FormField(BaseModel):
     name: str
@@ -68,63 +273,181 @@ class UserInput(BaseModel):
         description="The user input describing the form field"
     )
     current_form: Optional[Dict[str, Any]] = None
+    edit_mode: str = Field(
+        "full",
+        pattern="^(full|patch)$",
+        description="'patch' asks the model for JSON Patch operations instead of the whole form"
+    )
 
 class FormResponse(BaseModel):
     message: str
     form_data: FormData
+    path: Optional[str] = None  # "rules", "cache" or "llm" for generation endpoints
+    edit_mode: Optional[str] = None  # "full" or "patch" when the model was called
+    provider: Optional[str] = None  # Provider that produced the form when hedging is enabled
+
+class BatchRequest(BaseModel):
+    items: List[UserInput] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+    max_concurrency: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Upper bound on items in flight for this batch; the backend limit still applies"
+    )
+
+class BatchItemResult(BaseModel):
+    index: int
+    message: str
+    form_data: Optional[FormData] = None
+    path: Optional[str] = None
+    edit_mode: Optional[str] = None
+    provider: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    message: str
+    results: List[BatchItemResult]
+
+class SpacyBatchRequest(BaseModel):
+    items: List[UserInput] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
+    batch_size: int = Field(32, ge=1, le=1000, description="Texts per nlp.pipe batch")
+    n_process: int = Field(
+        1,
+        ge=1,
+        le=os.cpu_count() or 1,
+        description="spaCy pool workers the batch is split across (at most SPACY_WORKERS)"
+    )
 
 @app.get("/")
 async def root():
     """Root endpoint"""
     return {"message": "Form Generator API is running"}
 
-@app.get("/form", response_model=FormResponse)
-def get_form():
-    """Get the current form state"""
+@app.post("/forms")
+def create_form():
+    """Create a new empty form and return its ID"""
+    form_id = uuid.uuid4().hex
+    state = FormState()
+    save_form_state(form_id, state)
+    return {
+        "message": "Form created",
+        "form_id": form_id,
+        "form_data": state.current_form
+    }
+
+@app.get("/forms/stats")
+def get_form_store_stats():
+    """Get form store usage and hit/miss/eviction counters"""
     return {
-        "message": "Current form retrieved",
-        "form_data": form_state.current_form
+        "message": "Form store stats retrieved",
+        "stats": form_store.stats()
     }
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+def _versioned_response(request: Request, form_state: FormState, key: str,
+                        render: Callable[[], Dict[str, Any]]) -> Response:
+    """
+    Serve a form document with its version's ETag, or 304 if the client has it.
+
+    The body is serialized once per version; render is not called for a 304
+    or when the bytes are already cached.
+    """
+    headers = {"ETag": form_state.etag, "X-Form-Version": str(form_state.version), "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), form_state.etag):
+        return Response(status_code=304, headers=headers)
+    body = form_state.serialized(key, lambda: JSONResponse(render()).body)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def _public_field(field: Dict[str, Any]) -> Dict[str, Any]:
+    """A field as GET /form returns it"""
+    return FormField(**field).dict()
+
+@app.get("/form", response_model=FormResponse)
+async def get_form(request: Request, form_id: str = DEFAULT_FORM_ID, since: Optional[int] = None):
+    """
+    Get the current form state.
+
+    Responses carry the form version in the ETag and X-Form-Version headers;
+    If-None-Match with the current ETag returns 304. With `since` set to a
+    version the client holds, the response is a JSON Patch from that version
+    to the current one instead of the whole form. When the version is too old
+    for the changelog, the patch replaces /fields and `full` is true.
+    """
+    form_state = get_form_state(form_id)
+    if since is None:
+        return _versioned_response(request, form_state, "form", lambda: FormResponse(
+            message="Current form retrieved",
+            form_data=form_state.current_form
+        ).dict())
+
+    patch = form_state.patch_since(since)
+    full = patch is None
+    if full:
+        patch = [{"op": "replace", "path": "/fields", "value": form_state.current_form["fields"]}]
+    for operation in patch:
+        if operation["op"] == "replace" and operation["path"] == "/fields":
+            operation["value"] = [_public_field(field) for field in operation["value"]]
+        elif "value" in operation:
+            operation["value"] = _public_field(operation["value"])
+    return JSONResponse(
+        {"message": "Form delta retrieved", "version": form_state.version, "since": since, "full": full,
+         "patch": patch},
+        headers={"ETag": form_state.etag, "X-Form-Version": str(form_state.version), "Cache-Control": "no-cache"}
+    )
+
 @app.post("/form/reset")
-def reset_form():
+async def reset_form(form_id: str = DEFAULT_FORM_ID):
     """Reset the form to empty state"""
-    form_state.current_form = {"fields": []}
+    state = FormState()
+    async with form_lock(form_id):
+        save_form_state(form_id, state)
     return {
         "message": "Form reset successfully",
-        "form_data": form_state.current_form
+        "form_data": state.current_form
     }
 
 @app.post("/generate-form", response_model=FormResponse)
-async def generate_form(user_input: UserInput):
+async def generate_form(user_input: UserInput, form_id: str = DEFAULT_FORM_ID):
     """Generate a form based on user input using AI processing"""
     try:
         logger.info(f"Generating form for input: {user_input.input_text}")
 
-        current_form = user_input.current_form or form_state.current_form
+        # Held until the result is saved, so concurrent requests for this form apply in turn
+        async with form_lock(form_id):
+            form_state = get_form_state(form_id)
+            current_form = user_input.current_form or form_state.current_form
 
-        # Get AI response
-        ai_response = ai_client.fetch_chat_response(
-            user_input.input_text,
-            current_form
-        )
-
-        # Process AI response
-        form_data = process_ai_response(ai_response)
-        if not form_data:
-            raise HTTPException(
-                status_code=400,
-                detail="Failed to generate form structure"
-            )
+            form_data, path, meta = await _run_generation(user_input, current_form)
+            if not form_data:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Failed to generate form structure"
+                )
 
-        # Update global form state with both basic form and structure
-        form_state.update_form(form_data)
+            # Update this form's state with both basic form and structure
+            form_state.update_form(form_data)
+            save_form_state(form_id, form_state)
 
         return {
             "message": "Form generated successfully",
-            "form_data": form_data
+            "form_data": form_data,
+            "path": path,
+            "edit_mode": meta.get("edit_mode"),
+            "provider": meta.get("provider")
         }
 
+    except HTTPException:
+        raise
+    except DuplicateFieldError as e:
+        logger.error(f"Generated form rejected: {str(e)}")
+        raise HTTPException(
+            status_code=422,
+            detail=f"Generated form has duplicate field names: {str(e)}"
+        )
     except Exception as e:
         logger.error(f"Error generating form: {str(e)}")
         raise HTTPException(
@@ -132,48 +455,267 @@ async def generate_form(user_input: UserInput):
             detail=f"Error processing request: {str(e)}"
         )
 
-@app.get("/form/structure")
-async def get_form_structure():
-    """Get the complete form structure including validation rules"""
-    if not form_state.form_structure:
-        form_state.form_structure = generate_form_structure(form_state.current_form)
-    
+async def _run_generation(user_input: UserInput, current_form: Dict[str, Any]):
+    """
+    Produce the new form for one request without touching any stored state.
+
+    Returns:
+        tuple: (form_data or {}, path taken, meta from the AI client)
+    """
+    # Simple edits are applied directly, everything else goes to the model
+    ai_response = apply_command(user_input.input_text, current_form)
+    meta = {}
+    if ai_response is not None:
+        path = "rules"
+    else:
+        client = hedged_client or resilient_client
+        ai_response = await client.agenerate_form(
+            user_input.input_text,
+            current_form,
+            meta=meta,
+            edit_mode=user_input.edit_mode
+        )
+        path = "cache" if meta.get("cached") else "llm"
+        if not meta.get("provider"):
+            # No provider produced a valid form; never replace the form with an empty one
+            return {}, path, meta
+
+    return process_ai_response(ai_response), path, meta
+
+@app.post("/generate-form/batch", response_model=BatchResponse)
+async def generate_form_batch(batch: BatchRequest):
+    """
+    Generate many independent forms concurrently.
+
+    Each item is processed against its own `current_form` (empty if omitted);
+    the stored interactive forms are never read or modified. Results and
+    per-item errors are returned in input order.
+    """
+    logger.info(f"Generating batch of {len(batch.items)} forms")
+    limit = min(batch.max_concurrency or ai_client.max_concurrency, ai_client.max_concurrency)
+    batch_semaphore = asyncio.Semaphore(limit)
+
+    async def run_item(index: int, item: UserInput) -> Dict[str, Any]:
+        async with batch_semaphore:
+            try:
+                form_data, path, meta = await _run_generation(item, item.current_form or {"fields": []})
+            except Exception as e:
+                logger.error(f"Error generating batch item {index}: {str(e)}")
+                return {"index": index, "message": "Error processing request", "error": str(e)}
+
+        if not form_data:
+            return {"index": index, "message": "Failed to generate form structure",
+                    "path": path, "error": "Failed to generate form structure"}
+        try:
+            # Checked per item so one malformed form can't fail the whole response model
+            FormData(**form_data)
+        except ValidationError as e:
+            logger.error(f"Invalid form for batch item {index}: {str(e)}")
+            return {"index": index, "message": "Invalid form structure", "path": path,
+                    "provider": meta.get("provider"), "error": f"Invalid form structure: {str(e)}"}
+        return {"index": index, "message": "Form generated successfully", "form_data": form_data,
+                "path": path, "edit_mode": meta.get("edit_mode"), "provider": meta.get("provider")}
+
+    results = await asyncio.gather(*(run_item(i, item) for i, item in enumerate(batch.items)))
+    failed = sum(1 for result in results if result.get("error"))
     return {
+        "message": f"Generated {len(results) - failed} of {len(results)} forms",
+        "results": results
+    }
+
+def _sse_event(event: str, data: Any) -> str:
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/generate-form/stream")
+async def generate_form_stream(user_input: UserInput, form_id: str = DEFAULT_FORM_ID):
+    """
+    Generate a form and stream it as Server-Sent Events.
+
+    Emits a `field` event for every entry of `form_data.fields` as soon as the
+    model has finished writing it, then a single `done` event with the
+    validated form and message (or an `error` event).
+
+    Streaming counts towards the primary provider's circuit breaker. While it
+    is open, or if the stream fails before its first field, the form is
+    generated without streaming through the resilient (or hedged) client and
+    its fields are emitted at once.
+    """
+    logger.info(f"Streaming form for input: {user_input.input_text}")
+
+    async def events():
+        # Held for the whole stream, so concurrent requests for this form apply in turn
+        async with form_lock(form_id):
+            form_state = get_form_state(form_id)
+            current_form = user_input.current_form or form_state.current_form
+            parser = JSONStreamParser(item_path=("form_data", "fields"))
+            try:
+                path = "rules"
+                # Streamed results are cached below once validated; the fallback clients cache their own
+                from_stream = False
+                ai_response = apply_command(user_input.input_text, current_form)
+                if ai_response is None:
+                    path = "cache"
+                    ai_response = ai_client.cache.get(ai_client.cache_namespace, user_input.input_text, current_form)
+                if ai_response is not None:
+                    for field in ai_response["form_data"]["fields"]:
+                        yield _sse_event("field", field)
+                else:
+                    path = "llm"
+                    breaker = get_breaker(AI_PROVIDER)
+                    streamed = False
+                    if breaker.allow():
+                        try:
+                            stream = ai_client.stream_chat_response(user_input.input_text, current_form)
+                            async with aclosing(stream):
+                                async for text in stream:
+                                    done = parser.feed(text)
+                                    for field in parser.pop_items():
+                                        streamed = True
+                                        yield _sse_event("field", field)
+                                    if done:
+                                        break
+                        except (asyncio.CancelledError, GeneratorExit):
+                            breaker.abandon()
+                            raise
+                        except Exception as e:
+                            breaker.record_failure(e)
+                            if streamed:
+                                raise
+                            logger.warning(f"Streaming from {AI_PROVIDER} failed, generating without streaming: "
+                                           f"{str(e)}")
+                        else:
+                            try:
+                                ai_response = parser.result()
+                            except json.JSONDecodeError:
+                                ai_response = None
+                            if is_valid_response(ai_response):
+                                breaker.record_success()
+                                from_stream = True
+                            else:
+                                # Truncated or invalid output counts against the provider like an error
+                                breaker.record_failure(ValueError("Incomplete or invalid streamed form"))
+                                if streamed:
+                                    # Fields already went out; regenerating would send a second, different set
+                                    yield _sse_event("error", {"message": "The model's streamed form was incomplete "
+                                                                         "or invalid"})
+                                    return
+                                ai_response = None
+
+                    if ai_response is None:
+                        meta = {}
+                        ai_response = await (hedged_client or resilient_client).agenerate_form(
+                            user_input.input_text, current_form, meta=meta
+                        )
+                        if meta.get("cached"):
+                            path = "cache"
+                        if not meta.get("provider"):
+                            # No provider produced a valid form; never replace the form with an empty one
+                            ai_response = None
+                        else:
+                            for field in ai_response["form_data"]["fields"]:
+                                yield _sse_event("field", field)
+
+                form_data = process_ai_response(ai_response)
+                if not form_data:
+                    yield _sse_event("error", {"message": "Failed to generate form structure"})
+                    return
+
+                is_valid, detail = validate_form_structure({"form_data": form_data})
+                if not is_valid:
+                    yield _sse_event("error", {"message": f"Invalid form structure: {detail}", "form_data": form_data})
+                    return
+
+                if from_stream:
+                    ai_client.cache.set(ai_client.cache_namespace, user_input.input_text, current_form,
+                                        ai_response)
+                form_state.update_form(form_data)
+                save_form_state(form_id, form_state)
+                yield _sse_event("done", {
+                    "message": ai_response.get("message", "Form generated successfully"),
+                    "form_data": form_data,
+                    "path": path
+                })
+
+            except Exception as e:
+                logger.error(f"Error streaming form: {str(e)}")
+                yield _sse_event("error", {"message": f"Error processing request: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/form/structure")
+async def get_form_structure(request: Request, form_id: str = DEFAULT_FORM_ID):
+    """
+    Get the complete form structure including validation rules.
+
+    Versioned like GET /form: the ETag changes with every edit and a matching
+    If-None-Match returns 304 without rebuilding or serializing the structure.
+    """
+    stored = form_store.get(form_id)
+    form_state = stored or FormState()
+    size = form_state.size_in_bytes()
+    response = _versioned_response(request, form_state, "structure", lambda: {
         "message": "Form structure retrieved",
         "structure": form_state.form_structure
-    }
+    })
+    if stored is not None and form_state.size_in_bytes() != size:
+        # The structure was (re)built; let the store account for it. Unknown
+        # ids are not saved, so reads alone cannot evict real forms.
+        save_form_state(form_id, form_state)
+    return response
+
+def _field_with_validation(field_data: FormField) -> Dict[str, Any]:
+    """A field dict with validation rules based on its type"""
+    field_dict = field_data.dict()
+    field_dict["validation"] = create_validation_rules(field_data.type, field_data.name)
+    return field_dict
+
+def _field_response(message: str, form_state: FormState, return_form: bool) -> Dict[str, Any]:
+    # Bulk edit scripts can skip the full form, which is O(n) to serialize
+    response = {"message": message, "field_count": len(form_state.fields)}
+    if return_form:
+        response["form_data"] = form_state.current_form
+    return response
+
+@app.post("/form/field")
+async def add_field(field_data: FormField, before: Optional[str] = None, after: Optional[str] = None,
+                    form_id: str = DEFAULT_FORM_ID, return_form: bool = True):
+    """Add a field at the end of the form, or before or after an existing field"""
+    async with form_lock(form_id):
+        form_state = get_form_state(form_id)
+        try:
+            form_state.add_field(_field_with_validation(field_data), before=before, after=after)
+        except DuplicateFieldError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=f"Field {e} not found")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        save_form_state(form_id, form_state)
+    return _field_response(f"Field '{field_data.name}' added successfully", form_state, return_form)
 
 @app.put("/form/field")
-async def update_field(field_name: str, field_data: FormField):
+async def update_field(field_name: str, field_data: FormField, form_id: str = DEFAULT_FORM_ID,
+                       return_form: bool = True):
     """Update a specific field in the form"""
     try:
-        fields = form_state.current_form["fields"]
-        for i, field in enumerate(fields):
-            if field["name"] == field_name:
-                # Add validation rules based on field type
-                validation_rules = create_validation_rules(
-                    field_data.type,
-                    field_data.name
-                )
-                
-                # Update field with validation
-                field_dict = field_data.dict()
-                field_dict["validation"] = validation_rules
-                fields[i] = field_dict
-                
-                # Regenerate form structure
-                form_state.update_form(form_state.current_form)
-                
-                return {
-                    "message": f"Field '{field_name}' updated successfully",
-                    "form_data": form_state.current_form
-                }
-        
+        async with form_lock(form_id):
+            form_state = get_form_state(form_id)
+            form_state.replace_field(field_name, _field_with_validation(field_data))
+            save_form_state(form_id, form_state)
+        return _field_response(f"Field '{field_name}' updated successfully", form_state, return_form)
+
+    except KeyError:
         raise HTTPException(
             status_code=404,
             detail=f"Field '{field_name}' not found"
         )
-
+    except DuplicateFieldError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Error updating field: {str(e)}")
         raise HTTPException(
@@ -182,17 +724,14 @@ async def update_field(field_name: str, field_data: FormField):
         )
 
 @app.delete("/form/field/{field_name}")
-async def delete_field(field_name: str):
+async def delete_field(field_name: str, form_id: str = DEFAULT_FORM_ID, return_form: bool = True):
     """Delete a field from the form"""
     try:
-        fields = form_state.current_form["fields"]
-        form_state.current_form["fields"] = [
-            f for f in fields if f["name"] != field_name
-        ]
-        return {
-            "message": f"Field '{field_name}' deleted successfully",
-            "form_data": form_state.current_form
-        }
+        async with form_lock(form_id):
+            form_state = get_form_state(form_id)
+            form_state.delete_field(field_name)
+            save_form_state(form_id, form_state)
+        return _field_response(f"Field '{field_name}' deleted successfully", form_state, return_form)
 
     except Exception as e:
         logger.error(f"Error deleting field: {str(e)}")
@@ -201,14 +740,36 @@ async def delete_field(field_name: str):
             detail=f"Error deleting field: {str(e)}"
         )
 
+@app.post("/form/field/{field_name}/move")
+async def move_field(field_name: str, before: Optional[str] = None, after: Optional[str] = None,
+                     form_id: str = DEFAULT_FORM_ID, return_form: bool = True):
+    """Move a field before or after another field, or to the end of the form if neither is given"""
+    async with form_lock(form_id):
+        form_state = get_form_state(form_id)
+        try:
+            form_state.move_field(field_name, before=before, after=after)
+        except KeyError as e:
+            raise HTTPException(status_code=404, detail=f"Field {e} not found")
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        save_form_state(form_id, form_state)
+    return _field_response(f"Field '{field_name}' moved successfully", form_state, return_form)
+
+async def _spacy_pool():
+    """The spaCy process pool; created off the event loop since the model may load first"""
+    return await asyncio.to_thread(get_process_pool)
+
 @app.post("/generate-form/spacy")
-def generate_form_spacy(user_input: UserInput):
+async def generate_form_spacy(user_input: UserInput):
     """
     Generate a form using the original Spacy implementation.
     This endpoint is kept for comparison and testing purposes.
+    Parsing runs in the spaCy process pool so other requests aren't blocked.
     """
     try:
-        form_data = process_input(user_input.input_text, user_input.current_form)
+        form_data = await asyncio.get_running_loop().run_in_executor(
+            await _spacy_pool(), process_input, user_input.input_text, user_input.current_form
+        )
         return {
             "message": "Form updated successfully (Spacy)!",
             "form_data": form_data
@@ -216,6 +777,66 @@ def generate_form_spacy(user_input: UserInput):
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/generate-form/spacy/batch")
+async def generate_form_spacy_batch(batch: SpacyBatchRequest):
+    """
+    Generate many independent forms with the Spacy implementation.
+
+    The batch is split into n_process contiguous chunks, each parsed with one
+    nlp.pipe pass in a spaCy pool worker, so the model never runs in (or forks
+    from) the API process. Stored forms are never read or modified.
+    """
+    items = [(item.input_text, item.current_form) for item in batch.items]
+    parts = max(1, min(batch.n_process, SPACY_WORKERS, len(items)))
+    size = -(-len(items) // parts)
+    pool = await _spacy_pool()
+    loop = asyncio.get_running_loop()
+    chunks = await asyncio.gather(*(
+        loop.run_in_executor(pool, process_batch, items[start:start + size], batch.batch_size, 1)
+        for start in range(0, len(items), size)
+    ))
+    results = [result for chunk in chunks for result in chunk]
+
+    failed = sum(1 for result in results if "error" in result)
+    return {
+        "message": f"Generated {len(results) - failed} of {len(results)} forms (Spacy)",
+        "results": [
+            {"index": i, "path": "spacy", **result} for i, result in enumerate(results)
+        ]
+    }
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Get response cache hit rate and per-tier usage"""
+    return {
+        "message": "Cache stats retrieved",
+        "stats": ai_client.cache.stats()
+    }
+
+@app.get("/providers")
+async def get_providers(refresh: bool = False):
+    """Get health and probe latency of every registered provider, optionally re-probing them first"""
+    if refresh:
+        await provider_registry.awarmup()
+    return {
+        "message": "Provider status retrieved",
+        "providers": provider_registry.status(),
+        "breakers": breaker_states(),
+        "hedging": hedged_client.stats() if hedged_client else None
+    }
+
+@app.post("/providers/{name}/reset")
+async def reset_provider_breaker(name: str):
+    """Close a provider's circuit breaker, e.g. after the backend has been fixed"""
+    if name not in provider_registry.names:
+        raise HTTPException(status_code=404, detail=f"Unknown provider: {name}")
+    breaker = get_breaker(name)
+    breaker.reset()
+    return {
+        "message": f"Circuit breaker for {name} reset",
+        "breaker": breaker.snapshot()
+    }
+
 @app.get("/field-types")
 async def get_field_types():
     """Get available field types and their mappings"""
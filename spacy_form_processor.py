@@ -1,75 +1,143 @@
-import spacy
 import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-# Load the spaCy Transformer-based model
-nlp = spacy.load("en_core_web_trf")
+from utils.constants import SPACY_FIELD_TYPE_KEYWORDS
+from utils.keyword_matcher import FieldPhraseMatcher
 
-# Initialize an empty form JSON structure
-form_data = {"fields": []}
+# spaCy pipeline to load: en_core_web_sm, en_core_web_md or en_core_web_trf
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_trf")
 
+# Only noun_chunks (parser) and POS tags (tagger + attribute_ruler) are used,
+# so these components are not even loaded
+EXCLUDED_COMPONENTS = ["ner", "lemmatizer"]
 
-def process_input(input_text, form_data_p):
+logger = logging.getLogger(__name__)
+
+# Worker processes for parsing off the API's event loop. Each worker loads the
+# model itself. Forking the threaded API process can deadlock the children on
+# locks held by other threads at fork time, so "fork" (where workers share the
+# parent's weights copy-on-write) is only used when SPACY_START_METHOD asks for it.
+SPACY_WORKERS = int(os.getenv("SPACY_WORKERS", str(min(4, os.cpu_count() or 1))))
+SPACY_START_METHOD = os.getenv(
+    "SPACY_START_METHOD", "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+# Field type synonyms and command markers, compiled once into a single-pass matcher
+PHRASE_MATCHER = FieldPhraseMatcher(SPACY_FIELD_TYPE_KEYWORDS)
+
+_nlp = None
+_nlp_lock = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_nlp():
+    """
+    Return the shared spaCy pipeline, loading it on first use.
+
+    Importing this module (e.g. from main.py) no longer pays for importing
+    spaCy and loading the model; only the first parse does.
+    """
+    global _nlp
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                _nlp = spacy.load(SPACY_MODEL, exclude=EXCLUDED_COMPONENTS)
+    return _nlp
+
+
+def _init_worker():
+    """Process pool initializer: make sure the model is loaded before the first task."""
+    get_nlp()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared spaCy process pool, creating it on first use.
+
+    With the fork start method this blocks while the model loads in the
+    parent, so call it from a worker thread when on the event loop.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if SPACY_START_METHOD == "fork":
+                logger.warning(
+                    "SPACY_START_METHOD=fork: forking a multi-threaded process can deadlock the spaCy workers; "
+                    "use forkserver or spawn unless the model's memory must be shared"
+                )
+                get_nlp()
+            _pool = ProcessPoolExecutor(
+                max_workers=SPACY_WORKERS,
+                mp_context=multiprocessing.get_context(SPACY_START_METHOD),
+                initializer=_init_worker
+            )
+        return _pool
+
+
+def shutdown_process_pool():
+    """Stop the worker processes, e.g. on API shutdown."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def process_input(input_text, form_data_p=None, doc=None):
     """
     Process user input to update the form data.
 
     Args:
         input_text (str): The user input describing the form field.
-        form_data_p (dict): The current form data structure.
+        form_data_p (dict): The current form data structure, or None for an empty form.
+        doc (spacy.tokens.Doc): input_text already parsed (e.g. by nlp.pipe), or None to parse it here.
 
     Returns:
         dict: The updated form data structure.
     """
-    # Use spaCy to parse the input text
-    doc = nlp(input_text)
+    if form_data_p is None:
+        form_data_p = {"fields": []}
+
+    # One scan finds the field type, label and options
+    phrase = PHRASE_MATCHER.parse(input_text)
+    text = input_text.lower()
     field = {}
 
-    if "add a" in input_text.lower():
+    if "add" in phrase.flags:
         # Determine the type of field
-        field_type = "text"
-        if "email" in input_text.lower():
-            field_type = "email"
-        elif "radio" in input_text.lower() or "multiple choice" in input_text.lower():
-            field_type = "radio"
-        elif "checkbox" in input_text.lower():
-            field_type = "checkbox"
-        elif "textarea" in input_text.lower():
-            field_type = "textarea"
-        elif "date" in input_text.lower():
-            field_type = "date"
-        elif "person" in input_text.lower():
-            field_type = "person"
-        elif "files" in input_text.lower() or "media" in input_text.lower():
-            field_type = "files"
-        elif "number" in input_text.lower():
-            field_type = "number"
-        elif "url" in input_text.lower():
-            field_type = "url"
-        elif "phone" in input_text.lower():
-            field_type = "phone"
-
-        # Extract the label
-        label = None
-        for chunk in doc.noun_chunks:
-            if any(word in chunk.text.lower() for word in ["for", "question", "field"]):
-                label = chunk.text
-                break
-
-        # Fallback for label if no entity detected
+        field_type = phrase.field_type or "text"
+
+        # Extract the label: the text after "for"/"called"/..., else spaCy noun chunks
+        label = phrase.label
         if not label:
-            label = " ".join([token.text for token in doc if token.pos_ in ["NOUN", "PROPN"]]).strip()
+            # Use spaCy to parse the input text
+            if doc is None:
+                doc = get_nlp()(input_text)
+            for chunk in doc.noun_chunks:
+                if any(word in chunk.text.lower() for word in ["for", "question", "field"]):
+                    label = chunk.text
+                    break
+
+            # Fallback for label if no entity detected
+            if not label:
+                label = " ".join([token.text for token in doc if token.pos_ in ["NOUN", "PROPN"]]).strip()
 
         # Add options if it's a choice field
-        options = []
-        if field_type in ["radio", "checkbox"] and "with options" in input_text.lower():
-            options_text = input_text.lower().split("with options")[1].strip()
-            options = [opt.strip() for opt in options_text.split(",") if opt.strip()]
+        options = phrase.options if field_type in ["radio", "checkbox"] else []
 
         # Populate the field object
         field = {
             "type": field_type,
             "label": label,
             "name": label.lower().replace(" ", "_").strip(),
-            "required": "required" in input_text.lower(),
+            "required": "required" in phrase.flags,
         }
 
         if options:
@@ -79,35 +147,63 @@ def process_input(input_text, form_data_p):
         if field_type and label:
             form_data_p["fields"].append(field)
 
-    elif "make" in input_text.lower() and "optional" in input_text.lower():
+    elif "make" in phrase.flags and "optional" in phrase.flags:
         # Detect the field to update
         for field in form_data_p["fields"]:
-            if any(word in input_text.lower() for word in field["label"].lower().split()):
+            if any(word in text for word in field["label"].lower().split()):
                 field["required"] = False
 
     return form_data_p
 
 
-# region [Example]
-# Example inputs
-user_inputs = [
-    "Add a text field for name",
-    "Add a multiple choice question for gender with options Male, Female, Other",
-    "Make the gender question optional",
-    "Add a checkbox field for interests",
-    "Add a email field for email",
-    "Add a date field for date of birth",
-    "Add a person field for assignee",
-    "Add a files field for profile picture upload",
-    "Add a number field for age",
-    "Add a URL field for website",
-    "Add a phone field for contact number",
-]
-
-# Process each input and update the form_data
-for user_input in user_inputs:
-    form_data = process_input(user_input, form_data)
-
-# Print the resulting JSON structure
-print(json.dumps(form_data, indent=2))
-# endregion
+def process_batch(items: Iterable[Tuple[str, Optional[dict]]], batch_size: int = 32,
+                  n_process: int = 1) -> List[Dict[str, Any]]:
+    """
+    Process many independent inputs with a single nlp.pipe pass.
+
+    Args:
+        items: (input_text, current form or None) pairs
+        batch_size (int): Texts per nlp.pipe batch
+        n_process (int): Processes nlp.pipe parses with; must be 1 inside a pool worker
+
+    Returns:
+        list: {"form_data": dict} or {"error": str} per item, in input order
+    """
+    items = list(items)
+    docs = get_nlp().pipe((text for text, _ in items), batch_size=batch_size, n_process=n_process)
+    results = []
+    for (text, current_form), doc in zip(items, docs):
+        try:
+            results.append({"form_data": process_input(text, current_form, doc=doc)})
+        except Exception as e:
+            results.append({"error": str(e)})
+    return results
+
+
+if __name__ == "__main__":
+    # region [Example]
+    # Example inputs
+    user_inputs = [
+        "Add a text field for name",
+        "Add a multiple choice question for gender with options Male, Female, Other",
+        "Make the gender question optional",
+        "Add a checkbox field for interests",
+        "Add a email field for email",
+        "Add a date field for date of birth",
+        "Add a person field for assignee",
+        "Add a files field for profile picture upload",
+        "Add a number field for age",
+        "Add a URL field for website",
+        "Add a phone field for contact number",
+    ]
+
+    # Initialize an empty form JSON structure
+    form_data = {"fields": []}
+
+    # Process each input and update the form_data
+    for user_input in user_inputs:
+        form_data = process_input(user_input, form_data)
+
+    # Print the resulting JSON structure
+    print(json.dumps(form_data, indent=2))
+    # endregion
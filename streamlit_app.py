@@ -1,7 +1,81 @@
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import streamlit as st
-from api.gemini_client import GeminiClient
-from api.deepseek_client import DeepSeekClient
+from api.registry import get_registry
+
+# Providers available for generation and comparison, mapped to their registry names
+MODEL_CLIENTS = {
+    "Gemini": "gemini",
+    "DeepSeek:R1": "deepseek"
+}
+
+
+def get_client(model_name):
+    """Shared client from the provider registry, built once per server process."""
+    return get_registry().get(MODEL_CLIENTS[model_name])
+
+
+def run_model(model_name, user_input, current_form):
+    """
+    Generate a form with one provider and measure it. Runs in a worker thread,
+    so it must not touch st.session_state.
+    Returns:
+        dict with message, form_data, latency, ttft, size and (on failure) error
+    """
+    start = time.perf_counter()
+    first_token = []
+
+    def on_first_token():
+        if not first_token:
+            first_token.append(time.perf_counter() - start)
+
+    try:
+        response = get_client(model_name).generate_form(
+            user_input, current_form, on_first_token=on_first_token
+        )
+        message = response.get("message", "Form updated successfully!")
+        form_data = response.get("form_data", response)
+        if form_data and "fields" in form_data:
+            result = {"message": message, "form_data": form_data}
+        else:
+            result = {
+                "message": "Failed to generate form",
+                "form_data": {"fields": []},
+                "error": "Invalid response format"
+            }
+    except Exception as e:
+        result = {"message": f"Error: {str(e)}", "form_data": {"fields": []}, "error": str(e)}
+
+    result["latency"] = time.perf_counter() - start
+    result["ttft"] = first_token[0] if first_token else None
+    result["size"] = len(json.dumps(result["form_data"]))
+    return result
+
+
+def display_comparison_result(model_name, result):
+    """Render one provider's comparison result inside the current column."""
+    st.markdown(f"### {model_name}")
+
+    if "latency" in result:
+        ttft = f"{result['ttft']:.2f}s" if result.get("ttft") is not None else "n/a"
+        field_count = len(result.get("form_data", {}).get("fields", []))
+        st.caption(f"⏱️ {result['latency']:.2f}s total • first token {ttft} • "
+                   f"{field_count} fields, {result['size']:,} bytes")
+
+    if "error" in result:
+        st.error(f"Error: {result['error']}")
+    else:
+        # Display the message first
+        if "message" in result:
+            st.success(result["message"])
+
+        # Then display the form data
+        form_data = result.get("form_data", {})
+        if form_data.get("fields"):
+            st.json(form_data)
+        else:
+            st.warning("No fields generated")
 
 
 def display_system_alert(message, alert_type="success"):
@@ -53,6 +127,10 @@ def app():
 
     # Page configuration
     st.set_page_config(page_title="Form Builder", page_icon="🔮", layout="wide")
+
+    # Open provider connections before the first request (no-op after the first run)
+    registry = get_registry()
+    registry.warmup(MODEL_CLIENTS.values(), background=True)
     st.title("AI Form Builder with Model Comparison")
     st.write("This app generates a form based on user input.")
     st.markdown("---")
@@ -72,6 +150,16 @@ def app():
         )
         # st.caption(f"Currently using: {selected_model}")
 
+        with st.expander("Provider Status"):
+            for model_name, provider in MODEL_CLIENTS.items():
+                status = registry.status()[provider]
+                if status["healthy"] is None:
+                    st.caption(f"⏳ {model_name}: not checked yet")
+                elif status["healthy"]:
+                    st.caption(f"🟢 {model_name}: {status['latency_ms']:.0f} ms")
+                else:
+                    st.caption(f"🔴 {model_name}: {status['error']}")
+
         st.markdown("""**Form View**""")
         # Display current generated output
         if st.session_state.form_data and st.session_state.form_data.get("fields"):
@@ -127,11 +215,8 @@ def app():
         with alert_container:
             display_system_alert(f"Switched from {old_model} to {selected_model}. Form reset.", "info")
 
-    # Initialize the appropriate client based on selection
-    if selected_model == "Gemini":
-        client = GeminiClient()
-    else:  # DeepSeek
-        client = DeepSeekClient()
+    # Reuse the cached client for the selected model
+    client = get_client(selected_model)
 
     # Display current model info
     st.caption(f"Powered by {selected_model}")
@@ -171,50 +256,41 @@ def app():
                     display_system_alert(f"Error: {str(e)}", "error")
 
     # Function to compare all models
-    def compare_all_models():
-        if not user_input:
-            return
-
-        # Initialize all clients
-        clients = {
-            "Gemini": GeminiClient(),
-            "DeepSeek:R1": DeepSeekClient()
-        }
-
-        # Process with each client using their own persistent state
-        for model_name, model_client in clients.items():
-            with st.spinner(f"Generating with {model_name}..."):
-                try:
-                    # Use the model's own form state for continuity
-                    current_model_form = st.session_state.model_forms.get(model_name, {"fields": []})
-
-                    # Get complete response
-                    response = model_client.generate_form(user_input, current_model_form)
-
-                    # Extract message and form data while preserving the full structure
-                    message = response.get("message", "Form updated successfully!")
-                    form_data = response.get("form_data", response)
-
-                    if form_data and "fields" in form_data:
-                        # Update the model's state for future use
-                        st.session_state.model_forms[model_name] = form_data
-                        # Store both message and form_data in comparison results
-                        st.session_state.comparison_results[model_name] = {
-                            "message": message,
-                            "form_data": form_data
-                        }
-                    else:
-                        st.session_state.comparison_results[model_name] = {
-                            "message": "Failed to generate form",
-                            "form_data": {"fields": []},
-                            "error": "Invalid response format"
-                        }
-                except Exception as e:
-                    st.session_state.comparison_results[model_name] = {
-                        "message": f"Error: {str(e)}",
-                        "form_data": {"fields": []},
-                        "error": str(e)
-                    }
+    def compare_all_models(columns):
+        """
+        Query every provider concurrently and render each result as soon as it arrives,
+        so the wait is the slowest provider rather than the sum of all of them.
+        """
+        placeholders = {}
+        for column, model_name in zip(columns, MODEL_CLIENTS):
+            with column:
+                placeholders[model_name] = st.empty()
+                with placeholders[model_name].container():
+                    st.markdown(f"### {model_name}")
+                    st.info("Generating...")
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(MODEL_CLIENTS)) as executor:
+            # Each model continues from its own persistent form state
+            futures = {
+                executor.submit(
+                    run_model, model_name, user_input,
+                    st.session_state.model_forms.get(model_name, {"fields": []})
+                ): model_name
+                for model_name in MODEL_CLIENTS
+            }
+            for future in as_completed(futures):
+                model_name = futures[future]
+                result = future.result()
+                results[model_name] = result
+                if "error" not in result:
+                    # Update the model's state for future use
+                    st.session_state.model_forms[model_name] = result["form_data"]
+                with placeholders[model_name].container():
+                    display_comparison_result(model_name, result)
+
+        # Keep the configured provider order for later reruns
+        st.session_state.comparison_results = {name: results[name] for name in MODEL_CLIENTS}
 
         with alert_container:
             display_system_alert("Comparison completed", "info")
@@ -244,8 +320,7 @@ def app():
                 generate_form()
 
         with col2:
-            if st.button("Compare All Models", type="secondary", disabled=not user_input):
-                compare_all_models()
+            run_comparison = st.button("Compare All Models", type="secondary", disabled=not user_input)
 
         with col3:
             if st.button("Show Current Form", type="secondary", disabled=not st.session_state.form_data.get("fields")):
@@ -284,8 +359,11 @@ def app():
         st.markdown("### Generated Form")
         st.json(st.session_state.form_data)
 
-    # Display comparison results if available
-    if st.session_state.comparison_results:
+    # Run a requested comparison, or display earlier comparison results if available
+    if run_comparison:
+        st.markdown("## Model Comparison")
+        compare_all_models(st.columns(len(MODEL_CLIENTS)))
+    elif st.session_state.comparison_results:
         st.markdown("## Model Comparison")
 
         # Create columns for side-by-side comparison
@@ -295,22 +373,7 @@ def app():
         # Display each model's output in its own column
         for i, model_name in enumerate(model_names):
             with cols[i]:
-                st.markdown(f"### {model_name}")
-                result = st.session_state.comparison_results[model_name]
-
-                if "error" in result:
-                    st.error(f"Error: {result['error']}")
-                else:
-                    # Display the message first
-                    if "message" in result:
-                        st.success(result["message"])
-
-                    # Then display the form data
-                    form_data = result.get("form_data", {})
-                    if form_data.get("fields"):
-                        st.json(form_data)
-                    else:
-                        st.warning("No fields generated")
+                display_comparison_result(model_name, st.session_state.comparison_results[model_name])
 
 
 if __name__ == "__main__":
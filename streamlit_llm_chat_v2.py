@@ -1,6 +1,5 @@
 import streamlit as st
-from api.deepseek_client import DeepSeekClient
-from api.gemini_client import GeminiClient
+from api.registry import get_registry
 
 
 def app():
@@ -13,11 +12,10 @@ def app():
     st.caption(f"Powered by {model} AI")
     st.markdown("---")
 
-    # Initialize client based on selection
-    if model == "DeepSeek":
-        client = DeepSeekClient()
-    else:
-        client = GeminiClient()
+    # Reuse the shared client for the selected model
+    registry = get_registry()
+    registry.warmup(["deepseek", "gemini"], background=True)
+    client = registry.get("deepseek" if model == "DeepSeek" else "gemini")
 
     # Initialize form data
     if "form_data" not in st.session_state:
@@ -0,0 +1,207 @@
+"""
+Bulk converter from stored form_data documents to DataElements exports.
+
+Reads a JSONL stream of forms (a file or stdin), converts them in a process
+pool with form_generator.build_form_records and writes the exports as they
+are ready, in input order. Forms are sent to workers in chunks, and only a
+bounded window of chunks is in flight, so memory use does not depend on the
+size of the input. Workers only import the record builders (form_generator
+and form_records), so starting them is cheap. How far throughput grows
+with --workers depends on the free cores; the parent process, which reads
+the input and writes every export, caps it.
+
+Input lines are either a bare form or a wrapped one:
+    {"fields": [...]}
+    {"id": "signup-1", "form_id": "2e4e45f6...", "form_data": {"fields": [...]}}
+(form_id becomes the DraftSurveyFormId; a new one is generated if absent.)
+
+Every export starts with the 1-based input line it came from (and the input's
+id, if any), so outputs can be matched to inputs even when some lines fail.
+
+Output formats:
+    ndjson: One export per line: {"line": n, "id": ..., "DataElements": [...],
+            "DraftSurveyDataElementMembers": [...], "DataElementOptions": [...]};
+            lines that fail are written as {"line": n, "id": ..., "error": "..."}
+    json:   One JSON array of those exports, written incrementally; failures are
+            only counted and reported on stderr
+
+Usage:
+    python structure_converter.py forms.jsonl exports.ndjson --workers 8
+    cat forms.jsonl | python structure_converter.py - exports.json --format json --omit-none
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from form_generator import build_form_records
+from form_records import dumps_structure
+
+
+def convert_form(document: Dict[str, Any], omit_none: bool = False, line: Optional[int] = None) -> str:
+    """Convert one input document (bare or wrapped form) to its export's JSON text, tagged with line."""
+    form_data = document.get("form_data", document)
+    if not isinstance(form_data, dict) or not isinstance(form_data.get("fields"), list):
+        raise ValueError("Missing 'fields' list")
+    structure = build_form_records(form_data, document.get("form_id"))
+    export = {
+        "DataElements": structure.data_elements,
+        "DraftSurveyDataElementMembers": structure.draft_members,
+        "DataElementOptions": structure.data_element_options,
+    }
+    if "id" in document:
+        export = {"id": document["id"], **export}
+    if line is not None:
+        export = {"line": line, **export}
+    return dumps_structure(export, omit_none=omit_none)
+
+
+def convert_chunk(lines: List[Tuple[int, str]], omit_none: bool = False) -> List[Tuple[int, Optional[str], Optional[str]]]:
+    """
+    Worker entry point: convert raw input lines.
+
+    Returns:
+        List[Tuple[int, Optional[str], Optional[str]]]: (line number, export JSON, error) per line
+    """
+    results = []
+    for line_no, raw in lines:
+        document = None
+        try:
+            document = json.loads(raw)
+            if not isinstance(document, dict):
+                raise ValueError("Expected a JSON object")
+            results.append((line_no, convert_form(document, omit_none, line_no), None))
+        except Exception as e:
+            error = {"line": line_no, "error": f"{type(e).__name__}: {e}"}
+            if isinstance(document, dict) and "id" in document:
+                error = {"line": line_no, "id": document["id"], "error": error["error"]}
+            results.append((line_no, None, json.dumps(error)))
+    return results
+
+
+def read_chunks(stream: TextIO, chunk_size: int) -> Iterator[List[Tuple[int, str]]]:
+    """Group non-empty input lines into chunks of (1-based line number, text)."""
+    chunk = []
+    for line_no, raw in enumerate(stream, 1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        chunk.append((line_no, raw))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _ExportWriter:
+    """Writes exports as NDJSON lines or as the elements of one JSON array."""
+
+    def __init__(self, out: TextIO, output_format: str):
+        self.out = out
+        self.output_format = output_format
+        self.first = True
+        if output_format == "json":
+            out.write("[")
+
+    def write(self, export: Optional[str], error: Optional[str]) -> None:
+        if self.output_format == "ndjson":
+            self.out.write((export or error) + "\n")
+        elif export is not None:
+            self.out.write(("\n" if self.first else ",\n") + export)
+            self.first = False
+
+    def close(self) -> None:
+        if self.output_format == "json":
+            self.out.write("\n]\n")
+        self.out.flush()
+
+
+def run_conversion(input_stream: TextIO, output: TextIO, workers: Optional[int] = None,
+                   output_format: str = "ndjson", chunk_size: int = 64, omit_none: bool = False,
+                   progress_interval: float = 5.0) -> Dict[str, Any]:
+    """
+    Convert every form in input_stream and write the exports to output.
+
+    Returns:
+        Dict[str, Any]: Summary with counts, elapsed time and forms per second
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    converted = failed = 0
+    started = last_report = time.perf_counter()
+    writer = _ExportWriter(output, output_format)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        chunks = read_chunks(input_stream, chunk_size)
+        exhausted = False
+
+        while pending or not exhausted:
+            # Keep every worker busy without reading ahead of the pool
+            while not exhausted and len(pending) < max_in_flight:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                pending.append(pool.submit(convert_chunk, chunk, omit_none))
+            if not pending:
+                break
+
+            # Results are written in input order; chunks are small, so waiting on the oldest rarely stalls
+            for _, export, error in pending.popleft().result():
+                writer.write(export, error)
+                if export is None:
+                    failed += 1
+                else:
+                    converted += 1
+
+            now = time.perf_counter()
+            if progress_interval and now - last_report >= progress_interval:
+                print(f"{converted + failed} forms, {(converted + failed) / (now - started):.0f} forms/s",
+                      file=sys.stderr)
+                last_report = now
+
+    writer.close()
+    elapsed = time.perf_counter() - started
+    return {
+        "converted": converted,
+        "failed": failed,
+        "workers": workers,
+        "elapsed_s": round(elapsed, 2),
+        "forms_per_s": round((converted + failed) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert form_data documents to DataElements exports")
+    parser.add_argument("input", help="JSONL file with one form per line, or - for stdin")
+    parser.add_argument("output", help="Output file, or - for stdout")
+    parser.add_argument("--format", choices=["ndjson", "json"], default="ndjson", dest="output_format")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Forms per worker task")
+    parser.add_argument("--omit-none", action="store_true", help="Leave null-valued keys out of the exports")
+    args = parser.parse_args(argv)
+
+    input_stream = sys.stdin if args.input == "-" else open(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        summary = run_conversion(input_stream, output, args.workers, args.output_format,
+                                 max(1, args.chunk_size), args.omit_none)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Converted {summary['converted']} forms ({summary['failed']} failed) with {summary['workers']} workers "
+          f"in {summary['elapsed_s']} s: {summary['forms_per_s']} forms/s", file=sys.stderr)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
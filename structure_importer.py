@@ -0,0 +1,260 @@
+"""
+Streaming importer from DataElements exports back to editable form_data.
+
+The reverse of form_generator.generate_form_structure. Exports shaped like
+sample/Sample_Full_DataElements.json are read in chunks with
+JSONStreamParser, which decodes one DataElement, member or option at a time
+and keeps none of the text, so a multi-hundred-MB file never sits in memory
+as a whole. Only a compact record per field is kept until the end of the
+document. A form's fields are spread across the DataElements,
+DraftSurveyDataElementMembers and DataElementOptions arrays, so a document's
+forms are complete only once it has been read to the end. A JSON array of
+exports, as written by structure_converter.py --format json, is read one
+element at a time, and each element's forms are yielded once it closes.
+NDJSON files written by structure_converter.py hold one export per line and
+are yielded line by line.
+
+Each field becomes {"name", "label", "type", "required"} plus "options" for
+choice fields:
+    - type comes from DataElementTypeId via FIELD_TYPE_MAPPING; where two types
+      share an ID the first one listed wins ("8" -> "dropdown"), and unknown IDs
+      become "text"
+    - options come from the element's DataElementOptions (or the top-level list),
+      ordered by SortOrder
+    - fields are ordered by their member's SortOrder and grouped into forms by
+      DraftSurveyFormId; deleted elements, members and options are skipped
+
+Usage:
+    for form_id, form_data in iter_export_forms("export.json", with_ids=True):
+        ...
+    python structure_importer.py export.json forms.jsonl
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from form_generator import FIELD_TYPE_MAPPING
+from utils.json_stream import JSONStreamParser
+
+# DataElementTypeId -> field type; the first type listed for an ID wins
+TYPE_BY_DATA_ELEMENT_TYPE_ID: Dict[str, str] = {}
+for _field_type, _type_id in FIELD_TYPE_MAPPING.items():
+    TYPE_BY_DATA_ELEMENT_TYPE_ID.setdefault(_type_id, _field_type)
+
+EXPORT_ARRAYS = ("DataElements", "DraftSurveyDataElementMembers", "DataElementOptions")
+READ_SIZE = 1 << 20
+
+
+def _options(options: List[Dict[str, Any]]) -> List[Tuple[int, str, str]]:
+    """(sort order, label, value) for the options that are not deleted"""
+    return [
+        (option.get("SortOrder") or 0, option.get("Name") or "", str(option.get("Value")))
+        for option in options if not option.get("IsDeleted")
+    ]
+
+
+class ExportReducer:
+    """
+    Collects the parts of one export document and rebuilds its forms.
+
+    Elements are reduced to a small tuple as they arrive; only the member
+    links and options of elements still to come are kept besides those.
+    """
+
+    def __init__(self):
+        # Element Id -> (position, name, label, type, required, options or None)
+        self._elements: Dict[str, tuple] = {}
+        # DataElementId -> (DraftSurveyFormId, SortOrder)
+        self._members: Dict[str, Tuple[str, int]] = {}
+        # DataElementId -> options from the top-level DataElementOptions array
+        self._loose_options: Dict[str, List[Tuple[int, str, str]]] = {}
+
+    def add(self, array: str, item: Dict[str, Any]) -> None:
+        if array == "DataElements":
+            self.add_element(item)
+        elif array == "DraftSurveyDataElementMembers":
+            self.add_member(item)
+        elif array == "DataElementOptions":
+            self.add_option(item)
+
+    def add_element(self, element: Dict[str, Any]) -> None:
+        if element.get("IsDeleted"):
+            return
+        element_options = element.get("DataElementOptions")
+        name = element.get("Name") or element.get("DataElementColumnName")
+        self._elements[element.get("Id") or name] = (
+            len(self._elements),
+            name,
+            element.get("DisplayText") or name,
+            TYPE_BY_DATA_ELEMENT_TYPE_ID.get(str(element.get("DataElementTypeId")), "text"),
+            bool(element.get("IsRequired")),
+            _options(element_options) if element_options is not None else None,
+        )
+
+    def add_member(self, member: Dict[str, Any]) -> None:
+        if member.get("IsDeleted"):
+            return
+        self._members[member.get("DataElementId")] = (member.get("DraftSurveyFormId"), member.get("SortOrder") or 0)
+
+    def add_option(self, option: Dict[str, Any]) -> None:
+        element = self._elements.get(option.get("DataElementId"))
+        if element is not None and element[5] is not None:
+            # Already known from the element itself
+            return
+        self._loose_options.setdefault(option.get("DataElementId"), []).extend(_options([option]))
+
+    def forms(self) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+        """Yield (form ID, form_data) for every form, in order of first appearance."""
+        grouped: Dict[Optional[str], List[tuple]] = {}
+        for element_id, (position, name, label, field_type, required, options) in self._elements.items():
+            member = self._members.get(element_id)
+            if member is not None:
+                form_id, sort_order = member
+            else:
+                # No member: the generator's "<form id>:<name>" element IDs still name the form;
+                # such fields go after the ordered ones, in document order
+                form_id = element_id.split(":", 1)[0] if ":" in element_id else None
+                sort_order = float("inf")
+            if options is None:
+                options = self._loose_options.get(element_id)
+            grouped.setdefault(form_id, []).append((sort_order, position, name, label, field_type, required, options))
+
+        for form_id, fields in grouped.items():
+            fields.sort(key=lambda field: (field[0], field[1]))
+            form_fields = []
+            for _, _, name, label, field_type, required, options in fields:
+                field = {"name": name, "label": label, "type": field_type, "required": required}
+                if options:
+                    field["options"] = [
+                        {"label": label, "value": value} for _, label, value in sorted(options, key=lambda o: o[0])
+                    ]
+                form_fields.append(field)
+            yield form_id, {"fields": form_fields}
+
+
+def _read_export(f, text: str) -> Tuple[ExportReducer, str]:
+    """Read one export object that starts at text; return its reducer and the text after it."""
+    parser = JSONStreamParser(item_paths=[(name,) for name in EXPORT_ARRAYS], keep_text=False)
+    reducer = ExportReducer()
+    while True:
+        parser.feed(text)
+        for (array,), item in parser.pop_path_items():
+            reducer.add(array, item)
+        if parser.done:
+            return reducer, parser.remainder
+        text = f.read(READ_SIZE)
+        if not text:
+            raise ValueError("Export ended before its closing brace")
+
+
+def _next_token(f, text: str) -> Tuple[str, str]:
+    """(first non-whitespace character, text from it on), reading more as needed; "" at the end of f."""
+    text = text.lstrip()
+    while not text:
+        text = f.read(READ_SIZE)
+        if not text:
+            return "", ""
+        text = text.lstrip()
+    return text[0], text
+
+
+def _iter_json_document(f) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    token, text = _next_token(f, "")
+    if token == "{":
+        reducer, _ = _read_export(f, text)
+        yield from reducer.forms()
+        return
+    if token != "[":
+        raise ValueError("Expected an export object or a JSON array of exports")
+
+    # One export per array element
+    token, text = _next_token(f, text[1:])
+    count = 0
+    while token != "]":
+        if count:
+            if token != ",":
+                raise ValueError(f"Expected ',' or ']' after export {count} of the array")
+            token, text = _next_token(f, text[1:])
+        if token != "{":
+            raise ValueError(f"Element {count} of the array is not an export object" if token
+                             else "Export array ended before its closing bracket")
+        reducer, text = _read_export(f, text)
+        yield from reducer.forms()
+        count += 1
+        token, text = _next_token(f, text)
+        if not token:
+            raise ValueError("Export array ended before its closing bracket")
+
+
+def _iter_ndjson(f) -> Iterator[Tuple[Optional[str], Dict[str, Any]]]:
+    for line_no, raw in enumerate(f, 1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            export = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_no}: invalid JSON: {e}") from None
+        if "error" in export and "DataElements" not in export:
+            # A failure record written by structure_converter.py
+            continue
+        reducer = ExportReducer()
+        for array in EXPORT_ARRAYS:
+            for item in export.get(array) or []:
+                reducer.add(array, item)
+        yield from reducer.forms()
+
+
+def iter_export_forms(path: str, with_ids: bool = False, input_format: Optional[str] = None) -> Iterator[Any]:
+    """
+    Yield the forms of an export file one at a time.
+
+    Args:
+        path (str): Export file, or - for stdin
+        with_ids (bool): Yield (DraftSurveyFormId, form_data) pairs instead of form_data
+        input_format (Optional[str]): "json" (one export document) or "ndjson" (one export
+            per line); guessed from the extension (.ndjson/.jsonl) when not given
+
+    Raises:
+        ValueError: If the file is truncated, is neither an export object nor an array of
+            them, or an NDJSON line is not valid JSON
+    """
+    if input_format is None:
+        input_format = "ndjson" if path.endswith((".ndjson", ".jsonl")) else "json"
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        forms = _iter_ndjson(f) if input_format == "ndjson" else _iter_json_document(f)
+        for form_id, form_data in forms:
+            yield (form_id, form_data) if with_ids else form_data
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert DataElements exports back to form_data")
+    parser.add_argument("input", help="Export file (JSON document, JSON array of exports or NDJSON), or - for stdin")
+    parser.add_argument("output", help="JSONL file with one {\"form_id\", \"form_data\"} per line, or - for stdout")
+    parser.add_argument("--format", choices=["json", "ndjson"], default=None, dest="input_format",
+                        help="Input format (default: guessed from the extension)")
+    args = parser.parse_args(argv)
+
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    count = 0
+    try:
+        for form_id, form_data in iter_export_forms(args.input, with_ids=True, input_format=args.input_format):
+            output.write(json.dumps({"form_id": form_id, "form_data": form_data}) + "\n")
+            count += 1
+    except ValueError as e:
+        print(f"Error after {count} forms: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    print(f"Imported {count} forms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -132,3 +132,60 @@ instruction_v1 = """You are a form generation assistant. When I describe a form
     Use snake_case for field names
     Keep all existing fields when adding new ones
 """
+
+# Keywords that identify a field type in plain-English edit commands, checked in order.
+# Types are the ones the LLM prompts and utils.json_validator accept.
+FIELD_TYPE_KEYWORDS = [
+    ("email", ["email", "e-mail"]),
+    ("radio", ["radio", "multiple choice", "single choice"]),
+    ("dropdown", ["dropdown", "drop-down", "drop down", "select"]),
+    ("checkbox", ["checkbox", "check box", "checkboxes"]),
+    ("date", ["date", "birthday"]),
+    ("number", ["number", "numeric", "integer"]),
+    ("image", ["image", "photo", "picture"]),
+    ("file", ["file", "files", "upload", "document", "attachment"]),
+    ("text", ["text", "textarea", "string", "phone", "url"]),
+]
+
+# Keywords for the field types spacy_form_processor emits, in the priority order of its original rules
+SPACY_FIELD_TYPE_KEYWORDS = [
+    ("email", ["email", "e-mail"]),
+    ("radio", ["radio", "multiple choice", "single choice"]),
+    ("checkbox", ["checkbox", "checkboxes", "check box"]),
+    ("textarea", ["textarea", "text area", "paragraph"]),
+    ("date", ["date", "birthday"]),
+    ("person", ["person", "people", "user"]),
+    ("files", ["files", "file", "media", "upload", "attachment"]),
+    ("number", ["number", "numeric", "integer"]),
+    ("url", ["url", "website", "link"]),
+    ("phone", ["phone", "telephone", "mobile"]),
+    ("text", ["text", "string"]),
+]
+
+# Instruction for patch edit mode: the model returns JSON Patch operations instead of the whole form
+patch_instruction = """You are a form generation assistant. The user will show you the current form structure in JSON 
+format, with the index of every field, and ask for a change. Do not return the whole form. Return only the JSON Patch 
+(RFC 6902) operations needed to apply the requested change. Do not provide any explanation or additional text.
+
+**Follow these rules:**
+1. Use only "add", "remove" and "replace" operations.
+2. Paths point into the form: "/fields/<index>" for a whole field, "/fields/<index>/<property>" for one property of 
+a field, and "/fields/-" to append a new field at the end.
+3. Operations are applied in order. When removing several fields, remove the highest index first.
+4. Only change what the user explicitly requests; never touch other fields.
+
+IMPORTANT: Always respond with only valid JSON in this exact format, no other text:
+```json
+{
+    "message": "Form updated: [brief description of changes, e.g., 'Made email required', 'Added phone field']",
+    "patch": [
+        {"op": "replace", "path": "/fields/1/required", "value": true},
+        {"op": "add", "path": "/fields/-", "value": {"name": "phone", "label": "Phone", "type": "text", "required": false}},
+        {"op": "remove", "path": "/fields/0"}
+    ]
+}
+
+Available field types: text, number, email, radio, dropdown, checkbox, date, file, image
+For radio/dropdown, include "options" array with "value" and "label"
+Use snake_case for field names
+"""
@@ -0,0 +1,209 @@
+"""
+Ordered, name-indexed field collection for the form state.
+
+Forms used to be a plain list of field dicts, so every update, delete or
+lookup by name scanned the list, and deletes rebuilt it. FieldIndex keeps
+the fields in a dict keyed by name plus a doubly linked list of names for
+their order. Lookup, insert, replace, delete and moving a field before or
+after another one are all O(1); only producing the full list is O(n), and
+callers cache that between edits. Field names are unique, and duplicates
+are rejected when a field is inserted, renamed or loaded.
+
+The approximate JSON size of the fields is kept up to date on every edit,
+so the form store's byte accounting does not have to serialize the form.
+"""
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+class DuplicateFieldError(ValueError):
+    """A field with the same name already exists in the form."""
+
+
+class FieldIndex:
+    """
+    Fields keyed by name, in form order.
+
+    Usage:
+        index = FieldIndex.from_fields(form_data["fields"])
+        index.get("email")
+        index.insert({"name": "phone", ...}, after="email")
+        index.move("phone", before="name")
+        index.remove("email")
+        index.to_list()
+    """
+
+    def __init__(self):
+        self._fields: Dict[str, Dict[str, Any]] = {}
+        self._prev: Dict[str, Optional[str]] = {}
+        self._next: Dict[str, Optional[str]] = {}
+        self._head: Optional[str] = None
+        self._tail: Optional[str] = None
+        self._sizes: Dict[str, int] = {}
+        self.byte_size = 0
+
+    @classmethod
+    def from_fields(cls, fields: Iterable[Dict[str, Any]]) -> "FieldIndex":
+        """
+        Build an index from a list of fields, keeping their order.
+
+        Raises:
+            DuplicateFieldError: If two fields share a name
+        """
+        index = cls()
+        for field in fields:
+            index.insert(field)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._fields
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        name = self._head
+        while name is not None:
+            yield self._fields[name]
+            name = self._next[name]
+
+    def names(self) -> List[str]:
+        """Field names in form order."""
+        return [field["name"] for field in self]
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """The fields in form order, as the `fields` list of form_data."""
+        return list(self)
+
+    def get(self, name: str) -> Dict[str, Any]:
+        """
+        Return the field called name.
+
+        Raises:
+            KeyError: If there is no such field
+        """
+        return self._fields[name]
+
+    def previous(self, name: str) -> Optional[str]:
+        """Name of the field before name, or None if it is first."""
+        return self._prev[name]
+
+    def insert(self, field: Dict[str, Any], before: Optional[str] = None, after: Optional[str] = None) -> None:
+        """
+        Add a field before or after another one, or at the end if neither is given.
+
+        Raises:
+            DuplicateFieldError: If a field with the same name exists
+            KeyError: If before or after does not name a field
+        """
+        name = field["name"]
+        if name in self._fields:
+            raise DuplicateFieldError(f"Field '{name}' already exists")
+        anchor_prev, anchor_next = self._anchor(before, after)
+        self._fields[name] = field
+        self._link(name, anchor_prev, anchor_next)
+        self._account(name, field)
+
+    def replace(self, name: str, field: Dict[str, Any]) -> None:
+        """
+        Replace the field called name in place; the new field may have a different name.
+
+        Raises:
+            KeyError: If there is no field called name
+            DuplicateFieldError: If the field is renamed to a name that is already used
+        """
+        if name not in self._fields:
+            raise KeyError(name)
+        new_name = field["name"]
+        if new_name != name:
+            if new_name in self._fields:
+                raise DuplicateFieldError(f"Field '{new_name}' already exists")
+            prev, next_ = self._prev[name], self._next[name]
+            del self._fields[name]
+            self._unlink(name)
+            self.byte_size -= self._sizes.pop(name)
+            self._link(new_name, prev, next_)
+        self._fields[new_name] = field
+        self._account(new_name, field)
+
+    def remove(self, name: str) -> Dict[str, Any]:
+        """
+        Delete the field called name and return it.
+
+        Raises:
+            KeyError: If there is no such field
+        """
+        field = self._fields.pop(name)
+        self._unlink(name)
+        self.byte_size -= self._sizes.pop(name)
+        return field
+
+    def move(self, name: str, before: Optional[str] = None, after: Optional[str] = None) -> None:
+        """
+        Move a field before or after another one, or to the end if neither is given.
+
+        Raises:
+            KeyError: If name, before or after does not name a field
+            ValueError: If the field is asked to move relative to itself
+        """
+        if name not in self._fields:
+            raise KeyError(name)
+        if name in (before, after):
+            raise ValueError(f"Cannot move field '{name}' relative to itself")
+        # Validate the anchor before touching any links; it is resolved again once the field is out
+        self._anchor(before, after)
+        self._unlink(name)
+        try:
+            anchor_prev, anchor_next = self._anchor(before, after)
+        except Exception:
+            # Put the field back where it was; _unlink kept its neighbours' names
+            self._link(name, self._prev[name], self._next[name])
+            raise
+        self._link(name, anchor_prev, anchor_next)
+
+    def _anchor(self, before: Optional[str], after: Optional[str]):
+        """The (prev, next) pair a new link goes between."""
+        if before is not None and after is not None:
+            raise ValueError("Give either before or after, not both")
+        if before is not None:
+            if before not in self._fields:
+                raise KeyError(before)
+            return self._prev[before], before
+        if after is not None:
+            if after not in self._fields:
+                raise KeyError(after)
+            return after, self._next[after]
+        return self._tail, None
+
+    def _link(self, name: str, prev: Optional[str], next_: Optional[str]) -> None:
+        self._prev[name] = prev
+        self._next[name] = next_
+        if prev is None:
+            self._head = name
+        else:
+            self._next[prev] = name
+        if next_ is None:
+            self._tail = name
+        else:
+            self._prev[next_] = name
+
+    def _unlink(self, name: str) -> None:
+        """Detach name from its neighbours, leaving its own prev/next entries for _link or cleanup."""
+        prev, next_ = self._prev[name], self._next[name]
+        if prev is None:
+            self._head = next_
+        else:
+            self._next[prev] = next_
+        if next_ is None:
+            self._tail = prev
+        else:
+            self._prev[next_] = prev
+        if name not in self._fields:
+            del self._prev[name]
+            del self._next[name]
+
+    def _account(self, name: str, field: Dict[str, Any]) -> None:
+        # The field's JSON plus the ", " separating it from the next one
+        size = len(json.dumps(field)) + 2
+        self.byte_size += size - self._sizes.get(name, 0)
+        self._sizes[name] = size
@@ -0,0 +1,120 @@
+"""
+Bounded log of field edits, replayed into JSON Patch deltas.
+
+Every edit of a form's fields is recorded by name together with the name
+of the field before it, which costs O(1) per edit. When a client asks for
+the changes since a version it already holds, the log is first undone from
+the current field order back to that version, then replayed forward to
+produce RFC 6902 operations on `/fields/<index>`. Only "add", "remove" and
+"replace" are emitted (a move is a remove followed by an add), so
+utils.json_patch.apply_patch can apply the result.
+
+The log keeps the most recent max_entries edits. Older versions, and
+versions before a whole-form replacement, cannot be reached; callers then
+send the full form instead.
+"""
+import copy
+from collections import deque
+from typing import Any, Dict, List, NamedTuple, Optional
+
+
+class FieldChange(NamedTuple):
+    """
+    One edit. prev is the neighbour before the field after the edit; old_prev
+    (moves and removes) is the neighbour before it beforehand.
+    """
+    version: int
+    op: str  # "add", "replace", "remove" or "move"
+    name: str
+    field: Optional[Dict[str, Any]] = None
+    prev: Optional[str] = None
+    old_prev: Optional[str] = None
+    old_name: Optional[str] = None
+
+
+def _insert_after(names: List[str], name: str, prev: Optional[str]) -> int:
+    index = names.index(prev) + 1 if prev is not None else 0
+    names.insert(index, name)
+    return index
+
+
+class FieldChangelog:
+    """
+    Field edits of one form since its last whole-form replacement.
+
+    Args:
+        version (int): The form's version when the log starts
+        max_entries (int): Edits kept; older versions fall out of reach
+    """
+
+    def __init__(self, version: int, max_entries: int = 256):
+        self.base_version = version
+        self.max_entries = max_entries
+        self._entries: deque = deque()
+
+    def reset(self, version: int) -> None:
+        """Forget every edit; used when the whole form is replaced."""
+        self.base_version = version
+        self._entries.clear()
+
+    def record(self, change: FieldChange) -> None:
+        """Log an edit; the field is copied so later edits of the live dict can't alter past deltas."""
+        if change.field is not None:
+            change = change._replace(field=copy.deepcopy(change.field))
+        self._entries.append(change)
+        if len(self._entries) > self.max_entries:
+            self.base_version = self._entries.popleft().version
+
+    def can_diff(self, version: int) -> bool:
+        """Whether version is one this form had and is still covered by the log."""
+        return version == self.base_version or any(entry.version == version for entry in self._entries)
+
+    def patch_since(self, version: int, current_names: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        JSON Patch operations that turn the form at version into the current one.
+
+        Args:
+            version (int): A version the client holds
+            current_names (List[str]): Field names in their current order
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: The operations, or None if version is not covered
+        """
+        if not self.can_diff(version):
+            return None
+        pending = [entry for entry in self._entries if entry.version > version]
+
+        # Undo the pending edits to get the field order at version
+        names = list(current_names)
+        for entry in reversed(pending):
+            if entry.op == "add":
+                names.remove(entry.name)
+            elif entry.op == "replace":
+                names[names.index(entry.name)] = entry.old_name
+            elif entry.op == "remove":
+                _insert_after(names, entry.name, entry.old_prev)
+            elif entry.op == "move":
+                names.remove(entry.name)
+                _insert_after(names, entry.name, entry.old_prev)
+
+        # Replay them with positions
+        operations = []
+        for entry in pending:
+            if entry.op == "add":
+                index = _insert_after(names, entry.name, entry.prev)
+                operations.append({"op": "add", "path": f"/fields/{index}", "value": entry.field})
+            elif entry.op == "replace":
+                index = names.index(entry.old_name)
+                names[index] = entry.name
+                operations.append({"op": "replace", "path": f"/fields/{index}", "value": entry.field})
+            elif entry.op == "remove":
+                index = names.index(entry.name)
+                del names[index]
+                operations.append({"op": "remove", "path": f"/fields/{index}"})
+            elif entry.op == "move":
+                index = names.index(entry.name)
+                del names[index]
+                operations.append({"op": "remove", "path": f"/fields/{index}"})
+                index = _insert_after(names, entry.name, entry.prev)
+                operations.append({"op": "add", "path": f"/fields/{index}", "value": entry.field})
+        return operations
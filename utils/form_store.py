@@ -0,0 +1,146 @@
+"""
+Session-scoped storage for form state.
+
+Forms are stored under a form ID so concurrent users no longer share one
+global form. The in-memory store is split into independently locked shards,
+each bounded by entry count and approximate byte size, and evicts the least
+recently used entry (or expired entries) when a bound is exceeded.
+"""
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class FormStore(ABC):
+    """Interface for form state storage keyed by form ID."""
+
+    @abstractmethod
+    def get(self, form_id: str) -> Optional[Any]:
+        """Return the stored value for form_id, or None if absent or expired."""
+
+    @abstractmethod
+    def put(self, form_id: str, value: Any, size: Optional[int] = None) -> None:
+        """Store value under form_id, evicting older entries if needed."""
+
+    @abstractmethod
+    def delete(self, form_id: str) -> bool:
+        """Remove form_id from the store. Returns True if it was present."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and current usage."""
+
+
+class _Shard:
+    """One LRU partition of the in-memory store, guarded by its own lock."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()  # form_id -> (value, size, expires_at)
+        self.bytes = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, form_id: str) -> None:
+        _, size, _ = self.entries.pop(form_id)
+        self.bytes -= size
+
+    def _evict(self) -> None:
+        while self.entries and (len(self.entries) > self.max_entries or self.bytes > self.max_bytes):
+            form_id = next(iter(self.entries))
+            self._remove(form_id)
+            self.evictions += 1
+
+
+class InMemoryFormStore(FormStore):
+    """
+    Sharded in-memory form store with LRU and TTL eviction.
+
+    Args:
+        num_shards (int): Number of independently locked partitions
+        max_entries (int): Maximum number of forms kept across all shards
+        max_bytes (int): Approximate memory budget across all shards
+        ttl_seconds (Optional[float]): Idle time after which a form expires, None to disable
+        sizeof (Callable[[Any], int]): Fallback size estimate when put() is called without size
+        sliding_expiry (bool): Restart the TTL on every read; when False entries expire
+            ttl_seconds after they were written
+    """
+
+    def __init__(self, num_shards: int = 16, max_entries: int = 10000,
+                 max_bytes: int = 64 * 1024 * 1024, ttl_seconds: Optional[float] = 3600,
+                 sizeof: Callable[[Any], int] = lambda value: 1, sliding_expiry: bool = True):
+        self.num_shards = num_shards
+        self.ttl_seconds = ttl_seconds
+        self.sizeof = sizeof
+        self.sliding_expiry = sliding_expiry
+        self._shards = [
+            _Shard(max(1, max_entries // num_shards), max(1, max_bytes // num_shards))
+            for _ in range(num_shards)
+        ]
+
+    def _shard(self, form_id: str) -> _Shard:
+        return self._shards[zlib.crc32(form_id.encode()) % self.num_shards]
+
+    def _expires_at(self) -> Optional[float]:
+        return time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+
+    def get(self, form_id: str) -> Optional[Any]:
+        shard = self._shard(form_id)
+        with shard.lock:
+            entry = shard.entries.get(form_id)
+            if entry is None:
+                shard.misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                shard._remove(form_id)
+                shard.expirations += 1
+                shard.misses += 1
+                return None
+
+            # Sliding expiry: active sessions stay alive
+            if self.sliding_expiry:
+                shard.entries[form_id] = (value, size, self._expires_at())
+            shard.entries.move_to_end(form_id)
+            shard.hits += 1
+            return value
+
+    def put(self, form_id: str, value: Any, size: Optional[int] = None) -> None:
+        if size is None:
+            size = self.sizeof(value)
+
+        shard = self._shard(form_id)
+        with shard.lock:
+            if form_id in shard.entries:
+                shard._remove(form_id)
+            shard.entries[form_id] = (value, size, self._expires_at())
+            shard.bytes += size
+            shard._evict()
+
+    def delete(self, form_id: str) -> bool:
+        shard = self._shard(form_id)
+        with shard.lock:
+            if form_id not in shard.entries:
+                return False
+            shard._remove(form_id)
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        totals = {"entries": 0, "bytes": 0, "hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        for shard in self._shards:
+            with shard.lock:
+                totals["entries"] += len(shard.entries)
+                totals["bytes"] += shard.bytes
+                totals["hits"] += shard.hits
+                totals["misses"] += shard.misses
+                totals["evictions"] += shard.evictions
+                totals["expirations"] += shard.expirations
+        return totals
@@ -0,0 +1,128 @@
+"""
+Minimal RFC 6902 JSON Patch support for form edits.
+
+In patch edit mode the model returns only the operations needed to change
+the form instead of the whole form. Only "add", "remove" and "replace" are
+supported, which is all the prompt asks for.
+"""
+import copy
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.json_validator import validate_form_structure
+
+SUPPORTED_OPS = ("add", "remove", "replace")
+
+
+class JsonPatchError(ValueError):
+    """Raised when a patch is malformed or cannot be applied to the document."""
+
+
+def _parse_pointer(path: str) -> List[str]:
+    if not isinstance(path, str) or (path and not path.startswith("/")):
+        raise JsonPatchError(f"Invalid JSON pointer: {path!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in path.split("/")[1:]]
+
+
+def _resolve_parent(document: Any, tokens: List[str]) -> Tuple[Any, str]:
+    """Walk to the container holding the last token of the pointer."""
+    if not tokens:
+        raise JsonPatchError("Operations on the document root are not supported")
+
+    target = document
+    for token in tokens[:-1]:
+        if isinstance(target, list):
+            target = target[_index(target, token, allow_end=False)]
+        elif isinstance(target, dict) and token in target:
+            target = target[token]
+        else:
+            raise JsonPatchError(f"Path segment not found: {token!r}")
+    return target, tokens[-1]
+
+
+def _index(array: list, token: str, allow_end: bool) -> int:
+    if allow_end and token == "-":
+        return len(array)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(array) or (index == len(array) and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {index}")
+    return index
+
+
+def apply_patch(document: Any, operations: List[Dict[str, Any]]) -> Any:
+    """
+    Apply JSON Patch operations to a copy of document.
+
+    Args:
+        document (Any): The document to patch; it is not modified
+        operations (List[Dict[str, Any]]): RFC 6902 operations (add/remove/replace)
+
+    Returns:
+        Any: The patched copy
+
+    Raises:
+        JsonPatchError: If an operation is malformed or its path does not exist
+    """
+    if not isinstance(operations, list):
+        raise JsonPatchError("Patch must be a list of operations")
+
+    result = copy.deepcopy(document)
+    for operation in operations:
+        if not isinstance(operation, dict) or operation.get("op") not in SUPPORTED_OPS:
+            raise JsonPatchError(f"Unsupported operation: {operation!r}")
+        op = operation["op"]
+        if op != "remove" and "value" not in operation:
+            raise JsonPatchError(f"Operation '{op}' requires a value")
+
+        parent, key = _resolve_parent(result, _parse_pointer(operation.get("path")))
+        value = copy.deepcopy(operation.get("value"))
+
+        if isinstance(parent, list):
+            index = _index(parent, key, allow_end=op == "add")
+            if op == "add":
+                parent.insert(index, value)
+            elif op == "remove":
+                del parent[index]
+            else:
+                parent[index] = value
+        elif isinstance(parent, dict):
+            if op != "add" and key not in parent:
+                raise JsonPatchError(f"Path not found: {operation['path']!r}")
+            if op == "remove":
+                del parent[key]
+            else:
+                parent[key] = value
+        else:
+            raise JsonPatchError(f"Cannot apply '{op}' below a scalar at {operation['path']!r}")
+
+    return result
+
+
+def resolve_patch_response(response: Any, current_form: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Turn a patch-mode model response into a regular full-form response.
+
+    Args:
+        response (Any): Decoded model output, expected as {"message": str, "patch": [...]}
+        current_form (Dict[str, Any]): The form the patch was written against
+
+    Returns:
+        Optional[Dict[str, Any]]: {"message": str, "form_data": Dict} if the patch applied
+        cleanly and the result is a valid form, otherwise None
+    """
+    if not isinstance(response, dict) or not isinstance(response.get("patch"), list):
+        return None
+
+    try:
+        form_data = apply_patch(current_form, response["patch"])
+    except JsonPatchError as e:
+        print(f"Debug: Patch could not be applied: {e}")
+        return None
+
+    is_valid, detail = validate_form_structure({"form_data": form_data})
+    if not is_valid:
+        print(f"Debug: Patched form is invalid: {detail}")
+        return None
+
+    return {"message": response.get("message", "Form updated"), "form_data": form_data}
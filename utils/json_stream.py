@@ -0,0 +1,321 @@
+"""
+Incremental JSON extraction for streamed LLM responses.
+
+Models stream their answer in small chunks and may wrap the JSON in prose or
+markdown fences. JSONStreamParser skips everything before the first '{',
+tracks nesting depth while honouring string literals and escapes (so braces
+inside values don't confuse it) and parses the object exactly once when the
+outermost brace closes. Each chunk is scanned once, so the total cost is
+linear in the length of the response.
+
+Given an item_path such as ("form_data", "fields"), the parser also tracks
+object keys and decodes each element of that array as soon as it closes, so
+callers can act on fields before the whole response has arrived. Several
+arrays can be tracked at once with item_paths, and keep_text=False stops the
+parser from keeping the text it has seen, so large documents can be read
+item by item in constant memory.
+"""
+import json
+import re
+from typing import Any, List, Optional, Sequence
+
+# Characters that matter outside / inside a JSON string literal
+_STRUCTURAL = re.compile(r'[{}\[\]"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+_DECODER = json.JSONDecoder()
+# Chunks up to this length are scanned character by character
+_SHORT_CHUNK = 16
+
+
+class _DiscardedParts(list):
+    """Stands in for the captured text when keep_text is False."""
+
+    def append(self, _part: str) -> None:
+        pass
+
+
+class JSONStreamParser:
+    """
+    Consume text chunks and detect when the first top-level JSON object ends.
+
+    Usage:
+        parser = JSONStreamParser(item_path=("form_data", "fields"))
+        for chunk in chunks:
+            done = parser.feed(chunk)
+            for field in parser.pop_items():
+                ...
+            if done:
+                break
+        obj = parser.result()
+
+    Args:
+        item_path (Optional[Sequence[str]]): Keys leading from the root object to an
+            array whose object elements should be decoded as they complete
+        item_paths (Optional[Sequence[Sequence[str]]]): Several such paths; use
+            pop_path_items() to tell their items apart
+        keep_text (bool): Keep the captured text for text/result(); turn off when
+            only the items are needed
+
+    Once done, `remainder` holds the rest of the last chunk after the object,
+    so a sequence of objects can be read by feeding it to the next parser.
+    """
+
+    def __init__(self, item_path: Optional[Sequence[str]] = None,
+                 item_paths: Optional[Sequence[Sequence[str]]] = None, keep_text: bool = True):
+        self._parts: List[str] = [] if keep_text else _DiscardedParts()
+        self.keep_text = keep_text
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.done = False
+        self.remainder = ""
+
+        # Key/item tracking, only used when item paths are given
+        paths = list(item_paths or []) + ([item_path] if item_path is not None else [])
+        self._item_paths = frozenset(tuple(path) for path in paths) if paths else None
+        self._current_path: Optional[tuple] = None
+        self._stack: List[tuple] = []  # (bracket, key in parent object)
+        self._last_string: Optional[str] = None
+        self._key_parts: Optional[List[str]] = None
+        self._item_parts: Optional[List[str]] = None
+        self._item_depth = 0
+        self._items: List[tuple] = []  # (item path, item)
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Consume the next chunk of text.
+
+        Args:
+            chunk (str): The next piece of the streamed response
+
+        Returns:
+            bool: True once the top-level object is complete; later chunks are ignored
+        """
+        if self.done or not chunk:
+            return self.done
+
+        pos = 0
+        if not self._started:
+            pos = chunk.find('{')
+            if pos < 0:
+                return False
+            self._started = True
+
+        if self._item_paths is not None:
+            return self._feed_tracked(chunk, pos)
+
+        # Fast paths for the common token-sized chunk: no string boundary can
+        # occur, so depth is updated with C-level counts instead of a scan
+        if not self._escape and '"' not in chunk and '\\' not in chunk:
+            if self._in_string:
+                self._parts.append(chunk[pos:])
+                return False
+            closing = chunk.count('}', pos) + chunk.count(']', pos)
+            if closing < self._depth:
+                self._depth += chunk.count('{', pos) + chunk.count('[', pos) - closing
+                self._parts.append(chunk[pos:])
+                return False
+
+        if len(chunk) - pos <= _SHORT_CHUNK:
+            return self._feed_short(chunk, pos)
+
+        start = pos
+        end = len(chunk)
+        while pos < end:
+            if self._escape:
+                # Character after a backslash, possibly carried over from the previous chunk
+                self._escape = False
+                pos += 1
+                continue
+
+            if self._in_string:
+                match = _STRING_SPECIAL.search(chunk, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                if match.group() == '\\':
+                    self._escape = True
+                else:
+                    self._in_string = False
+                continue
+
+            match = _STRUCTURAL.search(chunk, pos)
+            if match is None:
+                break
+            char = match.group()
+            pos = match.end()
+            if char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._parts.append(chunk[start:pos])
+                    self.remainder = chunk[pos:]
+                    self.done = True
+                    return True
+
+        self._parts.append(chunk[start:])
+        return False
+
+    def _feed_short(self, chunk: str, start: int) -> bool:
+        """Character loop for token-sized chunks, cheaper than repeated regex searches."""
+        depth = self._depth
+        in_string = self._in_string
+        escape = self._escape
+        pos = start
+        for char in chunk[start:]:
+            pos += 1
+            if escape:
+                escape = False
+            elif in_string:
+                if char == '\\':
+                    escape = True
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '{' or char == '[':
+                depth += 1
+            elif char == '}' or char == ']':
+                depth -= 1
+                if depth == 0:
+                    self._depth = 0
+                    self._parts.append(chunk[start:pos])
+                    self.remainder = chunk[pos:]
+                    self.done = True
+                    return True
+
+        self._depth = depth
+        self._in_string = in_string
+        self._escape = escape
+        self._parts.append(chunk[start:])
+        return False
+
+    def _feed_tracked(self, chunk: str, start: int) -> bool:
+        """Scan a chunk while tracking container keys and capturing items at item_path."""
+        stack = self._stack
+        pos = start
+        end = len(chunk)
+        key_from = start if self._key_parts is not None else -1
+        item_from = start if self._item_parts is not None else -1
+
+        while pos < end:
+            if self._escape:
+                self._escape = False
+                pos += 1
+                continue
+
+            if self._in_string:
+                match = _STRING_SPECIAL.search(chunk, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                if match.group() == '\\':
+                    self._escape = True
+                else:
+                    self._in_string = False
+                    if key_from >= 0:
+                        self._key_parts.append(chunk[key_from:pos - 1])
+                        self._last_string = "".join(self._key_parts)
+                        self._key_parts = None
+                        key_from = -1
+                continue
+
+            match = _STRUCTURAL.search(chunk, pos)
+            if match is None:
+                break
+            char = match.group()
+            pos = match.end()
+            if char == '"':
+                self._in_string = True
+                # Strings directly inside an object may be keys
+                if stack and stack[-1][0] == '{':
+                    self._key_parts = []
+                    key_from = pos
+            elif char in '{[':
+                in_object = bool(stack) and stack[-1][0] == '{'
+                stack.append((char, self._last_string if in_object else None))
+                self._last_string = None
+                if char == '{' and self._item_parts is None and self._at_item_path():
+                    path = tuple(key for _, key in stack[1:-1])
+                    try:
+                        # Items that close within this chunk are decoded at C speed and skipped
+                        item, item_end = _DECODER.raw_decode(chunk, pos - 1)
+                    except json.JSONDecodeError:
+                        # The item continues in a later chunk; capture it piece by piece
+                        self._current_path = path
+                        self._item_parts = []
+                        self._item_depth = len(stack)
+                        item_from = pos - 1
+                    else:
+                        stack.pop()
+                        self._items.append((path, item))
+                        pos = item_end
+            else:
+                stack.pop()
+                if self._item_parts is not None and len(stack) < self._item_depth:
+                    self._item_parts.append(chunk[item_from:pos])
+                    self._items.append((self._current_path, json.loads("".join(self._item_parts))))
+                    self._item_parts = None
+                    item_from = -1
+                if not stack:
+                    self._depth = 0
+                    self._parts.append(chunk[start:pos])
+                    self.remainder = chunk[pos:]
+                    self.done = True
+                    return True
+
+        self._depth = len(stack)
+        self._parts.append(chunk[start:])
+        if key_from >= 0:
+            self._key_parts.append(chunk[key_from:])
+        if item_from >= 0:
+            self._item_parts.append(chunk[item_from:])
+        return False
+
+    def _at_item_path(self) -> bool:
+        """Whether the object just opened is an element of an array at one of the item paths."""
+        stack = self._stack
+        if len(stack) < 3 or stack[-2][0] != '[':
+            return False
+        return tuple(key for _, key in stack[1:-1]) in self._item_paths
+
+    def pop_items(self) -> List[Any]:
+        """Return the items at the item paths completed since the last call."""
+        items, self._items = self._items, []
+        return [item for _, item in items]
+
+    def pop_path_items(self) -> List[tuple]:
+        """Like pop_items(), but as (item path, item) pairs."""
+        items, self._items = self._items, []
+        return items
+
+    @property
+    def started(self) -> bool:
+        """Whether the opening '{' has been seen; O(1), unlike testing text."""
+        return self._started
+
+    @property
+    def text(self) -> str:
+        """The JSON text captured so far; joins every part, so avoid it per chunk."""
+        return "".join(self._parts)
+
+    def result(self) -> Optional[Any]:
+        """
+        Parse the captured object.
+
+        Returns:
+            Optional[Any]: The decoded object, or None if no complete object was seen
+
+        Raises:
+            json.JSONDecodeError: If the captured text is not valid JSON
+            ValueError: If the parser was created with keep_text=False
+        """
+        if not self.keep_text:
+            raise ValueError("The parser was created with keep_text=False")
+        if not self.done:
+            return None
+        return json.loads(self.text)
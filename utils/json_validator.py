@@ -1,25 +1,217 @@
-FIELD_TYPES = ["text", "number", "radio", "dropdown", "date", "file", "section"]
+"""
+Form validation against a declarative schema.
 
-def validate_form_structure(form_data: dict) -> tuple[bool, str]:
-    if "fields" not in form_data["form_data"]:
-        return False, "Missing 'fields' in form_data"
+FORM_SCHEMA describes a form, its fields, their options and the extra keys
+some field types need. FormValidator compiles it once into per-key checks,
+then walks a form, including fields nested in sections, with an explicit
+stack rather than recursion. It reports every problem with the path where
+it was found, e.g. "fields[2].options[0].label". Forms may be passed bare
+({"fields": [...]}) or wrapped in a model response ({"form_data": {...}}).
 
-    field_names = set()
-    for field in form_data["form_data"]["fields"]:
-        if not all(key in field for key in ["name", "label", "type", "required"]):
-            return False, f"Field missing required keys: {field}"
+validate_form_structure keeps its old (is_valid, detail) interface for
+existing callers.
+"""
+from typing import Any, Dict, Iterable, List, NamedTuple, Tuple
 
-        if field["type"] not in FIELD_TYPES:
-            return False, f"Invalid field type: {field['type']}"
+# Every type the generators emit: the LLM prompts, form_commands and spacy_form_processor
+FIELD_TYPES = [
+    "text", "number", "email", "radio", "dropdown", "checkbox", "date", "file", "image", "section",
+    "textarea", "person", "files", "url", "phone",
+]
 
-        if field["type"] in ["radio", "dropdown"] and "options" not in field:
-            return False, f"Field '{field['name']}' requires 'options'"
+# Per object kind, its keys: accepted "types", whether the key is "required", "non_empty",
+# allowed values ("enum"), and for lists the kind of their elements ("items")
+FORM_SCHEMA: Dict[str, Any] = {
+    "form": {
+        "fields": {"types": (list,), "required": True, "items": "field"},
+    },
+    "field": {
+        "name": {"types": (str,), "required": True, "non_empty": True},
+        "label": {"types": (str,), "required": True},
+        "type": {"types": (str,), "required": True, "enum": FIELD_TYPES},
+        "required": {"types": (bool,), "required": True},
+        "options": {"types": (list,), "items": "option"},
+        "fields": {"types": (list,), "items": "field"},
+    },
+    "option": {
+        "label": {"types": (str,), "required": True},
+        "value": {"types": (str, int, float), "required": True},
+    },
+}
 
-        if field["name"] in field_names:
-            return False, f"Duplicate field name: {field['name']}"
-        field_names.add(field["name"])
+# Keys required (or no longer required) for particular field types
+TYPE_REQUIREMENTS: Dict[str, Dict[str, bool]] = {
+    "radio": {"options": True},
+    "dropdown": {"options": True},
+    "section": {"fields": True, "required": False},
+}
 
-        if field["type"] == "section" and "fields" not in field:
-            return False, f"Section '{field['name']}' requires nested 'fields'"
+_TYPE_NAMES = {str: "a string", bool: "a boolean", list: "a list", int: "a number", float: "a number", dict: "an object"}
 
-    return True, "Valid form structure"
\ No newline at end of file
+
+class ValidationError(NamedTuple):
+    """One problem in a form: where it is and what is wrong."""
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}" if self.path else self.message
+
+
+class _CompiledKey(NamedTuple):
+    key: str
+    types: tuple
+    type_names: str
+    required: bool
+    non_empty: bool
+    enum: frozenset
+    items: str
+
+
+def _compile(schema: Dict[str, Any]) -> Dict[str, Tuple[_CompiledKey, ...]]:
+    compiled = {}
+    for name, keys in schema.items():
+        compiled[name] = tuple(
+            _CompiledKey(
+                key=key,
+                types=tuple(rule["types"]),
+                type_names=" or ".join(dict.fromkeys(_TYPE_NAMES.get(t, t.__name__) for t in rule["types"])),
+                required=rule.get("required", False),
+                non_empty=rule.get("non_empty", False),
+                enum=frozenset(rule.get("enum") or ()),
+                items=rule.get("items"),
+            )
+            for key, rule in keys.items()
+        )
+    return compiled
+
+
+class FormValidator:
+    """
+    Validator compiled once from a schema.
+
+    Usage:
+        validator = FormValidator()
+        errors = validator.validate({"fields": [...]})
+        results = validator.validate_many(forms)
+
+    Args:
+        schema (Dict[str, Any]): Named object schemas; must include "form"
+        type_requirements (Dict[str, Dict[str, bool]]): Per field type, keys whose
+            required flag differs from the "field" schema
+    """
+
+    def __init__(self, schema: Dict[str, Any] = None, type_requirements: Dict[str, Dict[str, bool]] = None):
+        self._schemas = _compile(schema if schema is not None else FORM_SCHEMA)
+        requirements = type_requirements if type_requirements is not None else TYPE_REQUIREMENTS
+        field_keys = {rule.key: rule for rule in self._schemas.get("field", ())}
+        # Field type -> the field's compiled keys with that type's required flags applied
+        self._field_variants = {
+            field_type: tuple(
+                rule._replace(required=overrides[rule.key]) if rule.key in overrides else rule
+                for rule in field_keys.values()
+            )
+            for field_type, overrides in requirements.items()
+        }
+
+    def validate(self, form: Any) -> List[ValidationError]:
+        """Every error in form (bare or wrapped in {"form_data": ...}); empty if it is valid."""
+        errors: List[ValidationError] = []
+        prefix = ""
+        if isinstance(form, dict) and "form_data" in form and "fields" not in form:
+            form, prefix = form["form_data"], "form_data"
+        if not isinstance(form, dict):
+            errors.append(ValidationError(prefix, "Form must be an object"))
+            return errors
+
+        names = set()
+        field_schema = self._schemas.get("field", ())
+        variants = self._field_variants
+        # (object, schema name, path) still to check, popped in document order. Paths stay
+        # (parent path, key, index) chains and are only formatted for an error.
+        stack = [(form, "form", prefix)]
+        while stack:
+            obj, schema_name, path = stack.pop()
+            if schema_name == "field":
+                field_type = obj.get("type")
+                rules = variants.get(field_type, field_schema) if isinstance(field_type, str) else field_schema
+                name = obj.get("name")
+                if isinstance(name, str):
+                    if name in names:
+                        errors.append(ValidationError(_format(path), f"Duplicate field name: {name}"))
+                    names.add(name)
+            else:
+                rules = self._schemas[schema_name]
+
+            children = []
+            for rule in rules:
+                value = obj.get(rule.key, _MISSING)
+                if value is _MISSING:
+                    if rule.required:
+                        errors.append(ValidationError(_format((path, rule.key, None)), "Missing required key"))
+                    continue
+                # bool is an int subclass, so it only passes where booleans are expected
+                if not isinstance(value, rule.types) or (type(value) is bool and bool not in rule.types):
+                    errors.append(ValidationError(_format((path, rule.key, None)), f"Must be {rule.type_names}"))
+                    continue
+                if rule.non_empty and not value:
+                    errors.append(ValidationError(_format((path, rule.key, None)), "Must not be empty"))
+                if rule.enum and value not in rule.enum:
+                    errors.append(ValidationError(_format((path, rule.key, None)), f"Invalid value: {value!r}"))
+                if rule.items is not None:
+                    for index, item in enumerate(value):
+                        if isinstance(item, dict):
+                            children.append((item, rule.items, (path, rule.key, index)))
+                        else:
+                            errors.append(ValidationError(_format((path, rule.key, index)), "Must be an object"))
+            if children:
+                stack.extend(reversed(children))
+        return errors
+
+    def is_valid(self, form: Any) -> bool:
+        return not self.validate(form)
+
+    def validate_many(self, forms: Iterable[Any]) -> List[List[ValidationError]]:
+        """Errors for each form, in order."""
+        validate = self.validate
+        return [validate(form) for form in forms]
+
+
+_MISSING = object()
+
+
+def _format(path: Any) -> str:
+    """Turn a (parent, key, index) chain into "fields[2].options[0]"."""
+    parts = []
+    while isinstance(path, tuple):
+        path, key, index = path
+        parts.append(f"{key}[{index}]" if index is not None else key)
+    if path:
+        parts.append(path)
+    return ".".join(reversed(parts))
+
+
+FORM_VALIDATOR = FormValidator()
+
+
+def validate_form(form: Any) -> List[ValidationError]:
+    """Every error in a form (bare or wrapped in {"form_data": ...})."""
+    return FORM_VALIDATOR.validate(form)
+
+
+def validate_forms(forms: Iterable[Any]) -> List[List[ValidationError]]:
+    """Errors for each of many forms, in order."""
+    return FORM_VALIDATOR.validate_many(forms)
+
+
+def validate_form_structure(form_data: dict) -> Tuple[bool, str]:
+    """
+    Check a form and summarise the result.
+
+    Returns:
+        Tuple[bool, str]: (True, "Valid form structure") or (False, every error joined by "; ")
+    """
+    errors = FORM_VALIDATOR.validate(form_data)
+    if errors:
+        return False, "; ".join(map(str, errors))
+    return True, "Valid form structure"
@@ -0,0 +1,207 @@
+"""
+Single-pass keyword matching for field-type detection.
+
+A synonym table such as [("email", ["email", "e-mail"]), ("radio", [...])]
+is compiled once into an Aho-Corasick automaton, so finding every keyword in
+an input costs one scan, whatever the number of keywords. Matches are
+case-insensitive and only whole words count ("date" does not match
+"update"). Earlier rows of the table take priority when several match.
+
+FieldPhraseMatcher adds the markers of "add a <type> field for <label> with
+options <a, b, c>" style commands to the same automaton. One scan then
+yields the field type, the label span and the option list.
+"""
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+_OPTION_SPLIT = re.compile(r"\s*,\s*")
+
+
+class KeywordMatch(NamedTuple):
+    """One keyword occurrence: text[start:end] matched keyword, which maps to value."""
+    start: int
+    end: int
+    keyword: str
+    value: Any
+    priority: int
+
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton over a (value, keywords) table.
+
+    Args:
+        table (Sequence[Tuple[Any, Sequence[str]]]): Rows in priority order; every keyword
+            of a row maps to its value
+    """
+
+    def __init__(self, table: Sequence[Tuple[Any, Sequence[str]]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str, Any, int]]] = [[]]
+
+        for priority, (value, keywords) in enumerate(table):
+            for keyword in keywords:
+                keyword = keyword.lower()
+                state = 0
+                for char in keyword:
+                    next_state = self._goto[state].get(char)
+                    if next_state is None:
+                        next_state = len(self._goto)
+                        self._goto[state][char] = next_state
+                        self._goto.append({})
+                        self._fail.append(0)
+                        self._out.append([])
+                    state = next_state
+                self._out[state].append((len(keyword), keyword, value, priority))
+
+        # Breadth-first pass to set failure links and merge outputs of suffix states;
+        # states at depth one fail back to the root, which they already do
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+        # Fold the failure links into a full transition table (a DFA), so the scan
+        # does one dict lookup per character; characters missing from a state's
+        # table lead back to the root
+        self._delta: List[Dict[str, int]] = [dict(self._goto[0])]
+        queue = deque(self._goto[0].values())
+        order = []
+        while queue:
+            state = queue.popleft()
+            order.append(state)
+            queue.extend(self._goto[state].values())
+        self._delta.extend({} for _ in range(len(self._goto) - 1))
+        for state in order:
+            # Parents come before children in BFS order, so the fail state is complete
+            delta = dict(self._delta[self._fail[state]])
+            delta.update(self._goto[state])
+            self._delta[state] = delta
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """
+        Return every whole-word keyword occurrence in text, in order of position.
+
+        text must already be lower-cased; callers that need spans in the original
+        text should lower-case it once and keep both.
+        """
+        delta, out = self._delta, self._out
+        matches = []
+        state = 0
+        length = len(text)
+        for i, char in enumerate(text):
+            state = delta[state].get(char, 0)
+            if out[state]:
+                end = i + 1
+                for size, keyword, value, priority in out[state]:
+                    start = end - size
+                    # Whole words only
+                    if start > 0 and text[start - 1].isalnum():
+                        continue
+                    if end < length and text[end].isalnum():
+                        continue
+                    matches.append(KeywordMatch(start, end, keyword, value, priority))
+        matches.sort(key=lambda match: (match.start, -match.end))
+        return matches
+
+    def best(self, text: str) -> Optional[KeywordMatch]:
+        """The highest-priority match (earliest on ties), or None."""
+        matches = self.find_all(text)
+        return min(matches, key=lambda match: (match.priority, match.start)) if matches else None
+
+
+# Marker phrases of field commands, matched in the same scan as the type keywords
+_LABEL_MARKERS = ["for", "called", "named", "labelled", "labeled"]
+_OPTION_MARKERS = ["with options", "with option", "with choices"]
+_FLAGS = ["add", "make", "required", "mandatory", "optional"]
+
+
+@dataclass
+class FieldPhrase:
+    """
+    Everything FieldPhraseMatcher found in one input.
+
+    Attributes:
+        field_type: Highest-priority type keyword outside the label (or anywhere if none), or None
+        label_span: (start, end) of the label in the original text, or None
+        options: Option labels after "with options", as written
+        flags: Flag words present ("add", "make", "required", "mandatory", "optional")
+    """
+    field_type: Optional[str] = None
+    label_span: Optional[Tuple[int, int]] = None
+    options: List[str] = field(default_factory=list)
+    flags: frozenset = frozenset()
+    text: str = ""
+
+    @property
+    def label(self) -> Optional[str]:
+        if self.label_span is None:
+            return None
+        return self.text[self.label_span[0]:self.label_span[1]].strip(" .!?") or None
+
+
+class FieldPhraseMatcher:
+    """
+    Compile a field-type synonym table and the command markers into one automaton.
+
+    Args:
+        type_keywords (Sequence[Tuple[str, Sequence[str]]]): (field type, keywords) rows in
+            priority order, e.g. utils.constants.FIELD_TYPE_KEYWORDS
+    """
+
+    def __init__(self, type_keywords: Sequence[Tuple[str, Sequence[str]]]):
+        table = [(("type", field_type), keywords) for field_type, keywords in type_keywords]
+        table.append((("label", None), _LABEL_MARKERS))
+        table.append((("options", None), _OPTION_MARKERS))
+        table.extend((("flag", flag), [flag]) for flag in _FLAGS)
+        self.matcher = KeywordMatcher(table)
+
+    def parse(self, text: str) -> FieldPhrase:
+        """Scan text once and extract the field type, label span, options and flags."""
+        lowered = text.lower()
+        if len(lowered) != len(text):
+            # Case folding changed the length; spans would not line up
+            text = lowered
+        matches = self.matcher.find_all(lowered)
+
+        label_start = options_start = options_marker_start = None
+        flags = set()
+        for match in matches:
+            kind, value = match.value
+            if kind == "label" and label_start is None:
+                label_start = match.end
+            elif kind == "options" and options_start is None:
+                options_marker_start, options_start = match.start, match.end
+            elif kind == "flag":
+                flags.add(value)
+
+        label_span = None
+        if label_start is not None:
+            label_end = options_marker_start if options_start is not None and options_start > label_start else len(text)
+            label_span = (label_start, label_end)
+
+        # A type keyword inside the label ("text field for date of birth") names the field, not its type
+        types = [match for match in matches if match.value[0] == "type"]
+        outside = [match for match in types if label_span is None or match.start < label_span[0]]
+        chosen = min(outside or types, key=lambda match: (match.priority, match.start)) if types else None
+
+        options = []
+        if options_start is not None:
+            options = [opt.strip(" .!?") for opt in _OPTION_SPLIT.split(text[options_start:]) if opt.strip(" .!?")]
+
+        return FieldPhrase(
+            field_type=chosen.value[1] if chosen else None,
+            label_span=label_span,
+            options=options,
+            flags=frozenset(flags),
+            text=text
+        )
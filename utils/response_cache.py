@@ -0,0 +1,291 @@
+"""
+Response cache for form generation requests.
+
+Identical requests (same provider/model, same normalised request text and
+same current form) return the same answer, so the first response is cached
+and later ones are served without an LLM round-trip. Lookups go through an
+in-memory LRU tier first and an optional SQLite tier second; responses are
+stored as JSON text so callers always get their own copy. An optional
+SimilarityIndex serves paraphrased prompts against the same form as a
+second-level fallback; it maps them to the key of a cached response, which
+is only served while the tiers still hold it.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from utils.form_store import InMemoryFormStore
+from utils.similarity_cache import SimilarityIndex
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_request(text: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation."""
+    return _WHITESPACE.sub(" ", text.lower()).strip().rstrip(".!?")
+
+
+def form_hash(form: Optional[Dict[str, Any]]) -> str:
+    """Canonical hash of a form, independent of key order and whitespace."""
+    canonical = json.dumps(form or {"fields": []}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def make_key(provider: str, request: str, form: Optional[Dict[str, Any]]) -> str:
+    """Cache key for a (provider/model, request text, current form) triple."""
+    raw = "\0".join([provider, normalize_request(request), form_hash(form)])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def is_cacheable_response(response: Any) -> bool:
+    """Only successful responses with at least one field are worth caching."""
+    if not isinstance(response, dict):
+        return False
+    form_data = response.get("form_data")
+    return isinstance(form_data, dict) and bool(form_data.get("fields"))
+
+
+class CacheTier(ABC):
+    """One storage level of the response cache."""
+
+    name = "tier"
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached JSON text for key, or None."""
+
+    @abstractmethod
+    def set(self, key: str, value: str) -> None:
+        """Store JSON text under key."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Return usage counters for this tier."""
+
+
+class MemoryCacheTier(CacheTier):
+    """LRU tier bounded by entry count and bytes, with a fixed TTL per entry."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 32 * 1024 * 1024,
+                 ttl_seconds: Optional[float] = 24 * 3600):
+        self._store = InMemoryFormStore(
+            num_shards=8,
+            max_entries=max_entries,
+            max_bytes=max_bytes,
+            ttl_seconds=ttl_seconds,
+            sliding_expiry=False
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        return self._store.get(key)
+
+    def set(self, key: str, value: str) -> None:
+        self._store.put(key, value, size=len(value))
+
+    def stats(self) -> Dict[str, int]:
+        return self._store.stats()
+
+
+class SQLiteCacheTier(CacheTier):
+    """
+    On-disk tier that survives restarts and can be shared by worker processes.
+
+    Args:
+        path (str): SQLite database file
+        max_entries (int): Rows kept; least recently used rows are pruned beyond this
+        ttl_seconds (Optional[float]): Age after which a row is ignored and pruned
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_entries: int = 100000, ttl_seconds: Optional[float] = 7 * 24 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS response_cache_accessed ON response_cache (accessed)")
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.ttl_seconds and row[1] + self.ttl_seconds <= now):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE response_cache SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._writes += 1
+            # Prune periodically rather than on every write
+            if self._writes % 100 == 0:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM response_cache WHERE created <= ?", (now - self.ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM response_cache WHERE key IN ("
+            "SELECT key FROM response_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+
+class ResponseCache:
+    """
+    Multi-tier cache placed in front of the LLM clients.
+
+    Args:
+        tiers (List[CacheTier]): Lookup order, fastest first. An empty list disables caching.
+        similarity (Optional[SimilarityIndex]): Near-duplicate fallback consulted on exact misses
+    """
+
+    def __init__(self, tiers: Optional[List[CacheTier]] = None, similarity: Optional[SimilarityIndex] = None):
+        self.tiers = tiers or []
+        self.similarity = similarity
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.tiers)
+
+    def get(self, provider: str, request: str, form: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response, or None on a miss."""
+        if not self.tiers:
+            return None
+
+        key = make_key(provider, request, form)
+        value = self._get_value(key)
+        if value is not None:
+            self._count(hit=True)
+            return json.loads(value)
+
+        if self.similarity is not None:
+            match = self.similarity.lookup(f"{provider}\0{form_hash(form)}", request)
+            if match is not None:
+                value = self._get_value(match[0])
+                if value is not None:
+                    self._count(hit=True, similar=True)
+                    return json.loads(value)
+                # Expired or evicted from every tier: the index entry is stale too
+                self.similarity.discard(match[0])
+
+        self._count(hit=False)
+        return None
+
+    def _get_value(self, key: str) -> Optional[str]:
+        for level, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                # Promote to the faster tiers
+                for faster in self.tiers[:level]:
+                    faster.set(key, value)
+                return value
+        return None
+
+    def set(self, provider: str, request: str, form: Optional[Dict[str, Any]], response: Dict[str, Any]) -> None:
+        """Store a successful response in every tier."""
+        if not self.tiers or not is_cacheable_response(response):
+            return
+
+        key = make_key(provider, request, form)
+        value = json.dumps(response)
+        for tier in self.tiers:
+            tier.set(key, value)
+        if self.similarity is not None:
+            self.similarity.add(key, f"{provider}\0{form_hash(form)}", request)
+
+    def _count(self, hit: bool, similar: bool = False) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+                if similar:
+                    self.similar_hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "tiers": {tier.name: tier.stats() for tier in self.tiers},
+            "similarity": self.similarity.stats() if self.similarity is not None else None
+        }
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    """
+    Process-wide cache configured from the environment.
+
+    RESPONSE_CACHE_ENABLED (default 1), RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_MAX_BYTES and RESPONSE_CACHE_TTL_SECONDS configure the
+    memory tier; RESPONSE_CACHE_DB enables the SQLite tier at that path.
+    RESPONSE_CACHE_SIMILARITY_THRESHOLD (default 0.9, 0 disables) and
+    RESPONSE_CACHE_SIMILARITY_MAX_ENTRIES configure the near-duplicate index.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            tiers: List[CacheTier] = []
+            similarity = None
+            if os.getenv("RESPONSE_CACHE_ENABLED", "1") not in ("0", "false", "False"):
+                ttl = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(24 * 3600))) or None
+                tiers.append(MemoryCacheTier(
+                    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048")),
+                    max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+                    ttl_seconds=ttl
+                ))
+                db_path = os.getenv("RESPONSE_CACHE_DB")
+                if db_path:
+                    tiers.append(SQLiteCacheTier(db_path, ttl_seconds=ttl))
+                threshold = float(os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", "0.9"))
+                if threshold > 0:
+                    similarity = SimilarityIndex(
+                        threshold=threshold,
+                        max_entries=int(os.getenv("RESPONSE_CACHE_SIMILARITY_MAX_ENTRIES", "1024")),
+                        ttl_seconds=ttl
+                    )
+            _default_cache = ResponseCache(tiers, similarity)
+        return _default_cache
@@ -0,0 +1,198 @@
+"""
+Near-duplicate prompt index for the response cache.
+
+Exact-match caching misses paraphrases such as "make a signup form with
+name & email" vs "create a sign-up form with name and email". Prompts are
+normalised (case, punctuation, a few synonyms, stop words), turned into a set
+of word unigrams and bigrams and indexed with MinHash + LSH, entirely
+locally. A lookup only considers entries for the same provider and the same
+current form hash, and accepts the best candidate whose exact Jaccard
+similarity reaches the threshold. The index only maps prompts to cache keys;
+the response itself is read back from the cache tiers, so a match whose key
+has expired or been evicted there is a miss.
+"""
+import hashlib
+import logging
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Words that don't change what the user is asking for
+STOP_WORDS = frozenset([
+    "a", "an", "the", "with", "and", "for", "of", "to", "please", "me", "i", "want", "need",
+    "can", "you", "that", "has", "have", "containing", "contains", "includes", "including",
+])
+
+# Spelling variants and verbs that mean the same thing for form requests
+SYNONYMS = {
+    "make": "create", "build": "create", "generate": "create", "design": "create",
+    "sign-up": "signup", "registration": "signup", "register": "signup",
+    "e-mail": "email", "mail": "email",
+    "phone-number": "phone", "mobile": "phone", "telephone": "phone",
+    "dob": "birthday", "birthdate": "birthday",
+    "fields": "field", "questions": "question", "options": "option",
+}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def normalize_prompt(text: str) -> List[str]:
+    """Return the normalised token list for a prompt."""
+    text = text.lower().replace("&", " and ")
+    # Join hyphenated words before tokenising so "sign-up" == "signup"
+    words = [SYNONYMS.get(word, word) for word in text.split()]
+    tokens = []
+    for word in words:
+        for token in _TOKEN.findall(word.replace("-", "")):
+            token = SYNONYMS.get(token, token)
+            if token not in STOP_WORDS:
+                tokens.append(token)
+    return tokens
+
+
+def shingles(tokens: List[str]) -> FrozenSet[str]:
+    """Unigrams plus bigrams, so word order still matters a little."""
+    grams = set(tokens)
+    grams.update(f"{first} {second}" for first, second in zip(tokens, tokens[1:]))
+    return frozenset(grams)
+
+
+def _base_hash(shingle: str) -> int:
+    return struct.unpack("<Q", hashlib.blake2b(shingle.encode(), digest_size=8).digest())[0]
+
+
+class MinHasher:
+    """Fixed family of num_perm universal hash functions used to build signatures."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        params = hashlib.blake2b(f"minhash-{seed}".encode(), digest_size=64).digest()
+        self.num_perm = num_perm
+        self._coeffs: List[Tuple[int, int]] = []
+        counter = 0
+        while len(self._coeffs) < num_perm:
+            block = hashlib.blake2b(params + counter.to_bytes(4, "little"), digest_size=16).digest()
+            a, b = struct.unpack("<QQ", block)
+            self._coeffs.append(((a % (_MERSENNE_PRIME - 1)) + 1, b % _MERSENNE_PRIME))
+            counter += 1
+
+    def signature(self, grams: FrozenSet[str]) -> Tuple[int, ...]:
+        hashes = [_base_hash(gram) for gram in grams] or [0]
+        return tuple(
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._coeffs
+        )
+
+
+class SimilarityIndex:
+    """
+    Bounded MinHash/LSH index of cached responses.
+
+    Args:
+        threshold (float): Minimum Jaccard similarity for a hit (0-1)
+        max_entries (int): Entries kept; the least recently used are dropped first
+        num_perm (int): MinHash signature length
+        bands (int): LSH bands; num_perm must be divisible by bands
+        ttl_seconds (Optional[float]): Age after which an entry is dropped, None to disable;
+            set it to the cache tiers' TTL
+    """
+
+    def __init__(self, threshold: float = 0.9, max_entries: int = 1024, num_perm: int = 64, bands: int = 16,
+                 ttl_seconds: Optional[float] = None):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ttl_seconds = ttl_seconds
+        self._hasher = MinHasher(num_perm)
+        self._lock = threading.Lock()
+        # key -> (scope, grams, band keys, prompt, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._buckets: Dict[tuple, set] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _band_keys(self, scope: str, signature: Tuple[int, ...]) -> List[tuple]:
+        rows = self.rows
+        return [(scope, band, signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def add(self, key: str, scope: str, prompt: str) -> None:
+        """Index the cache key of a prompt for the given scope (provider + form hash)."""
+        grams = shingles(normalize_prompt(prompt))
+        band_keys = self._band_keys(scope, self._hasher.signature(grams))
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (scope, grams, band_keys, prompt, expires_at)
+            for band_key in band_keys:
+                self._buckets.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def discard(self, key: str) -> None:
+        """Drop key, e.g. once the cache tiers no longer hold it."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        _, _, band_keys, _, _ = self._entries.pop(key)
+        for band_key in band_keys:
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def lookup(self, scope: str, prompt: str) -> Optional[Tuple[str, float]]:
+        """Return (cache key, similarity) of the most similar live entry at or above threshold."""
+        grams = shingles(normalize_prompt(prompt))
+        band_keys = self._band_keys(scope, self._hasher.signature(grams))
+        with self._lock:
+            candidates = set()
+            for band_key in band_keys:
+                candidates.update(self._buckets.get(band_key, ()))
+
+            now = time.monotonic()
+            best_key, best_score = None, 0.0
+            for key in candidates:
+                _, other, _, _, expires_at = self._entries[key]
+                if expires_at is not None and expires_at <= now:
+                    self._remove(key)
+                    continue
+                union = len(grams | other)
+                score = len(grams & other) / union if union else 0.0
+                if score > best_score:
+                    best_key, best_score = key, score
+
+            if best_key is None or best_score < self.threshold:
+                self.misses += 1
+                if best_key is not None:
+                    logger.debug("Similarity cache miss (best score=%.3f): %r", best_score, prompt)
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            matched_prompt = self._entries[best_key][3]
+
+        logger.info("Similarity cache hit (score=%.3f): %r ~ %r", best_score, prompt, matched_prompt)
+        return best_key, best_score
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+            }